@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# m.solve_async and m.solve_stream solve without blocking the event loop and
+# the solver process is killed when the caller stops early. The solver is the
+# stub solver of benchmark.py, or a slow executable that writes its process
+# id, prints a line and then waits.
+import asyncio
+import contextlib
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+@contextlib.contextmanager
+def slow_solver():
+    folder = tempfile.mkdtemp(prefix='gk_slow')
+    exe = os.path.join(folder, 'apm')
+    with open(exe, 'w') as f:
+        f.write('#!' + sys.executable + '\n'
+                'import os, sys, time\n'
+                'with open("pid", "w") as f:\n'
+                '    f.write(str(os.getpid()))\n'
+                'print("started")\n'
+                'sys.stdout.flush()\n'
+                'time.sleep(60)\n')
+    os.chmod(exe, os.stat(exe).st_mode | stat.S_IXUSR)
+    apm_executable = GEKKO._apm_executable
+    GEKKO._apm_executable = lambda self: (exe, False)
+    try:
+        yield
+    finally:
+        GEKKO._apm_executable = apm_executable
+        shutil.rmtree(folder, ignore_errors=True)
+
+def model():
+    m = GEKKO(remote=False)
+    x = m.Var(value=1, name='x')
+    m.Equation(x >= 0)
+    return m, x
+
+def running(m):
+    '''Whether the process of the slow solver is still running'''
+    with open(os.path.join(m._path, 'pid')) as f:
+        pid = int(f.read())
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    return True
+
+def solve_async():
+    with benchmark.stub_executable():
+        m, x = model()
+        asyncio.run(m.solve_async(disp=False))
+        assert x.value[0] == 1
+        lines = []
+        async def stream():
+            async for line in m.solve_stream():
+                lines.append(line)
+        asyncio.run(stream())
+        assert 'Successful solution' in ''.join(lines)
+        m.cleanup()
+
+def stop_early():
+    with slow_solver():
+        m, x = model()
+        async def first_line():
+            stream = m.solve_stream()
+            async for line in stream:
+                break
+            await stream.aclose()
+            return line
+        assert asyncio.run(asyncio.wait_for(first_line(), 10)) == 'started\n'
+        assert not running(m)
+
+        # without aclose the generator is closed when it is collected
+        async def drop():
+            async for line in m.solve_stream():
+                break
+            await asyncio.sleep(0.1)
+        asyncio.run(asyncio.wait_for(drop(), 10))
+        assert not running(m)
+        m.cleanup()
+
+def cancelled():
+    with slow_solver():
+        m, x = model()
+        async def cancel():
+            task = asyncio.ensure_future(m.solve_async(disp=False))
+            while not os.path.isfile(os.path.join(m._path, 'pid')):
+                await asyncio.sleep(0.01)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            else:
+                assert False, 'the solve was not cancelled'
+        asyncio.run(asyncio.wait_for(cancel(), 10))
+        assert not running(m)
+
+        # time limit of the solver
+        m.options.MAX_TIME = 0.5
+        try:
+            asyncio.run(m.solve_async(disp=False))
+        except Exception as e:
+            assert 'Time Limit Exceeded' in str(e)
+        else:
+            assert False, 'the time limit was not applied'
+        assert not running(m)
+        m.cleanup()
+
+test_runner.test('solve_async results', solve_async)
+test_runner.test('solve_stream stopped early', stop_early)
+test_runner.test('solve_async cancelled', cancelled)
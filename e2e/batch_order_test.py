@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# solve_many and m.sweep return the results in the order of the models and
+# scenarios, also when the solves finish in a different order. The solver is
+# the stub solver of benchmark.py with a delay: it sets y = 10*k and the
+# solves with a larger k finish first.
+import contextlib
+import os
+import shutil
+import stat
+import sys
+import tempfile
+
+from gekko import GEKKO, solve_many
+import benchmark
+import test_runner
+
+@contextlib.contextmanager
+def delayed_solver():
+    with benchmark.stub_executable():
+        stub, _ = GEKKO._apm_executable(None)
+        folder = tempfile.mkdtemp(prefix='gk_delayed')
+        exe = os.path.join(folder, 'apm')
+        with open(exe, 'w') as f:
+            f.write('#!' + sys.executable + '\n'
+                    'import json, subprocess, sys, time\n'
+                    'subprocess.check_call([' + repr(stub) + ', sys.argv[1]])\n'
+                    'with open("results.json") as f:\n'
+                    '    results = json.load(f)\n'
+                    'k = results["k"][0]\n'
+                    'time.sleep(0.2 * (3 - k))\n'
+                    'results["y"] = [10 * k] * len(results["y"])\n'
+                    'with open("results.json", "w") as f:\n'
+                    '    json.dump(results, f)\n')
+        os.chmod(exe, os.stat(exe).st_mode | stat.S_IXUSR)
+        apm_executable = GEKKO._apm_executable
+        GEKKO._apm_executable = lambda self: (exe, False)
+        try:
+            yield
+        finally:
+            GEKKO._apm_executable = apm_executable
+            shutil.rmtree(folder, ignore_errors=True)
+
+def model(k=1):
+    m = GEKKO(remote=False)
+    k = m.FV(value=k, name='k')
+    y = m.Var(name='y')
+    m.Equation(y == 10 * k)
+    return m, k, y
+
+def solve_many_order():
+    with delayed_solver():
+        for backend in ('thread', 'process'):
+            models = [model(k) for k in (1, 2, 3)]
+            status = solve_many([m for m, k, y in models], workers=3, backend=backend)
+            assert [s['model'] for s in status] == [m for m, k, y in models]
+            assert [s['status'] for s in status] == ['success'] * 3
+            assert [y.value[0] for m, k, y in models] == [10, 20, 30]
+            for m, k, y in models:
+                m.cleanup()
+
+def sweep_order():
+    with delayed_solver():
+        m, k, y = model()
+        results, status = m.sweep({'k': [1, 2, 3]}, outputs=[y], workers=3)
+        assert list(results['k']) == [1, 2, 3]
+        assert list(results['y']) == [10, 20, 30]
+        assert [s['status'] for s in status] == ['success'] * 3
+        # the model keeps its own value
+        assert k.value == 1
+        m.cleanup()
+
+test_runner.test('solve_many result order', solve_many_order)
+test_runner.test('sweep result order', sweep_order)
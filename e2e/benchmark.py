@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the GEKKO front end with JSON baselines.
+
+    python benchmark.py run -o baseline.json
+    python benchmark.py run -o new.json
+    python benchmark.py compare baseline.json new.json
+    python benchmark.py compare baseline.json      # runs the benchmarks again
+
+The workloads are the E2E tests of this folder and synthetic models with
+1k, 10k and 100k variables (--sizes). No optimizer is needed:
+
+- import: `import gekko` in a new interpreter. The optional modules of
+  LAZY_IMPORTS that it loads are stored in meta['eager_imports'] and are
+  regressions in compare.
+
+- frontend: the model is built and m.solve() only writes the model files,
+  the result files are then generated by the stub solver in this process
+  (not timed) and loaded. This times building the expressions, _build_model,
+  _write_csv, the option files and load_results.
+- solve: m.solve() runs completely with stub_solver.py as the APM
+  executable (not on Windows), which writes the result files without
+  solving anything. This adds the start of the solver process.
+
+The E2E tests check the results of the real solver, those assertions fail
+with the stub and are ignored. Every benchmark is repeated (--repeat) and
+the minimum and median seconds are stored for each of its metrics:
+
+    {"meta": {...}, "benchmarks": {"<workload>/<mode>/<metric>":
+                                   {"min": s, "median": s}}}
+
+compare flags every metric that is slower than the baseline by more than
+--threshold (fraction) and --min-delta (seconds) and exits with status 1
+if there are regressions.
+"""
+from __future__ import division
+
+import argparse
+import contextlib
+import datetime
+import importlib
+import json
+import os
+import platform
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+import numpy as np
+
+import gekko
+from gekko import GEKKO
+from gekko.gk_global_options import GKGlobalOptions
+from gekko.properties import parameter_options, variable_options
+import stub_solver
+
+WORKLOADS = ['hs71_test', 'benchmark2_test', 'benchmark3_test', 'benchmark4_test',
+             'benchmark_jennings_test', 'fishing_optimization_test',
+             'cruisecontrol_test', 'hw_HIV_test', 'hw_flightcontrol_test',
+             'hw_reservoirs_test']
+SIZES = [1000, 10000, 100000]
+MODES = ('frontend', 'solve')
+# modules that `import gekko` must not load, they are imported when used
+LAZY_IMPORTS = ('asyncio', 'argparse', 'dataclasses', 'uuid', 'gekko.gk_mcp',
+                'gekko.gk_gui', 'gekko.ML', 'gekko.brain', 'gekko.chemical',
+                'gekko.gk_solver_extension', 'flask', 'orjson', 'ujson')
+IMPORT_REPEAT = 10
+# phases of m.profile that are reported (see gekko/gk_profile.py)
+PHASES = ('build_model', 'write_csv', 'write_dbs', 'write_solver_options',
+          'write_info', 'solve', 'load_results', 'load_options')
+
+
+#%% Stub solver
+
+def solver_spec():
+    '''Output options of the model and of each FV/MV/SV/CV type for the stub'''
+    defaults = GKGlobalOptions()
+    spec = {'APM': dict((o, getattr(defaults, o)) for o in
+                        defaults._output_option_list + defaults._inout_option_list),
+            'types': {}}
+    for options in (parameter_options, variable_options):
+        for vptype, lists in options.items():
+            if vptype is not None:
+                spec['types'][vptype] = [o for o in lists['outputs'] + lists['inout']
+                                         if o != 'VALUE']
+    return spec
+
+
+@contextlib.contextmanager
+def stub_executable(session=False):
+    '''Executable that runs stub_solver.main, used as the APM executable,
+    or stub_solver.session that stays alive between solves'''
+    folder = tempfile.mkdtemp(prefix='gk_stub')
+    spec = os.path.join(folder, 'spec.json')
+    with open(spec, 'w') as f:
+        json.dump(solver_spec(), f)
+    exe = os.path.join(folder, 'apm')
+    # the solver runs with only the model folder on PATH, use full paths
+    with open(exe, 'w') as f:
+        f.write('#!' + sys.executable + '\n'
+                'import sys\n'
+                'sys.path.insert(0, ' + repr(HERE) + ')\n'
+                'import stub_solver\n'
+                'stub_solver.' + ('session' if session else 'main') +
+                '(sys.argv[1], ' + repr(spec) + ')\n')
+    os.chmod(exe, os.stat(exe).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    apm_executable = GEKKO._apm_executable
+    GEKKO._apm_executable = lambda self: (exe, False)
+    try:
+        yield
+    finally:
+        GEKKO._apm_executable = apm_executable
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+#%% Timed solves
+
+class _Solves(object):
+    '''Replaces GEKKO.solve to collect the profile of every solve'''
+
+    def __init__(self, mode, spec):
+        self.mode = mode
+        self.spec = spec
+        self.models = []
+        self.records = []
+        self.seconds = 0.0 # time spent in solve
+        self.stub = 0.0 # results written by the stub in frontend mode
+
+    def __enter__(self):
+        self._solve = GEKKO.solve
+        solves = self
+
+        def solve(m, disp=True, debug=1, GUI=False, **kwargs):
+            t = time.perf_counter()
+            if not any(m is model for model in solves.models):
+                solves.models.append(m)
+            try:
+                if solves.mode == 'solve':
+                    solves._solve(m, disp=False, debug=debug, profile=True, **kwargs)
+                else:
+                    solves._frontend(m, debug)
+            finally:
+                solves.seconds += time.perf_counter() - t
+                if m.profile.last is not None:
+                    solves.records.append(m.profile.last)
+                    m.profile.clear()
+        GEKKO.solve = solve
+        return self
+
+    def _frontend(self, m, debug):
+        # same steps as m.solve() with the results written in this process
+        m.profile.start()
+        m._check_options()
+        m._write_files(debug)
+        t = time.perf_counter()
+        stub_solver.write_results(m._path, m._model_name, self.spec)
+        self.stub += time.perf_counter() - t
+        m._load_solution(debug)
+        m.profile.finish(m.options)
+
+    def __exit__(self, *args):
+        GEKKO.solve = self._solve
+        for m in self.models:
+            m.cleanup()
+
+    def metrics(self, total):
+        '''Seconds of the whole workload, of building the model (everything
+        but the solves) and of each phase of the solves'''
+        total -= self.stub
+        metrics = {'total': total, 'model': total - self.seconds + self.stub}
+        for phase in PHASES:
+            seconds = [r['phases'][phase]['seconds'] for r in self.records
+                       if phase in r['phases']]
+            if seconds:
+                metrics[phase] = sum(seconds)
+        return metrics
+
+
+def _run(workload, mode, spec):
+    with _Solves(mode, spec) as solves:
+        t = time.perf_counter()
+        try:
+            workload()
+        except AssertionError:
+            pass # results of the stub solver don't match the tests
+        total = time.perf_counter() - t
+    return solves.metrics(total)
+
+
+#%% Workloads
+
+def e2e_workloads(names=WORKLOADS):
+    '''Test functions of the E2E tests without running them'''
+    import test_runner
+    tests = []
+    test = test_runner.test
+    test_runner.test = lambda name, func: tests.append(func)
+    workloads = {}
+    try:
+        for name in names:
+            del tests[:]
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                print('Skipping ' + name + ': ' + str(e))
+                continue
+            for i, func in enumerate(tests):
+                workloads[name if i == 0 else name + str(i)] = func
+    finally:
+        test_runner.test = test
+    return workloads
+
+
+def synthetic(n):
+    '''Steady-state model with n variables, n-1 equations and an objective'''
+    def workload():
+        m = GEKKO(remote=False)
+        x = m.Array(m.Var, n, value=1, lb=0, ub=10)
+        m.Equations([x[i] + 2*x[i+1] >= 1 for i in range(n - 1)])
+        m.Minimize(m.sum(list(x)))
+        m.options.IMODE = 3
+        m.solve(disp=False)
+    return workload
+
+
+#%% Import time
+
+def import_time(repeat=IMPORT_REPEAT):
+    '''Seconds of `import gekko` in new interpreters and the modules of
+    LAZY_IMPORTS that it loaded'''
+    code = ('import sys, time\n'
+            't = time.perf_counter()\n'
+            'import gekko\n'
+            'print(time.perf_counter() - t)\n'
+            'print(" ".join(m for m in %r if m in sys.modules))\n' % (LAZY_IMPORTS,))
+    # the gekko of this repository
+    path = [os.path.dirname(HERE)]
+    if os.environ.get('PYTHONPATH'):
+        path.append(os.environ['PYTHONPATH'])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+    seconds = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', code], env=env,
+                                      universal_newlines=True).splitlines()
+        seconds.append(float(out[0]))
+    return seconds, out[1].split() if len(out) > 1 else []
+
+
+#%% Run and compare
+
+def run(sizes=SIZES, modes=MODES, repeat=3, workloads=None, verbose=True):
+    if 'solve' in modes and os.name == 'nt':
+        print('Skipping the solve benchmarks, the stub solver needs a POSIX system')
+        modes = [mode for mode in modes if mode != 'solve']
+    spec = solver_spec()
+    cwd = os.getcwd()
+    os.chdir(HERE) # E2E tests read their data relative to this folder
+    try:
+        tests = e2e_workloads(WORKLOADS if workloads is None else workloads)
+        tests.update(('synthetic_' + str(n), synthetic(n)) for n in sizes)
+        benchmarks = {}
+        with stub_executable():
+            for name, workload in tests.items():
+                for mode in modes:
+                    samples = []
+                    for _ in range(repeat):
+                        try:
+                            samples.append(_run(workload, mode, spec))
+                        except Exception as e:
+                            print('Error in ' + name + ' (' + mode + '): ' + str(e))
+                            break
+                    if len(samples) < repeat:
+                        continue
+                    for metric in samples[0]:
+                        values = [s[metric] for s in samples]
+                        benchmarks[name + '/' + mode + '/' + metric] = \
+                            {'min': min(values), 'median': float(np.median(values))}
+                    if verbose:
+                        print('%-40s %9.4f s' % (name + '/' + mode,
+                                                 benchmarks[name + '/' + mode + '/total']['min']))
+    finally:
+        os.chdir(cwd)
+    seconds, eager = import_time()
+    benchmarks['import_gekko/import/total'] = {'min': min(seconds),
+                                               'median': float(np.median(seconds))}
+    if verbose:
+        print('%-40s %9.4f s' % ('import_gekko/import', min(seconds)))
+        if eager:
+            print('import gekko loads ' + ', '.join(eager))
+    meta = {'date': datetime.datetime.now().isoformat(),
+            'gekko': gekko.__version__,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'sizes': list(sizes),
+            'modes': list(modes),
+            'workloads': list(tests),
+            'eager_imports': eager}
+    return {'meta': meta, 'benchmarks': benchmarks}
+
+
+def compare(baseline, results, threshold=0.1, min_delta=1e-3):
+    '''Print the change of every metric, returns the regressions'''
+    base, new = baseline['benchmarks'], results['benchmarks']
+    regressions = []
+    print('%-56s %10s %10s %8s' % ('benchmark', 'baseline', 'new', 'change'))
+    for key in sorted(set(base) & set(new)):
+        b, n = base[key]['min'], new[key]['min']
+        change = (n - b) / b if b > 0 else 0.0
+        flag = ''
+        if n - b > min_delta and change > threshold:
+            flag = 'REGRESSION'
+            regressions.append(key)
+        elif b - n > min_delta and -change > threshold:
+            flag = 'faster'
+        print('%-56s %10.4f %10.4f %+7.1f%% %s' % (key, b, n, 100 * change, flag))
+    for key in sorted(set(base) - set(new)):
+        print('%-56s missing in the new results' % key)
+    for key in sorted(set(new) - set(base)):
+        print('%-56s not in the baseline' % key)
+    # optional modules that `import gekko` loads now
+    for module in results['meta'].get('eager_imports', []):
+        if module not in baseline['meta'].get('eager_imports', []):
+            print('%-56s imported by import gekko' % module)
+            regressions.append('import_gekko/' + module)
+    print(str(len(regressions)) + ' regression(s)')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='GEKKO front-end benchmarks')
+    commands = parser.add_subparsers(dest='command')
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('-o', '--output', default='benchmark.json',
+                            help='JSON file of the results')
+    compare_parser = commands.add_parser('compare', help='compare results with a baseline')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('results', nargs='?',
+                                help='default is to run the benchmarks of the baseline again')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help='slowdown (fraction) that is a regression')
+    compare_parser.add_argument('--min-delta', type=float, default=1e-3,
+                                help='smallest slowdown in seconds that is a regression')
+    for p in (run_parser, compare_parser):
+        p.add_argument('--sizes', type=int, nargs='*', help='variables of the synthetic models')
+        p.add_argument('--modes', nargs='*', choices=MODES)
+        p.add_argument('--repeat', type=int)
+        p.add_argument('--workloads', nargs='*', help='E2E tests (module names)')
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+
+    def settings(meta):
+        return dict(sizes=args.sizes if args.sizes is not None else meta.get('sizes', SIZES),
+                    modes=args.modes or meta.get('modes', MODES),
+                    repeat=args.repeat or meta.get('repeat', 3),
+                    workloads=args.workloads if args.workloads is not None else
+                    [w for w in meta.get('workloads', WORKLOADS) if w in WORKLOADS])
+
+    if args.command == 'run':
+        results = run(**settings({}))
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print('Results written to ' + args.output)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.results:
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        results = run(**settings(baseline['meta']))
+    return 1 if compare(baseline, results, args.threshold, args.min_delta) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
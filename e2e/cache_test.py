@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# The on-disk cache of model files (gekko.gk_cache): identical model and
+# object files are stored once and linked into the model folders, the least
+# recently used files are removed above the size limit. Solved with the stub
+# solver of benchmark.py.
+import hashlib
+import os
+import shutil
+import tempfile
+
+from gekko import GEKKO, gk_cache
+import benchmark
+import test_runner
+
+def model(n=3):
+    m = GEKKO(remote=False)
+    x = m.Array(m.Var, n, value=1, lb=0)
+    m.Equations([x[i] + x[i + 1] >= 1 for i in range(n - 1)])
+    m.cspline(m.Var(), m.Var(), [0, 1, 2], [0, 1, 4])
+    return m
+
+def files(m):
+    return {'apm': os.stat(os.path.join(m._path, m._model_name + '.apm')),
+            'cspline': os.stat(os.path.join(m._path, 'cspline1.csv'))}
+
+def shared_files():
+    folder = tempfile.mkdtemp(prefix='gk_cache')
+    cache = gk_cache.enable(folder)
+    try:
+        with benchmark.stub_executable():
+            m1 = model()
+            m2 = model()
+            m1.solve(disp=False)
+            assert cache.misses == 2 and cache.hits == 0
+            m2.solve(disp=False)
+            assert cache.hits == 2
+            # the same files, linked from the cache
+            f1, f2 = files(m1), files(m2)
+            for name in f1:
+                assert f1[name].st_ino == f2[name].st_ino
+                assert f1[name].st_nlink == 3
+            with open(os.path.join(m1._path, m1._model_name + '.apm')) as f:
+                text = f.read()
+            key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            assert os.path.isfile(os.path.join(folder, key[:2], key))
+
+            # a changed model doesn't change the cached file of the other one
+            m1.Equation(m1._variables[0] <= 5)
+            m1.solve(disp=False)
+            with open(os.path.join(m2._path, m2._model_name + '.apm')) as f:
+                assert f.read() == text
+            assert files(m2)['apm'].st_nlink == 2
+            m1.cleanup()
+            m2.cleanup()
+    finally:
+        gk_cache.disable()
+        shutil.rmtree(folder, ignore_errors=True)
+
+def disabled():
+    assert gk_cache.active() is None
+    with benchmark.stub_executable():
+        m = model()
+        m.solve(disp=False)
+        assert files(m)['apm'].st_nlink == 1
+        m.cleanup()
+
+def eviction():
+    folder = tempfile.mkdtemp(prefix='gk_cache')
+    try:
+        cache = gk_cache.GKCache(folder, max_size=250)
+        target = os.path.join(folder, 'model.apm')
+        keys = []
+        for i, text in enumerate(('a' * 100, 'b' * 100)):
+            keys.append(cache.place(target, text))
+            os.utime(cache._file(keys[-1]), (i, i))
+        # a hit is the most recently used file
+        assert cache.place(target, 'a' * 100) == keys[0]
+        assert cache.hits == 1
+        keys.append(cache.place(target, 'c' * 100))
+        assert not os.path.exists(cache._file(keys[1]))
+        assert os.path.exists(cache._file(keys[0])) and os.path.exists(cache._file(keys[2]))
+        assert cache.size() == 200
+        # the file linked to the model folder is not affected
+        with open(target) as f:
+            assert f.read() == 'c' * 100
+        cache.clear()
+        assert cache.size() == 0
+        with open(target) as f:
+            assert f.read() == 'c' * 100
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+def streamed():
+    folder = tempfile.mkdtemp(prefix='gk_cache')
+    cache = gk_cache.enable(os.path.join(folder, 'cache'))
+    try:
+        target = os.path.join(folder, 'model.apm')
+        for i in range(2):
+            with gk_cache.stream(target) as f:
+                f.write('Model\n')
+                f.writelines(['x = 1\n', 'End Model\n'])
+        assert cache.misses == 1 and cache.hits == 1
+        key = hashlib.sha256(b'Model\nx = 1\nEnd Model\n').hexdigest()
+        assert os.path.samefile(target, cache._file(key))
+        # no temporary files are left
+        assert os.listdir(folder) == ['cache', 'model.apm']
+        # without the cache the file is written (and unlinked from the cache)
+        gk_cache.disable()
+        with gk_cache.stream(target) as f:
+            f.write('Model\nEnd Model\n')
+        with open(cache._file(key)) as f:
+            assert f.read() == 'Model\nx = 1\nEnd Model\n'
+    finally:
+        gk_cache.disable()
+        shutil.rmtree(folder, ignore_errors=True)
+
+test_runner.test('cache shared files', shared_files)
+test_runner.test('cache disabled', disabled)
+test_runner.test('cache eviction', eviction)
+test_runner.test('cache stream', streamed)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# The data file (.csv) built from float64 columns is the same as the one
+# written with object arrays of strings by earlier versions: integers,
+# the shortest text of floats, 'measurement' and fixed values, and blanks
+# for the elements that did not change.
+import os
+
+import numpy as np
+from gekko import GEKKO
+import test_runner
+
+def read_csv(m):
+    with open(os.path.join(m._path, m._model_name + '.csv')) as f:
+        return f.read()
+
+def data_file():
+    m = GEKKO(remote=False, name='data')
+    m.time = [0, 0.5, 1.5, 3]
+    u = m.MV(value=[1, 2, 3, 4], name='u')
+    n = m.Param(value=np.array([1, 2, 3, 4]), name='n')
+    k = m.FV(value=0.1, name='k')
+    y = m.CV(value=0, name='y')
+    y.FSTATUS = 1
+    y.MEAS = 2.5
+    w = m.Var(value=[0.1, 1e-7, 1/3, 2e10], name='w')
+    m.fix(w, 5.0, pos=2)
+    m.Equation(y.dt() == -y + u * k + n - w)
+    m.options.IMODE = 5
+    m._write_csv()
+    assert read_csv(m) == 'time,y,w,u,n,k\n0.0,0.0,0.1,1,1,0.1\n0.5,0.0,1e-07,2,2,0.1\n1.5,0.0,5.0,3,3,0.1\n3.0,measurement,20000000000.0,4,4,0.1\n'
+
+    # only the changed element of u, the others are blank
+    for vp in (u, n, k, w, y):
+        vp.value.change = False
+    u.value[1] = 7
+    m._write_csv()
+    assert read_csv(m) == 'time,u\n0.0, \n0.5,7\n1.5, \n3.0, \n'
+    m.cleanup()
+
+test_runner.test('csv data file', data_file)
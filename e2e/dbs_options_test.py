@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Options written to measurements.dbs between solves. Solved with the stub
+# solver of benchmark.py (no optimizer), which keeps the options of the last
+# solve in {model}.dbs like APM.
+import os
+
+import numpy as np
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+def read_dbs(m):
+    with open(os.path.join(m._path,'measurements.dbs')) as f:
+        return f.read()
+
+def mpc():
+    m = GEKKO(remote=False)
+    m.time = np.linspace(0,1,3)
+    u = m.MV(value=1)
+    u.STATUS = 1
+    u.DCOST = 0.1
+    y = m.CV(value=0)
+    y.STATUS = 1
+    m.Equation(y.dt() == u - y)
+    m.options.IMODE = 6
+    m.options.NODES = 3
+    return m, u, y
+
+def assert_all_options(m, u):
+    dbs = read_dbs(m).splitlines()
+    assert 'APM.IMODE = 6' in dbs
+    assert 'APM.NODES = 3' in dbs
+    assert u.name + '.STATUS = 1' in dbs
+    assert u.name + '.DCOST = 0.1' in dbs
+
+def changed_options():
+    with benchmark.stub_executable():
+        m, u, y = mpc()
+        m.solve(disp=False)
+        assert_all_options(m, u)
+
+        # only the options set since the last solve
+        y.SP = 2
+        m.options.MAX_ITER = 50
+        m.solve(disp=False)
+        assert sorted(read_dbs(m).splitlines()) == ['APM.MAX_ITER = 50', y.name + '.SP = 2']
+        m.solve(disp=False)
+        assert read_dbs(m) == ''
+
+        # objects added after a solve are written with all of their options
+        w = m.MV(value=0)
+        w.DCOST = 0.5
+        m.Equation(w <= u)
+        m.solve(disp=False)
+        assert w.name + '.DCOST = 0.5' in read_dbs(m).splitlines()
+        assert u.name + '.DCOST = 0.1' not in read_dbs(m).splitlines()
+        m.cleanup()
+
+def options_after_clear():
+    with benchmark.stub_executable():
+        m, u, y = mpc()
+        m.solve(disp=False)
+        # clear removes {model}.dbs with the options of the last solve
+        m.clear()
+        m.solve(disp=False)
+        assert_all_options(m, u)
+
+        # also when only the options file of the solver is gone
+        os.remove(os.path.join(m._path, m._model_name + '.dbs'))
+        m.solve(disp=False)
+        assert_all_options(m, u)
+
+        # and when the solver does not read {model}.dbs
+        m.options.DBS_READ = 0
+        m.solve(disp=False)
+        assert_all_options(m, u)
+        m.cleanup()
+
+test_runner.test('dbs changed options', changed_options)
+test_runner.test('dbs options after clear', options_after_clear)
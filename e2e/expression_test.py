@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# The text of expressions and of the model file is the same as before
+# expressions were built as a graph (byte for byte, recorded with the string
+# concatenation of earlier versions).
+import os
+
+from gekko import GEKKO
+import test_runner
+
+def variables():
+    m = GEKKO(remote=False, name='expr')
+    x = m.Var(value=1, lb=0, ub=5, name='x')
+    y = m.Var(value=2, name='y')
+    p = m.Param(value=3, name='p')
+    c = m.Const(2.5, name='c')
+    return m, x, y, p, c
+
+def expression_text():
+    m, x, y, p, c = variables()
+    exprs = [x + y, x - y, x * y, x / y, x ** 2, 2 ** x, -x, abs(x), 1 - x, 2 / x, x * 1.5e-7,
+             (x + y) * (x - y) / p, m.exp(-x) + m.log(y) - m.sqrt(p), m.sin(x) * m.cos(y) ** 2,
+             -(-x), x + -y, x - -2, m.tanh(x + c), m.sum([x, y, p]),
+             x >= y, x ** 2 + y ** 2 == p, (x < 3), x <= -1, x.dt() == -x + p]
+    assert [str(e) for e in exprs] == [
+        '(x+y)',
+        '(x-y)',
+        '((x)*(y))',
+        '((x)/(y))',
+        '((x)^(2))',
+        '(2^x)',
+        '(-x)',
+        'abs(x)',
+        '(1-x)',
+        '(2/x)',
+        '((x)*(1.5e-07))',
+        '(((((x+y))*((x-y))))/(p))',
+        '((exp((-x))+log(y))-sqrt(p))',
+        '((sin(x))*(((cos(y))^(2))))',
+        '(-(-x))',
+        '(x+(-y))',
+        '(x--2)',
+        'tanh((x+c))',
+        'v3',
+        'x>=y',
+        'p=(((x)^(2))+((y)^(2)))',
+        'x<3',
+        'x<=-1',
+        '$x=((-x)+p)',
+    ]
+
+def shared_subexpressions():
+    m, x, y, p, c = variables()
+    e = x * y
+    # a subexpression used twice is written twice
+    assert str(e + e) == '(((x)*(y))+((x)*(y)))'
+    # building an expression does not change its parts
+    f = e - p
+    assert str(e) == '((x)*(y))' and str(f) == '(((x)*(y))-p)'
+    # long sums
+    s = 0
+    for i in range(2000):
+        s = s + x
+    assert str(s) == '(' * 2000 + '0' + '+x)' * 2000
+
+def model_file():
+    m, x, y, p, c = variables()
+    m.sum([x, y, p])
+    i = m.Intermediate(x * y - p, name='i')
+    m.Equation(i + x.dt() == -2 * y)
+    m.Minimize((x - 2) ** 2)
+    m.Maximize(-y)
+    m.options.IMODE = 4
+    m.time = [0, 1, 2]
+    m._build_model()
+    with open(os.path.join(m._path, 'expr.apm')) as f:
+        assert f.read() == 'Model\nConstants\n\tc = 2.5\nEnd Constants\nParameters\n\tp = 3\nEnd Parameters\nVariables\n\tx = 1, <= 5, >= 0\n\ty = 2\n\tv3 = 0\nEnd Variables\nIntermediates\n\ti=(((x)*(y))-p)\nEnd Intermediates\nEquations\n\t(i+$x)=((-2)*(y))\n\tminimize (((x-2))^(2))\n\tmaximize (-y)\nEnd Equations\nConnections\n\tx = sum_1.x[1]\n\ty = sum_1.x[2]\n\tp = sum_1.x[3]\n\tv3 = sum_1.y\nEnd Connections\nObjects\n\tsum_1 = sum(3)\nEnd Objects\n\nEnd Model'
+    m.cleanup()
+
+test_runner.test('expression text', expression_text)
+test_runner.test('expression shared subexpressions', shared_subexpressions)
+test_runner.test('expression model file', model_file)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# `import gekko` doesn't load the optional subsystems (MCP tools, GUI, ML,
+# brain, chemical, solver extensions) or the modules only they need; they
+# are imported when they are first used. Checked in new interpreters.
+import os
+import subprocess
+import sys
+
+import benchmark
+import test_runner
+
+def run(code):
+    '''Output lines of code run in a new interpreter with this gekko'''
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(benchmark.HERE))
+    return subprocess.check_output([sys.executable, '-c', code], env=env,
+                                   universal_newlines=True).splitlines()
+
+def lazy_imports():
+    seconds, eager = benchmark.import_time(repeat=1)
+    assert eager == [], 'import gekko loads ' + ', '.join(eager)
+    # the model methods don't import them either
+    out = run('import sys\n'
+              'from gekko import GEKKO\n'
+              'm = GEKKO(remote=False)\n'
+              'x = m.Var(lb=0)\n'
+              'm.Equation(x >= 1)\n'
+              'm.Obj(x)\n'
+              'm._write_files(1)\n'
+              'print(" ".join(n for n in %r if n in sys.modules))\n' % (benchmark.LAZY_IMPORTS,))
+    assert out == [''], out
+
+def loaded_on_use():
+    out = run('import sys, gekko\n'
+              'print(gekko.chemical.__name__)\n'
+              'print("gekko.chemical" in sys.modules, "gekko.brain" in sys.modules)\n'
+              'try:\n'
+              '    gekko.no_such_module\n'
+              'except AttributeError as e:\n'
+              '    print(e)\n')
+    assert out == ['gekko.chemical', 'True False',
+                   "module 'gekko' has no attribute 'no_such_module'"], out
+
+test_runner.test('lazy imports', lazy_imports)
+test_runner.test('lazy modules loaded on use', loaded_on_use)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# Result files are parsed with every JSON backend and only the requested
+# results are loaded with m.solve(load=[...]). Inf values are loaded as NaN
+# and the files are not rewritten. Backends that are not installed are
+# skipped. Solved with the stub solver of benchmark.py.
+import json
+import math
+import os
+
+import numpy as np
+from gekko import GEKKO
+from gekko import gk_post_solve
+import benchmark
+import test_runner
+
+TEXT = '{"x": [1.5, Inf, -Inf], "y": +Inf, "Info": 1, "x_Inf": [0], "z": [2.0], "NaN_name": NaN}'
+
+def backends():
+    names = ['json']
+    for name in ('orjson', 'ujson'):
+        try:
+            __import__(name)
+            names.append(name)
+        except ImportError:
+            pass
+    # any module with a loads function
+    names.append(json)
+    return names
+
+def parse():
+    try:
+        for backend in backends():
+            gk_post_solve.set_json_backend(backend)
+            for raw in ('{"a": [1, 2.5e-3], "b": {"c": "d"}}', b'{"a": [1, 2.5e-3], "b": {"c": "d"}}'):
+                assert gk_post_solve._loads(raw) == {'a': [1, 2.5e-3], 'b': {'c': 'd'}}
+            # NaN is not accepted by the fast parsers, the standard library reads it
+            assert math.isnan(gk_post_solve._loads(b'{"a": NaN}')['a'])
+    finally:
+        gk_post_solve.set_json_backend()
+
+def inf_values():
+    try:
+        for backend in backends():
+            gk_post_solve.set_json_backend(backend)
+            for raw in (TEXT, TEXT.encode('utf-8')):
+                data = gk_post_solve._loads(raw)
+                assert data['x'][0] == 1.5
+                assert math.isnan(data['x'][1]) and math.isnan(data['x'][2])
+                assert math.isnan(data['y'])
+                # names with Inf are not changed
+                assert data['Info'] == 1 and data['x_Inf'] == [0]
+                assert math.isnan(data['NaN_name'])
+    finally:
+        gk_post_solve.set_json_backend()
+
+def results_file():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        x = m.Var(value=1, name='x')
+        y = m.Var(value=2, name='y')
+        m.Equation(x + y >= 0)
+        m.solve(disp=False)
+        path = os.path.join(m._path, 'results.json')
+        with open(path, 'w') as f:
+            f.write('{"x": [Inf], "y": [-3.5]}')
+        try:
+            for backend in backends():
+                gk_post_solve.set_json_backend(backend)
+                m.load_results()
+                assert math.isnan(x.value[0])
+                assert y.value[0] == -3.5
+        finally:
+            gk_post_solve.set_json_backend()
+        with open(path) as f:
+            assert f.read() == '{"x": [Inf], "y": [-3.5]}'
+        m.cleanup()
+
+def unknown_backend():
+    try:
+        gk_post_solve.set_json_backend('no_such_json_module')
+    except ImportError:
+        pass
+    else:
+        assert False, 'an unknown backend was selected'
+    finally:
+        gk_post_solve.set_json_backend()
+
+def selected_results():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        m.time = [0, 1, 2]
+        x = m.Var(value=1, name='x')
+        y = m.Var(value=2, name='y')
+        u = m.MV(value=3, name='u')
+        w = m.MV(value=4, name='w')
+        m.Equation(x.dt() == u + w - y)
+        m.options.IMODE = 4
+        m.solve(disp=False, load=[x, 'u'], arrays=True)
+        # only x and u are loaded, as NumPy arrays
+        assert isinstance(x.value.value, np.ndarray) and list(x.value) == [1, 1, 1]
+        assert isinstance(u.value.value, np.ndarray) and list(u.value) == [3, 3, 3]
+        assert u.NEWVAL is not None and w.NEWVAL is None
+        # y and w keep the values written to the data file
+        assert list(y.value) == [2, 2, 2] and list(w.value) == [4, 4, 4]
+        # the global options are always loaded
+        assert m.options.APPSTATUS == 1
+        m.solve(disp=False)
+        assert isinstance(y.value.value, list) and isinstance(w.value.value, list)
+        assert w.NEWVAL is not None
+        m.cleanup()
+
+test_runner.test('JSON backends', parse)
+test_runner.test('JSON unknown backend', unknown_backend)
+test_runner.test('JSON selected results', selected_results)
+test_runner.test('JSON Inf values', inf_values)
+test_runner.test('JSON Inf in results.json', results_file)
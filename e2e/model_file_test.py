@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# The model file (.apm) is written section by section with the signs of
+# each line normalized (++ and -- to +, +- and -+ to -), the same text as
+# the earlier version that built the whole file first. The model file, the
+# info file and the object files are only written again when they changed.
+# Solved with the stub solver of benchmark.py (no optimizer).
+import os
+
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+def read_model(m):
+    with open(os.path.join(m._path, m._model_name + '.apm')) as f:
+        return f.read()
+
+def signs_model():
+    m = GEKKO(remote=False, name='signs')
+    x = m.Var(value=-1, lb=-5, ub=5, name='x')
+    y = m.Var(value=2, name='y')
+    p = m.Param(value=-3, name='p')
+    m.Equation(x - -2 == y + -p)
+    m.Equation(-x + y >= -(-p))
+    m.Equation(x * -1 - -y + -3 <= 3)
+    m.Intermediate(x - -y + -p, name='i')
+    m.Minimize((x - -1) ** 2)
+    m.cspline(x, m.Var(name='z'), [0, 1, 2], [1, 2, 4])
+    m.Equations([x + k * y >= -k for k in range(3)])
+    return m
+
+def signs():
+    m = signs_model()
+    m._build_model()
+    assert read_model(m) == 'Model\nParameters\n\tp = -3\nEnd Parameters\nVariables\n\tx = -1, <= 5, >= -5\n\ty = 2\n\tz = 0\nEnd Variables\nIntermediates\n\ti=((x-(-y))+(-p))\nEnd Intermediates\nEquations\n\t(x+2)=(y+(-p))\n\t((-x)+y)>=(-(-p))\n\t((((x)*(-1))-(-y))-3)<=3\n\t(x+((0)*(y)))>=0\n\t(x+((1)*(y)))>=-1\n\t(x+((2)*(y)))>=-2\n\tminimize (((x+1))^(2))\nEnd Equations\nConnections\n\tx = cspline1.x_data\n\tz = cspline1.y_data\nEnd Connections\nObjects\n\tcspline1 = cspline\nEnd Objects\n\nEnd Model'
+    m.cleanup()
+
+def mark(m, filename):
+    with open(os.path.join(m._path, filename), 'a') as f:
+        f.write('! not rewritten\n')
+
+def marked(m, filename):
+    with open(os.path.join(m._path, filename)) as f:
+        return f.read().endswith('! not rewritten\n')
+
+def rewrite_changed_model():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False, name='resolve')
+        x = m.Var(value=1, lb=0, ub=5, name='x')
+        y = m.CV(value=1, name='y')
+        z = m.Var(name='z')
+        m.cspline(x, z, [0, 1, 2], [1, 2, 4])
+        m.Equation(y == x + z)
+        m.solve(disp=False)
+        # the results change the values in the declarations
+        m.solve(disp=False)
+
+        # only options, setpoints and measurements changed
+        for filename in ('resolve.apm', 'resolve.info', 'cspline1.csv'):
+            mark(m, filename)
+        y.SP = 3
+        y.MEAS = 2
+        m.options.MAX_ITER = 10
+        m.solve(disp=False)
+        assert marked(m, 'resolve.apm')
+        assert marked(m, 'resolve.info')
+        assert marked(m, 'cspline1.csv')
+
+        # bounds are in the declarations
+        x.UPPER = 4
+        m.solve(disp=False)
+        assert not marked(m, 'resolve.apm')
+        assert '<= 4' in read_model(m)
+        assert marked(m, 'resolve.info')
+
+        # new equations and variables
+        mark(m, 'resolve.apm')
+        w = m.SV(name='w')
+        m.Equation(w == 2 * x)
+        m.solve(disp=False)
+        assert not marked(m, 'resolve.apm')
+        assert not marked(m, 'resolve.info')
+        assert 'w=((2)*(x))' in read_model(m)
+        assert marked(m, 'cspline1.csv')
+
+        # a removed model file is written again
+        os.remove(os.path.join(m._path, 'resolve.apm'))
+        m.solve(disp=False)
+        assert 'w=((2)*(x))' in read_model(m)
+        m.cleanup()
+
+test_runner.test('model file signs', signs)
+test_runner.test('model file rewritten when changed', rewrite_changed_model)
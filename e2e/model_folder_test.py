@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# The model folder is created when it is first needed (a local solve,
+# m.path, ...) and removed when the model is garbage collected. The data
+# files of objects are kept in memory until then. Copies of a model have
+# their own folder. Solved with the stub solver of benchmark.py.
+import copy
+import gc
+import os
+import pickle
+
+import numpy as np
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+def model():
+    m = GEKKO(remote=False)
+    m.time = [0, 1, 2]
+    u = m.MV(value=[1, 2, 3], name='u')
+    x = m.Var(value=0, name='x')
+    y = m.Var(name='y')
+    m.cspline(x, y, [0, 1, 2], [0, 1, 4])
+    m.axb(np.eye(2), [1, 2], x=[m.Var(), m.Var()], etype='<=')
+    m.Equation(x.dt() == u)
+    m.options.IMODE = 4
+    return m, u, x
+
+def folder_on_solve():
+    with benchmark.stub_executable():
+        m, u, x = model()
+        # nothing is written while the model is built
+        assert m._folder is None
+        assert len(m._files._text) == 4
+        m.solve(disp=False)
+        folder = m._folder
+        assert os.path.isdir(folder)
+        for name in m._files._text:
+            with open(os.path.join(folder, name)) as f:
+                assert f.read() == m._files.read(name)
+        del m, u, x
+        gc.collect()
+        assert not os.path.exists(folder)
+
+def copies():
+    with benchmark.stub_executable():
+        m, u, x = model()
+        m.solve(disp=False)
+        folder = m._folder
+        for restore in (copy.copy, copy.deepcopy, lambda m: pickle.loads(pickle.dumps(m))):
+            m2 = restore(m)
+            # the folder of the copy is created when it is needed
+            assert m2._folder is None
+            values = list(m2._parameters[0].value)
+            m2.solve(disp=False)
+            assert m2._folder != folder and os.path.isdir(m2._folder)
+            # with all files and data
+            for name in m._files._text:
+                assert os.path.isfile(os.path.join(m2._folder, name))
+            with open(os.path.join(m2._folder, m2._model_name + '.csv')) as f:
+                rows = [row.split(',') for row in f.read().splitlines()]
+            assert set(rows[0]) >= set(['time', 'u', 'x', 'y'])
+            j = rows[0].index('u')
+            assert [float(row[j]) for row in rows[1:]] == values
+            folder2 = m2._folder
+            del m2
+            gc.collect()
+            assert not os.path.exists(folder2)
+            assert os.path.isdir(folder)
+
+        # a copy is not affected by the original being collected
+        m2 = copy.deepcopy(m)
+        del m, u, x
+        gc.collect()
+        assert not os.path.exists(folder)
+        m2.solve(disp=False)
+        assert os.path.isdir(m2._folder)
+        m2.cleanup()
+
+def persistent_copy():
+    with benchmark.stub_executable(session=True):
+        m = GEKKO(remote=False, persistent=True)
+        x = m.Var(value=1, name='x')
+        m.Equation(x >= 0)
+        m.solve(disp=False)
+        # the solver process stays with the original model
+        m2 = pickle.loads(pickle.dumps(m))
+        assert m2._worker is None
+        m2.solve(disp=False)
+        assert m2._worker.process is not m._worker.process
+        assert m2._worker.path == m2._folder != m._folder
+        m2.cleanup()
+        m.cleanup()
+
+test_runner.test('model folder created on solve', folder_on_solve)
+test_runner.test('model folder of copies', copies)
+test_runner.test('model folder of a persistent model', persistent_copy)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# m.profile records the time and bytes of the phases of each solve and the
+# statistics reported by the solver. Solved with the stub solver of
+# benchmark.py.
+import csv
+import io
+import json
+
+from gekko import GEKKO
+from gekko.gk_profile import GKProfile
+import benchmark
+import test_runner
+
+def model():
+    m = GEKKO(remote=False)
+    p = m.Param(value=1, name='p')
+    x = m.Var(value=0, name='x')
+    m.Equation(x == p)
+    return m, p, x
+
+def phases():
+    with benchmark.stub_executable():
+        m, p, x = model()
+        m.solve(disp=False)
+        # not profiled by default
+        assert m.profile.last is None
+        # the values of the results are in the model file of the next solve
+        m.solve(disp=False)
+        m.solve(disp=False, profile=True)
+        record = m.profile.last
+        assert record['cycle'] == 1
+        assert set(record['phases']) == set(['build_model', 'write_csv', 'write_dbs',
+                                             'write_solver_options', 'write_info',
+                                             'solve', 'load_results', 'load_options'])
+        for phase in record['phases'].values():
+            assert phase['seconds'] >= 0
+        # the model file did not change, the results were read
+        assert record['phases']['build_model']['bytes'] == 0
+        assert record['phases']['solve']['bytes'] > 0
+        assert record['phases']['load_results']['bytes'] > 0
+        assert record['seconds'] >= record['phases']['solve']['seconds']
+        # reported by the solver
+        assert record['appstatus'] == 1 and record['iterations'] == 1
+        assert record['solvetime'] == m.options.SOLVETIME
+
+        # a changed model is written again
+        m.Equation(x <= 10)
+        m.solve(disp=False, profile=True)
+        assert m.profile.last['phases']['build_model']['bytes'] > 0
+        m.cleanup()
+
+def history():
+    with benchmark.stub_executable():
+        m, p, x = model()
+        m.profile = GKProfile(maxlen=3)
+        m.profile.enabled = True
+        for i in range(5):
+            m.solve(disp=False)
+        # the last solves are kept
+        assert [r['cycle'] for r in m.profile.history] == [3, 4, 5]
+        summary = m.profile.summary()
+        assert summary['solve']['seconds'] > 0
+
+        records = json.loads(m.profile.to_json())
+        assert [r['cycle'] for r in records] == [3, 4, 5]
+        assert records[-1]['phases']['solve'] == m.profile.last['phases']['solve']
+        rows = list(csv.DictReader(io.StringIO(m.profile.to_csv())))
+        assert [r['cycle'] for r in rows] == ['3', '4', '5']
+        assert float(rows[0]['solve_seconds']) == m.profile.history[0]['phases']['solve']['seconds']
+        assert 'debug_seconds' not in rows[0]
+
+        m.profile.clear()
+        assert m.profile.last is None
+        m.cleanup()
+
+def failed_solve():
+    with benchmark.stub_executable():
+        m, p, x = model()
+        apm_executable = GEKKO._apm_executable
+        GEKKO._apm_executable = lambda self: ('/no/such/apm', False)
+        try:
+            m.solve(disp=False, profile=True)
+        except OSError:
+            pass
+        else:
+            assert False, 'the solve did not fail'
+        finally:
+            GEKKO._apm_executable = apm_executable
+        # the record of the failed solve is dropped
+        m.solve(disp=False)
+        assert m.profile.last is None
+        m.solve(disp=False, profile=True)
+        assert len(m.profile.history) == 1
+        m.cleanup()
+
+test_runner.test('profile phases', phases)
+test_runner.test('profile history and export', history)
+test_runner.test('profile failed solve', failed_solve)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# The benchmark harness (benchmark.py) times the phases of the E2E workloads
+# and of synthetic models with the stub solver and flags regressions against
+# a baseline.
+import contextlib
+import io
+
+import benchmark
+import test_runner
+
+def run():
+    results = benchmark.run(sizes=[100], repeat=1, workloads=['hs71_test'], verbose=False)
+    keys = results['benchmarks']
+    for workload in ('hs71_test', 'synthetic_100'):
+        for mode in benchmark.MODES:
+            for phase in ('model', 'build_model', 'write_csv', 'load_results', 'total'):
+                metric = keys[workload + '/' + mode + '/' + phase]
+                assert 0 <= metric['min'] <= metric['median']
+        assert workload + '/solve/solve' in keys
+    assert 'import_gekko/import/total' in keys
+    assert results['meta']['workloads'] == ['hs71_test', 'synthetic_100']
+    assert results['meta']['eager_imports'] == []
+
+def compare():
+    def results(seconds, eager=()):
+        return {'meta': {'eager_imports': list(eager)},
+                'benchmarks': dict((k, {'min': v, 'median': v}) for k, v in seconds.items())}
+    baseline = results({'a/frontend/total': 1.0, 'b/frontend/total': 1.0,
+                        'c/frontend/total': 1e-4, 'd/frontend/total': 1.0})
+    new = results({'a/frontend/total': 1.5, 'b/frontend/total': 0.5,
+                   'c/frontend/total': 5e-4, 'e/frontend/total': 1.0}, ['gekko.gk_mcp'])
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        regressions = benchmark.compare(baseline, new, threshold=0.1, min_delta=1e-3)
+    # slower by more than threshold and min_delta, and newly imported modules
+    assert regressions == ['a/frontend/total', 'import_gekko/gekko.gk_mcp']
+    text = out.getvalue()
+    assert 'faster' in text and 'missing in the new results' in text
+    assert '2 regression(s)' in text
+
+test_runner.test('benchmark run', run)
+test_runner.test('benchmark compare', compare)
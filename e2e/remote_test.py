@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+# Remote solves send the model only when it changed or the server lost it.
+# The server is a stand-in for the APM web server on this machine that keeps
+# the files of each application and returns a result for every declared
+# parameter and variable (no optimizer).
+import json
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+# output options of the model in options.json
+APM_OPTIONS = benchmark.solver_spec()['APM']
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), Handler)
+        self.apps = {}
+        self.url = 'http://127.0.0.1:%d' % self.server_address[1]
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def app(self, name):
+        return self.apps.setdefault(name, {'apm': '', 'csv': '', 'meas': '', 'info': '',
+                                           'out': {}, 'log': []})
+
+    def requests(self, name):
+        '''Requests of the application since the last call'''
+        log = self.app(name)['log']
+        requests = list(log)
+        del log[:]
+        return requests
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, code, body=b''):
+        self.send_response(code)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self, head=False):
+        if self.path == '/ip.php':
+            return self.reply(200, b'127.0.0.1')
+        match = re.match(r'/online/127\.0\.0\.1_(\w+)/(.+)', self.path)
+        if match is None:
+            return self.reply(404)
+        app = self.server.app(match.group(1))
+        filename = match.group(2)
+        if head:
+            app['log'].append('exists ' + filename)
+            found = filename in app['out'] or \
+                    (filename == match.group(1) + '.apm' and app['apm'].strip() != '')
+            return self.reply(200 if found else 404)
+        if filename not in app['out']:
+            return self.reply(404)
+        self.reply(200, app['out'][filename].encode())
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        query = urllib.parse.parse_qs(body.decode(), keep_blank_values=True)
+        app = self.server.app(query['p'][0])
+        line = query['a'][0]
+        if line.startswith('clear'):
+            app['log'].append(line)
+            what = line.split()[1]
+            if what == 'all':
+                app.update(apm='', csv='', meas='', info='', out={})
+            else:
+                app[what] = ''
+            return self.reply(200)
+        if line == 'solve':
+            app['log'].append('solve')
+            names = re.findall(r'^\t(\w+)', app['apm'], re.M)
+            if not app['apm'].strip():
+                return self.reply(200, b'@error: no model\n')
+            if app.get('error'):
+                return self.reply(200, b'@error: solution not found\n')
+            app['out']['results.json'] = json.dumps(dict((n, [2.0]) for n in names))
+            app['out']['options.json'] = json.dumps({'APM': APM_OPTIONS})
+            app['out']['results.csv'] = ''
+            return self.reply(200, b'Successful solution\n')
+        kind = line.split(' ', 1)[0]
+        if kind in ('csv', 'meas', 'info'):
+            app['log'].append(kind)
+            app[kind] += line.split(' ', 1)[1] if ' ' in line else ''
+        else:
+            app['log'].append('model')
+            app['apm'] += line
+        self.reply(200)
+
+def solve(m):
+    m.solve(disp=False)
+
+def model(server):
+    m = GEKKO(remote=True, server=server.url, name='remote_test')
+    x = m.Var(value=1, name='x')
+    p = m.Param(value=2, name='p')
+    m.Equation(x >= p)
+    m.options.MAX_ITER = 50
+    return m, x
+
+def skip_unchanged_model():
+    server = Server()
+    try:
+        m, x = model(server)
+        solve(m)
+        assert 'model' in server.requests(m._model_name)
+        # the results change the declarations
+        solve(m)
+        server.requests(m._model_name)
+
+        solve(m)
+        requests = server.requests(m._model_name)
+        assert 'model' not in requests and 'clear apm' not in requests
+        assert 'exists remote_test.apm' in requests
+        assert requests[-1] == 'solve'
+        # options that did not change are not sent again
+        assert 'APM.MAX_ITER' not in server.app(m._model_name)['meas']
+
+        # a changed model is sent again
+        m.Equation(x <= 10)
+        solve(m)
+        assert 'model' in server.requests(m._model_name)
+        assert 'x<=10' in server.app(m._model_name)['apm'].replace(' ', '')
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def resend_lost_model():
+    server = Server()
+    try:
+        m, x = model(server)
+        solve(m)
+        solve(m)
+        server.requests(m._model_name)
+        # the server removed the application (e.g. a restart)
+        del server.apps[m._model_name]
+        solve(m)
+        requests = server.requests(m._model_name)
+        assert 'model' in requests
+        # with all of the options
+        assert 'APM.MAX_ITER = 50' in server.app(m._model_name)['meas']
+        solve(m)
+        assert 'model' not in server.requests(m._model_name)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def resend_after_error():
+    server = Server()
+    try:
+        m, x = model(server)
+        solve(m)
+        solve(m)
+        server.requests(m._model_name)
+        # an error of the solver is reported after one solve
+        server.app(m._model_name)['error'] = True
+        try:
+            solve(m)
+        except Exception as e:
+            assert '@error: solution not found' in str(e)
+        else:
+            assert False, 'the solver error was not reported'
+        assert server.requests(m._model_name).count('solve') == 1
+        # the model is sent again after a failed solve
+        server.app(m._model_name)['error'] = False
+        solve(m)
+        assert 'model' in server.requests(m._model_name)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+test_runner.test('remote skip unchanged model', skip_unchanged_model)
+test_runner.test('remote resend lost model', resend_lost_model)
+test_runner.test('remote resend after error', resend_after_error)
@@ -10,3 +10,21 @@ import cruisecontrol_test
 import hw_flightcontrol_test
 import hw_HIV_test
 import hw_reservoirs_test
+import dbs_options_test
+import var_array_test
+import expression_test
+import model_file_test
+import csv_file_test
+import worker_test
+import batch_order_test
+import async_solve_test
+import json_backend_test
+import profile_test
+import sparse_test
+import remote_test
+import cache_test
+import slots_test
+import value_change_test
+import import_test
+import model_folder_test
+import regression_test
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# Options of parameters and variables are slots of their classes (see
+# properties.py): they are read and set in any case, outputs are read-only
+# and the objects are pickled and copied with their options. Solved with the
+# stub solver of benchmark.py.
+import copy
+import os
+import pickle
+
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+def options():
+    m = GEKKO(remote=False)
+    u = m.MV(value=1, lb=0, ub=10, name='u')
+    y = m.CV(name='y')
+    for v in (u, y, m.Var(), m.Param(), m.FV(), m.SV()):
+        # no dictionary per object
+        assert not hasattr(v, '__dict__')
+    assert u.DCOST == u.dcost == u.DCost
+    u.dcost = 0.5
+    u.Status = 1
+    assert u.DCOST == 0.5 and u.STATUS == 1
+    assert u.LOWER == 0 and u.upper == 10
+    # options set since the last measurements.dbs file
+    assert u._changed is None
+    # outputs are read-only
+    try:
+        u.NEWVAL = 2
+    except AttributeError as e:
+        assert 'output' in str(e)
+    else:
+        assert False, 'an output was set'
+    # options of other types
+    try:
+        u.SP = 1
+    except AttributeError as e:
+        assert 'not a property' in str(e)
+    else:
+        assert False, 'a CV option was set on an MV'
+    y.SPHI = 2
+    assert y.sphi == 2
+
+def const_value():
+    # the value of a constant is replaced before the model is written
+    # (examples/hw_reservoirs.py)
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        c = m.Array(m.Const, 2, value=0)
+        c[0].value = 0.03
+        c[1].value = c[0] / 2
+        k = m.Const(5, name='k')
+        k.value = 7
+        x = m.Var(value=1, name='x')
+        m.Equation(x == c[0] + c[1] + k)
+        assert c[0].value == 0.03 and k.VALUE == 7
+        m.solve(disp=False)
+        with open(os.path.join(m._path, m._model_name + '.apm')) as f:
+            lines = f.read().splitlines()
+        constants = lines[lines.index('Constants') + 1:lines.index('End Constants')]
+        assert constants == ['\t' + c[0].name + ' = 0.03',
+                             '\t' + c[1].name + ' = ((' + c[0].name + ')/(2))',
+                             '\tk = 7']
+        m.cleanup()
+
+def model():
+    m = GEKKO(remote=False)
+    p = m.FV(value=2, name='p')
+    p.STATUS = 1
+    y = m.CV(value=1, name='y')
+    y.SP = 3
+    x = m.Var(value=1, lb=0, name='x')
+    c = m.Const(4, name='c')
+    m.Equation(x + y >= p * c)
+    m.Obj(x)
+    return m
+
+def pickled():
+    with benchmark.stub_executable():
+        m = model()
+        m.solve(disp=False)
+        for restore in (lambda m: pickle.loads(pickle.dumps(m)), copy.copy, copy.deepcopy):
+            m2 = restore(m)
+            p, = m2._parameters
+            y, x = m2._variables
+            assert (p.STATUS, p.value.value, y.SP, x.LOWER) == (1, [2.0], 3, 0)
+            assert y.LSTVAL is not None and y.LSTVAL == m._variables[0].LSTVAL
+            # the checks of __setattr__ apply to the restored objects
+            try:
+                y.LSTVAL = 2
+            except AttributeError:
+                pass
+            else:
+                assert False, 'an output of a restored variable was set'
+        # a restored model is solved with its own objects
+        m2 = pickle.loads(pickle.dumps(m))
+        y = m2._variables[0]
+        y.SP = 5
+        y.value = 4
+        m2.solve(disp=False)
+        assert y.value[0] == 4 and m._variables[0].value[0] == 1
+        assert m._variables[0].SP == 3
+        # copies of single objects
+        for x in (m._variables[1], m._parameters[0]):
+            for restore in (copy.copy, copy.deepcopy, lambda x: pickle.loads(pickle.dumps(x))):
+                x2 = restore(x)
+                x2.LOWER = -1
+                assert x2.LOWER == -1 and x.LOWER != -1
+                assert x2.name == x.name
+        m.cleanup()
+
+test_runner.test('slots options', options)
+test_runner.test('slots Const value', const_value)
+test_runner.test('slots pickle and copy', pickled)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# scipy.sparse matrices in axb, qobj and state_space write the same object
+# files as the same matrices given in COO (sparse=True) or dense form. The
+# tests are skipped if scipy is not installed.
+import numpy as np
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+from gekko import GEKKO
+import test_runner
+
+A = np.array([[1.0, 0.0, 2.5],
+              [0.0, -3.0, 0.0],
+              [4.0, 0.0, 1e-20]])
+b = np.array([0.0, 1.5, -2.0])
+
+def coo_lists(M):
+    '''[rows, cols, values] (1-based, column by column) of a dense matrix'''
+    col, row = np.nonzero(M.T)
+    return [list(row + 1), list(col + 1), list(M[row, col])]
+
+def vector_lists(v):
+    row = np.nonzero(v)[0]
+    return [list(row + 1), list(v[row])]
+
+def files(build):
+    m = GEKKO(remote=False)
+    build(m)
+    return m._files._text
+
+def axb_files():
+    coo = files(lambda m: m.axb(coo_lists(A), vector_lists(b), etype='<=', sparse=True))
+    for M in (sparse.csr_matrix(A), sparse.csc_matrix(A), sparse.coo_array(A)):
+        assert files(lambda m: m.axb(M, b, etype='<=')) == coo
+        assert files(lambda m: m.axb(M, sparse.csr_matrix(b.reshape(-1, 1)), etype='<=')) == coo
+
+def qobj_files():
+    Q = A + A.T
+    coo = files(lambda m: m.qobj(vector_lists(b), A=coo_lists(Q), sparse=True))
+    for M in (sparse.csr_matrix(Q), sparse.coo_matrix(Q)):
+        assert files(lambda m: m.qobj(b, A=M)) == coo
+
+def state_space_files():
+    B = np.array([[1.0], [0.0], [2.0]])
+    C = np.array([[0.0, 1.0, 0.0]])
+    for dense in (False, True):
+        expected = files(lambda m: m.state_space(A, B, C, dense=dense))
+        assert files(lambda m: m.state_space(sparse.csr_matrix(A), sparse.csc_matrix(B),
+                                             sparse.coo_matrix(C), dense=dense)) == expected
+
+def duplicate_entries():
+    # duplicates are summed in the file without changing the caller's matrix
+    row = np.array([0, 0, 2, 1])
+    col = np.array([0, 0, 1, 1])
+    data = np.array([1.0, 2.0, 5.0, -1.0])
+    M = sparse.coo_matrix((data, (row, col)), shape=(3, 2))
+    m = GEKKO(remote=False)
+    m.axb(M, [1, 2, 3])
+    assert m._files.read('axb1.a.txt') == '1.0,1.0,3.0\n2.0,2.0,-1.0\n3.0,2.0,5.0\n'
+    assert M.nnz == 4
+    assert list(M.row) == [0, 0, 2, 1] and list(M.data) == [1.0, 2.0, 5.0, -1.0]
+
+if sparse is not None:
+    test_runner.test('sparse axb files', axb_files)
+    test_runner.test('sparse qobj files', qobj_files)
+    test_runner.test('sparse state_space files', state_space_files)
+    test_runner.test('sparse duplicate entries', duplicate_entries)
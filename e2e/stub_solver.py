@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Stand-in for the APM executable used by benchmark.py.
+
+It does not solve anything: the result files (results.json and
+options.json) are written from the values in the model, data (.csv) and
+option (measurements.dbs) files so that a solve runs through all of the
+GEKKO front end (writing the files, starting the solver, loading the
+results) without an optimizer. Only the standard library is imported to
+keep the start of the process short.
+
+    write_results(path, model_name, spec)
+
+session() stays alive between solves like a solver of a persistent model
+(GEKKO(persistent=True), see gekko/gk_worker.py): it prints the ready line
+after each solve and solves again for each line on stdin.
+
+spec is the dictionary written by benchmark.solver_spec() with the output
+options of the model ('APM') and of each FV/MV/SV/CV type.
+"""
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+_section = re.compile(r'^(Parameters|Variables|Intermediates)\s*$(.*?)^End \1', re.M | re.S)
+# name, array elements ([i] or [i:j] of m.VarArray) and value
+_name = re.compile(r'^[ \t]*([A-Za-z_]\w*)(?:\[(\d+)(?::(\d+))?\])?[ \t]*(?:=[ \t]*([^,\n]*))?', re.M)
+
+
+def _number(text, default=0.0):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return default
+
+
+def _dbs(path, options=None):
+    '''Options in a dbs file as {name: {option: value}}, added to options'''
+    if options is None:
+        options = {}
+    if not os.path.isfile(path):
+        return options
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition('=')
+            name, _, option = key.strip().partition('.')
+            if option:
+                options.setdefault(name.lower(), {})[option.upper()] = _number(value.strip())
+    return options
+
+
+def write_results(path, model_name, spec):
+    start = time.time()
+    columns = {}
+    rows = 1
+    csv_path = os.path.join(path, model_name + '.csv')
+    if os.path.isfile(csv_path):
+        with open(csv_path) as f:
+            table = list(csv.reader(f))
+        if table:
+            header = [h.strip().lower() for h in table[0]]
+            data = table[1:]
+            rows = max(1, len(data))
+            for j, h in enumerate(header):
+                columns[h] = [_number(row[j]) if j < len(row) else 0.0 for row in data]
+
+    results = {}
+    if 'time' in columns:
+        results['time'] = columns['time']
+    with open(os.path.join(path, model_name + '.apm')) as f:
+        apm = f.read()
+    for match in _section.finditer(apm):
+        for name, first, last, value in _name.findall(match.group(2)):
+            name = name.lower()
+            if first:
+                names = [name + '[' + str(i) + ']' for i in range(int(first), int(last or first) + 1)]
+            else:
+                names = [name]
+            for name in names:
+                if name in columns:
+                    results[name] = columns[name]
+                else:
+                    results[name] = [_number(value)] * rows
+    with open(os.path.join(path, 'results.json'), 'w') as f:
+        json.dump(results, f)
+
+    # the options of the last run are kept in {model}.dbs like APM does
+    # (DBS_WRITE), measurements.dbs only has the options that changed
+    dbs = _dbs(os.path.join(path, 'measurements.dbs'),
+               _dbs(os.path.join(path, model_name + '.dbs')))
+    with open(os.path.join(path, model_name + '.dbs'), 'w') as f:
+        for name, values in dbs.items():
+            for o, v in values.items():
+                f.write('%s.%s = %r\n' % (name, o, v))
+    apm_options = dict(spec['APM'])
+    apm_options.update((o, v) for o, v in dbs.get('apm', {}).items() if o in apm_options)
+    apm_options.update(APPSTATUS=1, SOLVESTATUS=1, ITERATIONS=1,
+                       SOLVETIME=time.time() - start)
+    options = {'APM': apm_options}
+    info = os.path.join(path, model_name + '.info')
+    if os.path.isfile(info):
+        with open(info) as f:
+            for line in f:
+                vptype, _, name = line.partition(',')
+                vptype, name = vptype.strip().upper(), name.strip().lower()
+                if vptype in spec['types']:
+                    values = dbs.get(name, {})
+                    options[name] = dict((o, values.get(o, 0)) for o in spec['types'][vptype])
+    with open(os.path.join(path, 'options.json'), 'w') as f:
+        json.dump(options, f)
+
+
+def main(model_name, spec_path):
+    with open(spec_path) as f:
+        spec = json.load(f)
+    write_results(os.getcwd(), model_name, spec)
+    print(' Successful solution (stub solver, no optimization)')
+    sys.stdout.flush()
+
+
+def session(model_name, spec_path):
+    with open(spec_path) as f:
+        spec = json.load(f)
+    while True:
+        write_results(os.getcwd(), model_name, spec)
+        print(' Successful solution (stub solver, no optimization)')
+        print('@ready')
+        sys.stdout.flush()
+        if not sys.stdin.readline():
+            break
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Changes of the values of parameters and variables are tracked element by
+# element: only the changed elements are written to the data (.csv) file,
+# the others are blank. Solved with the stub solver of benchmark.py.
+import os
+
+import numpy as np
+from gekko import GEKKO
+from gekko.gk_operators import GK_Value
+import benchmark
+import test_runner
+
+def change_mask():
+    v = GK_Value([1.0, 2.0, 3.0, 4.0])
+    assert v.change is True
+    v.change = False
+    v[1] = 5
+    assert isinstance(v.change, np.ndarray)
+    assert v.change.tolist() == [False, True, False, False]
+    assert v.value == [1.0, 5.0, 3.0, 4.0]
+    # slices and index arrays are marked in one step
+    a = GK_Value(np.array([1.0, 2.0, 3.0, 4.0]))
+    a.change = False
+    a[2:] = 0
+    a[np.array([0])] = 7
+    assert a.change.tolist() == [True, False, True, True]
+    assert a.value.tolist() == [7.0, 2.0, 0.0, 0.0]
+    # assigning the value is a change of all elements
+    v.value = [1, 2]
+    assert v.change is True
+    # lists keep their type
+    assert isinstance(v.value, list)
+
+def resized():
+    v = GK_Value([1.0, 2.0, 3.0])
+    v.change = False
+    v[0] = 0
+    # elements removed after the first change
+    del v.value[2]
+    v[1] = 4
+    assert v.change is True
+
+def csv_blanks():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        m.time = [0, 1, 2, 3]
+        p = m.Param(value=[1, 2, 3, 4], name='p')
+        x = m.Var(name='x')
+        m.Equation(x.dt() == p)
+        m.options.IMODE = 4
+        m.solve(disp=False)
+        assert p.value.change is False
+
+        p.value[2] = 9
+        m.solve(disp=False)
+        with open(os.path.join(m._path, m._model_name + '.csv')) as f:
+            rows = f.read().splitlines()
+        assert rows == ['time,p', '0, ', '1, ', '2,9.0', '3, ']
+        assert p.value.change is False
+        m.cleanup()
+
+test_runner.test('GK_Value change mask', change_mask)
+test_runner.test('GK_Value resized', resized)
+test_runner.test('GK_Value csv blanks', csv_blanks)
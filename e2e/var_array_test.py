@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Arrays of variables (m.VarArray) in the model files. Solved with the stub
+# solver of benchmark.py (no optimizer).
+import os
+
+import numpy as np
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+def read(m, filename):
+    with open(os.path.join(m._path, filename)) as f:
+        return f.read()
+
+def sections(m):
+    '''Lines of the Parameters and Variables sections of the model file'''
+    apm = read(m, m._model_name + '.apm')
+    lines = {}
+    for section in ('Parameters', 'Variables'):
+        if section + '\n' in apm:
+            text = apm.split(section + '\n', 1)[1].split('End ' + section, 1)[0]
+            lines[section] = [line.strip() for line in text.splitlines()]
+    return lines
+
+def mv_cv_arrays():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        m.time = np.linspace(0, 1, 3)
+        u = m.VarArray(3, lb=0, ub=10, value=1, type='MV', name='u')
+        u.STATUS = 1
+        u.DCOST = [0.1, 0.2, 0.3]
+        y = m.VarArray(3, value=0, type='CV', name='y')
+        y.STATUS = 1
+        y.SP = 2
+        m.Equations(y.dt() == u - y)
+        m.options.IMODE = 6
+        m.solve(disp=False)
+
+        # MV arrays are parameters, CV arrays are variables
+        lines = sections(m)
+        assert lines['Parameters'] == ['u[1:3] = 1, <= 10, >= 0']
+        assert lines['Variables'] == ['y[1:3] = 0']
+        info = read(m, m._model_name + '.info').splitlines()
+        assert [line for line in info if 'u[' in line] == ['MV, u[1]', 'MV, u[2]', 'MV, u[3]']
+        dbs = read(m, 'measurements.dbs').splitlines()
+        assert 'u[2].DCOST = 0.2' in dbs
+        assert 'y[3].SP = 2' in dbs
+        # output options are loaded for every element
+        assert u.NEWVAL.shape == (3,)
+
+        # measurements of the elements that have one
+        y.MEAS = [1.5, np.nan, 2.5]
+        m.solve(disp=False)
+        dbs = read(m, 'measurements.dbs').splitlines()
+        assert sorted(dbs) == ['y[1].MEAS = 1.5', 'y[3].MEAS = 2.5']
+        # measurements are sent to every solve, unchanged options are not
+        m.solve(disp=False)
+        dbs = read(m, 'measurements.dbs').splitlines()
+        assert sorted(dbs) == ['y[1].MEAS = 1.5', 'y[3].MEAS = 2.5']
+        m.cleanup()
+
+def fv_array():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        p = m.VarArray((2, 2), value=[[1, 2], [3, 4]], type='FV', name='p')
+        p.STATUS = 0
+        x = m.VarArray(2, name='x')
+        m.Equations(x == p[:, 0] + p[:, 1])
+        m.solve(disp=False)
+        assert sections(m)['Parameters'] == ['p[1] = 1', 'p[2] = 2', 'p[3] = 3', 'p[4] = 4']
+        assert p.value.shape == (2, 2)
+        assert list(p.value.flatten()) == [1, 2, 3, 4]
+        m.cleanup()
+
+def unknown_type():
+    m = GEKKO(remote=False)
+    try:
+        m.VarArray(3, type='XV')
+    except ValueError as e:
+        assert 'FV or MV' in str(e)
+    else:
+        assert False, 'VarArray accepted an unknown type'
+
+def declarations():
+    m = GEKKO(remote=False)
+    x = m.VarArray(5, lb=[0, 0, 0, 1, 1], ub=10, value=[1, 1, 2, 2, 2], name='x')
+    # consecutive elements with the same value and bounds on one line
+    assert x._declarations() == ['\tx[1:2] = 1, <= 10, >= 0\n',
+                                 '\tx[3] = 2, <= 10, >= 0\n',
+                                 '\tx[4:5] = 2, <= 10, >= 1\n']
+    z = m.VarArray((2, 3), integer=True, name='z')
+    assert z._declarations() == ['\tint_z[1:6] = 0\n']
+    assert z.names() == ['int_z[1]', 'int_z[2]', 'int_z[3]', 'int_z[4]', 'int_z[5]', 'int_z[6]']
+    # flattened in C order
+    assert str(z[1, 0]) == 'int_z[4]'
+
+def matrix_products():
+    m = GEKKO(remote=False)
+    x = m.VarArray(3, name='x')
+    A = np.array([[1.0, 0.0, 2.5],
+                  [0.0, 0.0, -1.0]])
+    # zero coefficients are skipped
+    assert [str(e) for e in A @ x] == ['(x[1]+((2.5)*(x[3])))', '(-x[3])']
+    eqs = m.Equations(A @ x <= [1, 2])
+    assert [e.value for e in eqs] == ['(x[1]+((2.5)*(x[3])))<=1', '(-x[3])<=2']
+    # rows of zeros are no equations if the comparison holds
+    Z = np.array([[0.0, 0.0, 0.0],
+                  [1.0, 0.0, 0.0],
+                  [0.0, 0.0, 0.0]])
+    eqs = m.Equations(Z @ x <= [4, 1, 0])
+    assert [e.value for e in eqs] == ['x[1]<=1']
+    eqs = m.Equations([0, 1, 0] == Z @ x)
+    assert [e.value for e in eqs] == ['x[1]=1']
+    # a variable on the other side is an equation
+    eqs = m.Equations(Z @ x <= x)
+    assert [e.value for e in eqs] == ['0<=x[1]', 'x[1]<=x[2]', '0<=x[3]']
+    try:
+        m.Equations(Z @ x >= [0, 1, 2])
+    except ValueError as e:
+        assert '0>=2' in str(e)
+    else:
+        assert False, 'an equation without variables that can not hold'
+    try:
+        A @ m.VarArray((3, 1))
+    except ValueError:
+        pass
+    else:
+        assert False, 'matrix product with a 2-D array of variables'
+
+def compact_equations():
+    m = GEKKO(remote=False)
+    x = m.VarArray(5, name='x')
+    p = m.Param(2, name='p')
+    # whole ranges in APM array syntax
+    eqs = m.Equations(x[1:] - x[:-1] <= p, compact=True)
+    assert [e.value for e in eqs] == ['(x[2:5]-x[1:4])<=p']
+    # one equation per element without compact
+    eqs = m.Equations(x[1:] - x[:-1] <= p)
+    assert [e.value for e in eqs] == ['(x[%d]-x[%d])<=p' % (i + 1, i) for i in range(1, 5)]
+    # a NumPy array has a value for each element, no template
+    eqs = m.Equations(x[:3] <= np.array([1, 2, 3]), compact=True)
+    assert [e.value for e in eqs] == ['x[1]<=1', 'x[2]<=2', 'x[3]<=3']
+
+def results():
+    with benchmark.stub_executable():
+        m = GEKKO(remote=False)
+        x = m.VarArray((2, 2), value=[[1, 2], [3, 4]], name='x')
+        m.Equations(x >= 0)
+        m.solve(disp=False)
+        assert isinstance(x.value, np.ndarray)
+        assert x.value.tolist() == [[1, 2], [3, 4]]
+        # values changed in place after a solve are not in the declarations
+        x.value[0, 0] = 7
+        assert x._declarations() == ['\tx[1:4]\n']
+        m.cleanup()
+
+test_runner.test('VarArray declarations', declarations)
+test_runner.test('VarArray matrix products', matrix_products)
+test_runner.test('VarArray compact equations', compact_equations)
+test_runner.test('VarArray results', results)
+test_runner.test('VarArray MV and CV', mv_cv_arrays)
+test_runner.test('VarArray FV', fv_array)
+test_runner.test('VarArray unknown type', unknown_type)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# A persistent model (GEKKO(persistent=True)) keeps its solver process alive
+# between local solves. Solved with the stub solver of benchmark.py, in the
+# session mode that stays alive or the normal mode that exits after a solve.
+import gc
+
+from gekko import GEKKO
+import benchmark
+import test_runner
+
+def model():
+    m = GEKKO(remote=False, persistent=True)
+    p = m.Param(value=1, name='p')
+    x = m.Var(value=0, name='x')
+    m.Equation(x == p)
+    return m, p, x
+
+def same_process():
+    with benchmark.stub_executable(session=True):
+        m, p, x = model()
+        m.solve(disp=False)
+        process = m._worker.process
+        assert process.poll() is None
+        for value in (2, 3):
+            p.value = value
+            m.solve(disp=False)
+            # the same process solved with the new data
+            assert m._worker.process is process
+            assert p.value[0] == value
+        m.cleanup()
+        assert process.wait(timeout=5) == 0
+        assert m._worker is None
+
+def one_shot_executable():
+    with benchmark.stub_executable():
+        m, p, x = model()
+        m.solve(disp=False)
+        # the executable exited after the solve and is started again
+        assert m._worker.process.poll() is not None
+        p.value = 4
+        m.solve(disp=False)
+        assert p.value[0] == 4
+        m.cleanup()
+
+def garbage_collected():
+    with benchmark.stub_executable(session=True):
+        m, p, x = model()
+        m.solve(disp=False)
+        process = m._worker.process
+        del m, p, x
+        gc.collect()
+        assert process.wait(timeout=5) == 0
+
+def changed_executable():
+    with benchmark.stub_executable(session=True):
+        m, p, x = model()
+        m.solve(disp=False)
+        process = m._worker.process
+    with benchmark.stub_executable(session=True):
+        m.solve(disp=False)
+        # the process of the other executable was stopped
+        assert process.wait(timeout=5) == 0
+        assert m._worker.process is not process
+        m.cleanup()
+
+test_runner.test('persistent worker same process', same_process)
+test_runner.test('persistent worker one-shot executable', one_shot_executable)
+test_runner.test('persistent worker garbage collected', garbage_collected)
+test_runner.test('persistent worker changed executable', changed_executable)
@@ -1,5 +1,16 @@
 from .gekko import GEKKO
-from . import gk_mcp
+from .gk_batch import solve_many
+
+# optional subsystems are imported when they are first used (gekko.gk_mcp,
+# gekko.chemical, ...) so that `import gekko` stays fast
+_lazy_modules = ('gk_mcp', 'gk_gui', 'ML', 'brain', 'chemical')
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        import importlib
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module ' + repr(__name__) + ' has no attribute ' + repr(name))
+
 #from .brain import Brain
 #from .chemical import Properties
 
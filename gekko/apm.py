@@ -10,6 +10,107 @@ if ver==2:  # Python 2
 else:       # Python 3+
     import urllib.request, urllib.parse, urllib.error
     #import socket
+import threading
+import time
+from collections import deque
+
+#%% Request scheduling
+
+# limits and retries of the requests to the servers, see configure()
+_settings = {'max_concurrent': None, 'retries': 2, 'backoff': 0.5}
+# semaphore for each server that limits the requests at the same time
+_slots = {}
+_slots_lock = threading.Lock()
+
+def configure(max_concurrent=None, retries=None, backoff=None):
+    '''Configure the requests to the servers of remote solves \n \
+       max_concurrent = maximum requests to one server at the same time
+                        (a remote solve holds one while it runs), 0 for
+                        no limit \n \
+       retries = number of times a request is repeated after a transient
+                 failure (connection refused, HTTP 429 or 503 and any
+                 failed download) \n \
+       backoff = seconds before the first retry, doubled for each retry
+       Arguments that are None are not changed.'''
+    with _slots_lock:
+        if max_concurrent is not None:
+            _settings['max_concurrent'] = max_concurrent or None
+            _slots.clear()
+        if retries is not None:
+            _settings['retries'] = int(retries)
+        if backoff is not None:
+            _settings['backoff'] = float(backoff)
+
+class _Slot(object):
+    '''Request slot of a server, taken for each attempt of a request and
+    given back while waiting to retry (wait = seconds waited for a slot)'''
+    def __init__(self, server):
+        self.wait = 0.0
+        self.held = False
+        with _slots_lock:
+            if _settings['max_concurrent'] is None:
+                self.semaphore = None
+            else:
+                server = server.strip()
+                if server not in _slots:
+                    _slots[server] = threading.Semaphore(_settings['max_concurrent'])
+                self.semaphore = _slots[server]
+    def acquire(self):
+        if self.semaphore is not None and not self.held:
+            start = time.time()
+            self.semaphore.acquire()
+            self.wait += time.time() - start
+        self.held = True
+    def release(self):
+        if self.semaphore is not None and self.held:
+            self.semaphore.release()
+        self.held = False
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        self.release()
+
+class RequestMetrics(object):
+    '''Timing of the requests to the servers (the last 10000 requests).
+    Each record is a dictionary with server, app, request (solve, clear,
+    model, csv, info, meas or the name of a downloaded file), seconds,
+    wait (seconds waiting for a free slot, see configure), attempts, sent
+    and received bytes and ok.'''
+    def __init__(self, maxlen=10000):
+        self.records = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+    def add(self, **record):
+        with self._lock:
+            self.records.append(record)
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+    def summary(self):
+        '''Count, failures, retries, total, mean and maximum seconds and
+        total wait for each type of request'''
+        with self._lock:
+            records = list(self.records)
+        summary = {}
+        for r in records:
+            s = summary.setdefault(r['request'], {'count':0, 'failed':0, 'retries':0, 'total':0.0, 'max':0.0, 'wait':0.0})
+            s['count'] += 1
+            s['failed'] += not r['ok']
+            s['retries'] += r['attempts'] - 1
+            s['total'] += r['seconds']
+            s['max'] = max(s['max'], r['seconds'])
+            s['wait'] += r['wait']
+        for s in summary.values():
+            s['mean'] = s['total']/s['count']
+        return summary
+
+metrics = RequestMetrics()
+
+def _request_name(aline):
+    '''Type of an apm_line request for the metrics'''
+    word = aline.split(' ', 1)[0].split('\n', 1)[0]
+    if word in ('solve', 'clear', 'csv', 'info', 'meas', 'option'):
+        return word
+    return 'model'
 
 if ver==2:  # Python 2
 
@@ -31,23 +132,17 @@ if ver==2:  # Python 2
             apm_error = ''
             # Stream solution output
             if(aline=='solve'):
-                line = ''
-                while True:
-                    char = f.read(1)
-                    if not char:
-                        break
-                    elif char == '\n':
-                        if disp: 
-                            print(line)
-                        if debug >= 1:
-                            # Start recording output if error is detected
-                            if '@error' in line:
-                                record_error = True
-                            if record_error:
-                                apm_error+= line + '\n'
-                        line = ''
-                    else:
-                        line += char
+                for line in iter(f.readline, ''):
+                    if line.endswith('\n'):
+                        line = line[:-1]
+                    if disp: 
+                        print(line)
+                    if debug >= 1:
+                        # Start recording output if error is detected
+                        if '@error' in line:
+                            record_error = True
+                        if record_error:
+                            apm_error+= line + '\n'
             # Send request to web-server
             if apm_error != '': # check if any apm errors were found
                 response = apm_error
@@ -87,34 +182,208 @@ if ver==2:  # Python 2
         #fh.close()
         return (file)
 
+    def file_exists(server,app,filename):
+        '''True if the server has the file in the folder of the application,
+        not checked with Python 2 (always False) '''
+        return False
+
 else:       # Python 3+
-    
+
+    import http.client
+    import threading
+
+    # Keep-alive connections to the servers. A remote solve sends many
+    # requests to the same server, reusing the connection avoids a new TCP
+    # (and TLS) handshake for each of them. Connections are only used by one
+    # request at a time and returned to the pool once the response is read.
+    _pool = {}
+    _pool_lock = threading.Lock()
+    # IP address of this client as seen by each server (see get_ip)
+    _ips = {}
+
+    def _new_connection(scheme, netloc):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc)
+        return http.client.HTTPConnection(netloc)
+
+    def _connection(scheme, netloc):
+        '''Idle connection from the pool (reused=True) or a new one'''
+        with _pool_lock:
+            idle = _pool.get((scheme, netloc))
+            if idle:
+                return idle.pop(), True
+        return _new_connection(scheme, netloc), False
+
+    def _send(conn, method, path, data, headers):
+        try:
+            conn.request(method, path, data, headers)
+            return conn.getresponse()
+        except:
+            conn.close()
+            raise
+
+    def _release(key, conn, response):
+        if response.will_close:
+            conn.close()
+        else:
+            with _pool_lock:
+                _pool.setdefault(key, []).append(conn)
+
+    def close_connections():
+        '''Close the idle keep-alive connections to all servers'''
+        with _pool_lock:
+            idle = [c for conns in _pool.values() for c in conns]
+            _pool.clear()
+        for conn in idle:
+            conn.close()
+
+    def _forget(server):
+        '''Drop the IP address and the idle connections of a server after a
+        failed request, the next request looks them up again'''
+        server = server.strip()
+        _ips.pop(server, None)
+        netloc = urllib.parse.urlsplit(server).netloc
+        with _pool_lock:
+            idle = []
+            for key in [k for k in _pool if k[1] == netloc]:
+                idle.extend(_pool.pop(key))
+        for conn in idle:
+            conn.close()
+
+    class _Response(object):
+        '''Response of a pooled request, the connection is returned to the
+        pool when the response is read to the end'''
+        def __init__(self, key, conn, response):
+            self.key = key
+            self.conn = conn
+            self.response = response
+        def _done(self):
+            if self.conn is not None:
+                _release(self.key, self.conn, self.response)
+                self.conn = None
+        def read(self):
+            data = self.response.read()
+            self._done()
+            return data
+        def readline(self):
+            line = self.response.readline()
+            if not line:
+                # readline does not finish a response with a Content-Length
+                # that was read to the end, read() does
+                self.response.read()
+                self._done()
+            return line
+
+    def _urlopen(url, data=None, head=False):
+        '''Send a GET (or POST if data is given, HEAD if head is True)
+        request and return the response with read() and readline(), like
+        urllib.request.urlopen'''
+        for redirect in range(5):
+            parts = urllib.parse.urlsplit(url)
+            if parts.scheme not in ('http', 'https') or \
+               (urllib.request.getproxies().get(parts.scheme) and \
+                not urllib.request.proxy_bypass(parts.hostname or '')):
+                # proxies and other schemes are handled by urllib
+                if head:
+                    return urllib.request.urlopen(urllib.request.Request(url, method='HEAD'))
+                return urllib.request.urlopen(url, data)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+            method = 'HEAD' if head else 'GET'
+            headers = {}
+            if data is not None:
+                method = 'POST'
+                headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            key = (parts.scheme, parts.netloc)
+            conn, reused = _connection(*key)
+            try:
+                response = _send(conn, method, path, data, headers)
+            except (http.client.HTTPException, OSError):
+                if not reused:
+                    raise
+                # the server closed the idle connection, try a new one
+                conn = _new_connection(*key)
+                response = _send(conn, method, path, data, headers)
+            if response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+                response.read()
+                _release(key, conn, response)
+                url = urllib.parse.urljoin(url, response.getheader('Location'))
+                if response.status == 303:
+                    data = None
+                continue
+            if response.status >= 400:
+                response.read()
+                _release(key, conn, response)
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.msg, None)
+            return _Response(key, conn, response)
+        raise urllib.error.URLError('Too many redirects: ' + url)
+
+    def _transient(e, data):
+        '''True if the request failed before the server processed it or
+        can be repeated (downloads)'''
+        if isinstance(e, urllib.error.HTTPError):
+            return e.code in (429, 503) or (data is None and e.code >= 500)
+        if isinstance(e, urllib.error.URLError) and isinstance(e.reason, Exception):
+            e = e.reason
+        if isinstance(e, ConnectionRefusedError):
+            return True
+        return data is None and isinstance(e, (OSError, http.client.HTTPException))
+
+    def _open(url, data=None, attempts=None, slot=None, head=False):
+        '''_urlopen with retries after transient failures, the number of
+        attempts is appended to the attempts list. The request slot is taken
+        for each attempt and kept after a successful one (the response is
+        read in the slot).'''
+        attempt = 0
+        try:
+            while True:
+                attempt += 1
+                if slot is not None:
+                    slot.acquire()
+                try:
+                    return _urlopen(url, data, head)
+                except Exception as e:
+                    if attempt > _settings['retries'] or not _transient(e, data):
+                        raise
+                # other requests to the server can run during the backoff
+                if slot is not None:
+                    slot.release()
+                time.sleep(_settings['backoff'] * 2**(attempt-1))
+        finally:
+            if attempts is not None:
+                attempts.append(attempt)
+
     def cmd(server,app,aline, disp=True, debug=1):
         '''Send a request to the server \n \
            server = address of server \n \
            app      = application name \n \
            aline  = line to send to server \n \
            disp = Print output \n'''
+        start = time.time()
+        attempts = []
+        received = 0
+        ok = False
+        # Web-server URL address
+        url_base = server.strip() + '/online/apm_line.php'
+        app = app.lower()
+        app.replace(" ","")
+        params = urllib.parse.urlencode({'p':app,'a':aline})
+        en_params = params.encode()
+        slot = _Slot(server)
         try:
-            # Web-server URL address
-            url_base = server.strip() + '/online/apm_line.php'
-            app = app.lower()
-            app.replace(" ","")
-            params = urllib.parse.urlencode({'p':app,'a':aline})
-            en_params = params.encode()
-            f = urllib.request.urlopen(url_base,en_params)
-            # initialize apm_error recording
-            record_error = False
-            apm_error = ''
-            # Stream solution output
-            if(aline=='solve'):
-                line = ''
-                while True:
-                    en_char = f.read(1)
-                    char = en_char.decode()
-                    if not char:
-                        break
-                    elif char == '\n':
+            with slot:
+                f = _open(url_base,en_params,attempts,slot)
+                # initialize apm_error recording
+                record_error = False
+                apm_error = ''
+                # Stream solution output
+                if(aline=='solve'):
+                    for en_line in iter(f.readline, b''):
+                        received += len(en_line)
+                        line = en_line.decode(errors='replace')
+                        if line.endswith('\n'):
+                            line = line[:-1]
                         if disp:
                             print(line)
                         if debug >= 1:
@@ -123,28 +392,37 @@ else:       # Python 3+
                                 record_error = True
                             if record_error:
                                 apm_error+= line + '\n'
-                        line = '' # reset line
-                    else:
-                        line += char
-            if apm_error != '': # check if any apm errors were found
-                response = apm_error
-            else:
-                # Send request to web-server
-                en_response = f.read()
-                response = en_response.decode()
+                if apm_error != '': # check if any apm errors were found
+                    response = apm_error
+                else:
+                    # Send request to web-server
+                    en_response = f.read()
+                    received += len(en_response)
+                    response = en_response.decode()
+                ok = True
         except:
+            _forget(server)
             response = 'Failed to connect to server'
+        metrics.add(server=server.strip(), app=app, request=_request_name(aline), \
+                    seconds=time.time()-start-slot.wait, wait=slot.wait, \
+                    attempts=sum(attempts), sent=len(en_params), \
+                    received=received, ok=ok)
         return response
 
     def get_ip(server):
         '''Get current IP address \n \
            server   = address of server'''
-        # get ip address for web-address lookup
-        url_base = server.strip() + '/ip.php'
-        f = urllib.request.urlopen(url_base)
-        fip = f.read()
-        ip = fip.decode().strip()
-        return ip
+        # the address doesn't change between requests, only look it up once
+        # for each server
+        server = server.strip()
+        if server not in _ips:
+            # get ip address for web-address lookup
+            url_base = server + '/ip.php'
+            with _Slot(server) as slot:
+                f = _open(url_base,slot=slot)
+                fip = f.read()
+            _ips[server] = fip.decode().strip()
+        return _ips[server]
 
     def get_file(server,app,filename):
         '''Retrieve any file from web-server\n \
@@ -153,19 +431,83 @@ else:       # Python 3+
         # Retrieve IP address
         ip = get_ip(server)
         
+        start = time.time()
+        attempts = []
+        file = b''
+        ok = False
         # Web-server URL address
         app = app.lower()
         app.replace(" ","")
         url = server.strip() + '/online/' + ip + '_' + app + '/' + filename
-        f = urllib.request.urlopen(url)
-        # Send request to web-server
-        file = f.read()
+        slot = _Slot(server)
+        try:
+            with slot:
+                f = _open(url,None,attempts,slot)
+                # Send request to web-server
+                file = f.read()
+            ok = True
+        except:
+            _forget(server)
+            raise
+        finally:
+            metrics.add(server=server.strip(), app=app, request=filename, \
+                        seconds=time.time()-start-slot.wait, wait=slot.wait, \
+                        attempts=sum(attempts), sent=0, \
+                        received=len(file), ok=ok)
         # Write the file
         #fh = open(filename,'w')
         #en_file = file.decode().replace('\r','')
         #fh.write(en_file)
         #fh.close()
         return (file)
-            
 
+    def file_exists(server,app,filename):
+        '''True if the server has the file in the folder of the application
+        (a HEAD request, the file is not downloaded) \n \
+           server   = address of server \n \
+           app      = application name '''
+        ip = get_ip(server)
 
+        start = time.time()
+        attempts = []
+        exists = False
+        app = app.lower()
+        app.replace(" ","")
+        url = server.strip() + '/online/' + ip + '_' + app + '/' + filename
+        slot = _Slot(server)
+        try:
+            with slot:
+                _open(url,None,attempts,slot,head=True).read()
+            exists = True
+        except urllib.error.HTTPError as e:
+            if e.code != 404:
+                _forget(server)
+        except Exception:
+            _forget(server)
+        metrics.add(server=server.strip(), app=app, request='exists '+filename, \
+                    seconds=time.time()-start-slot.wait, wait=slot.wait, \
+                    attempts=sum(attempts), sent=0, received=0, ok=exists)
+        return exists
+
+def get_files(server,app,filenames):
+    '''Retrieve several files from web-server at the same time\n \
+       server   = address of server \n \
+       app      = application name \n \
+       filenames = list of files, returns a list with their contents'''
+    files = [None]*len(filenames)
+    errors = []
+    def fetch(i):
+        try:
+            files[i] = get_file(server,app,filenames[i])
+        except Exception as e:
+            errors.append(e)
+    # look up the IP address once before the requests are sent in parallel
+    get_ip(server)
+    threads = [threading.Thread(target=fetch,args=(i,)) for i in range(len(filenames))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return files
@@ -2,15 +2,23 @@ import os
 import sys
 import subprocess
 import glob
+import hashlib
+import importlib
 import re
 import tempfile # for temporary directory
+import weakref
 import numpy as np
 from shutil import rmtree
-from .apm import cmd, get_file # remote solve functions
+from .apm import cmd, get_file, get_files, file_exists # remote solve functions
 from .gk_global_options import GKGlobalOptions
 from .gk_parameter import GKParameter, GK_MV, GK_FV
 from .gk_variable import GKVariable, GK_CV, GK_SV
-from .gk_operators import GK_Operators, GK_Intermediate
+from .gk_array import GKVarArray
+from .gk_operators import GK_Operators, GK_Intermediate, GK_Expression, GK_ArrayOperand
+from .gk_profile import GKProfile
+from . import gk_sparse
+from .gk_files import GKFiles
+from .gk_worker import GKWorker
 from itertools import count
 
 #%% Python version compatibility
@@ -41,11 +49,29 @@ def _try(o):
     except:
         return str(o)
 
+def _deferred(module, name):
+    '''Method defined by the function name of module, the module is imported
+    when the method is first called (for optional parts like the solver
+    extensions that don't need to be loaded with gekko)'''
+    def method(self, *args, **kwargs):
+        function = getattr(importlib.import_module(module, __package__), name)
+        return function(self, *args, **kwargs)
+    method.__name__ = name
+    method.__qualname__ = 'GEKKO.' + name
+    return method
+
 
 #%% Equation Object Class, to allow referencing equation later
 class EquationObj(object):
     def __init__(self, value):
-        self.value = str(value)
+        # keep expressions as a graph until the model is written
+        if isinstance(value, GK_Operators):
+            self._expr = value
+        else:
+            self._expr = str(value)
+    @property
+    def value(self):
+        return str(self._expr)
     def __str__(self):
         return self.value
 
@@ -54,10 +80,16 @@ class GEKKO(object):
     """Create a model object. This is the basic object for solving optimization problems"""
     _ids = count(0) #keep track of number of active class instances to not overwrite each other with default model name
 
-    def __init__(self, remote=False, server='http://byu.apmonitor.com', name=None):
+    def __init__(self, remote=False, server='http://byu.apmonitor.com', name=None, persistent=False):
         self._remote = remote
+        #keep the local solver process alive between solves
+        self._persistent = persistent
+        self._worker = None
+        self._stop_worker = None
         self._server = compatible_string_strip(server)
         self.options = GKGlobalOptions()
+        #time and bytes of the phases of each solve (m.profile.enabled = True)
+        self.profile = GKProfile()
         self._id = next(self._ids) #instance count of class
         self._gui_open = False
 
@@ -65,6 +97,7 @@ class GEKKO(object):
         self._constants = []
         self._parameters = []
         self._variables = []
+        self._arrays = [] #variable arrays (m.VarArray)
         self._intermediates = []
         self._inter_equations = []
         self._equations = []
@@ -81,16 +114,32 @@ class GEKKO(object):
         self._csv_status = None #indicate 'provided' or 'generated'
         self._model = ''
 
+        #content of the model files when they were last written, to skip
+        #rewriting them on solves where only data or options change
+        self._model_structure = None
+        self._info_structure = None
+        self._solver_options_file = None
+
         #Default model name, numbered to allow multiple models
         if name == None:
             name = 'gk_model'+str(self._id)
         self._model_name = name.lower().replace(" ", "")
-        #Path of model folder
-        self._path = tempfile.mkdtemp(suffix=self._model_name)
-        self.path = self._path #DEPRECATED, temporarily included for backwards compatibility
+        #model folder, created when it is first needed (see _path)
+        self._folder = None
+        self._remove_folder = None
 
         #extra, non-default files to send to server (eg solver.opt, cspline.csv)
         self._extra_files = []
+        #text of the data files of objects (cspline, axb, ...) written to
+        #the model folder before a local solve
+        self._files = GKFiles()
+        #text of the files sent to the server by name, kept while unchanged
+        self._file_cache = {}
+        #checksum of the model sent to the server in the last remote solve
+        self._remote_checksum = None
+        #folder (and server) where the solver has the options of the last
+        #measurements.dbs file, see _generate_dbs_file
+        self._dbs_synced = None
         #list of strings for solver options
         self.solver_options = []
 
@@ -98,6 +147,51 @@ class GEKKO(object):
         if self._remote:
             cmd(self._server,self._model_name,'clear all')
 
+    @property
+    def _path(self):
+        '''Model folder, a temporary folder that is created when it is first
+        needed (a solve, m.path, ...) and removed with the model'''
+        if self._folder is None:
+            self._folder = tempfile.mkdtemp(suffix=self._model_name)
+            #remove the folder when the model is garbage collected
+            self._remove_folder = weakref.finalize(self, rmtree, self._folder, True)
+            self._remove_folder.atexit = False
+            for vp in self._parameters + self._variables:
+                if vp.type is not None and vp.path is None:
+                    object.__setattr__(vp, 'path', self._folder)
+        return self._folder
+
+    @_path.setter
+    def _path(self, path):
+        self._folder = path
+
+    #DEPRECATED, temporarily included for backwards compatibility
+    path = _path
+
+    def __getstate__(self):
+        '''State for pickle and copy without the finalizer that removes the
+        model folder and the persistent solver process of this model'''
+        state = self.__dict__.copy()
+        for name in ('_remove_folder', '_worker', '_stop_worker'):
+            state[name] = None
+        return state
+
+    def __setstate__(self, state):
+        '''A copy creates its own model folder when it is first needed and
+        writes all files and values to it'''
+        folder = state['_folder']
+        self.__dict__.update(state)
+        self._folder = None
+        if folder is None:
+            return
+        self._files.reset()
+        for vp in self._parameters + self._variables:
+            if getattr(vp, 'path', None) == folder:
+                object.__setattr__(vp, 'path', None)
+            vp.value.change = True
+        for array in self._arrays:
+            array.__dict__['_change'] = True
+
 
     #%% Parts of the model
     def Const(self, value=0, name=None):
@@ -110,7 +204,12 @@ class GEKKO(object):
                 name = None
         if isinstance(value, (list,np.ndarray)):
             raise ValueError("Constant value must be scalar.")
-        const = GK_Operators(name,value)
+        if name is None:
+            name = 'i'+str(GK_Operators.count)
+            GK_Operators.count += 1
+        # constants are expression nodes so that operand order in the model
+        # text is the same as for expressions
+        const = GK_Expression((name,),value)
         self._constants.append(const)
         return const
 
@@ -138,7 +237,7 @@ class GEKKO(object):
         if integer == True:
             name = 'int_'+name
 
-        parameter = GK_FV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
+        parameter = GK_FV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._folder, integer=integer)
         self._parameters.append(parameter)
         if fixed_initial is False:
             self.Connection(parameter,'calculated',pos1=1,node1=1)
@@ -153,7 +252,7 @@ class GEKKO(object):
         if integer == True:
             name = 'int_'+name
 
-        parameter = GK_MV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
+        parameter = GK_MV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._folder, integer=integer)
         self._parameters.append(parameter)
         if fixed_initial is False:
             self.Connection(parameter,'calculated',pos1=1,node1=1)
@@ -182,7 +281,7 @@ class GEKKO(object):
         if integer == True:
             name = 'int_'+name
 
-        variable = GK_SV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
+        variable = GK_SV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._folder, integer=integer)
         self._variables.append(variable)
         if fixed_initial is False:
             self.Connection(variable,'calculated',pos1=1,node1=1)
@@ -198,7 +297,7 @@ class GEKKO(object):
         if integer == True:
             name = 'int_'+name
 
-        variable = GK_CV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._path, integer=integer)
+        variable = GK_CV(name=name, value=value, lb=lb, ub=ub, gk_model=self._model_name, model_path=self._folder, integer=integer)
         self._variables.append(variable)
         if fixed_initial is False:
             self.Connection(variable,'calculated',pos1=1,node1=1)
@@ -211,7 +310,10 @@ class GEKKO(object):
                 name = None
         inter = GK_Intermediate(name)
         self._intermediates.append(inter)
-        self._inter_equations.append(str(equation))
+        # expressions are converted to text when the model is written
+        if not isinstance(equation, GK_Operators):
+            equation = str(equation)
+        self._inter_equations.append(equation)
         return inter
 
     def Equation(self,equation):
@@ -221,12 +323,29 @@ class GEKKO(object):
                 eo = self.Equation(eq)
                 l.append(eo)
             return l
+        elif isinstance(equation, GK_ArrayOperand):
+            return self.Equations(equation)
         else:
             EqObj = EquationObj(equation)
             self._equations.append(EqObj)
             return EqObj
 
-    def Equations(self,eqs):
+    def Equations(self,eqs,compact=False):
+        '''Add a list of equations or the equations of an array expression
+        (e.g. A @ x <= b or x[1:] - x[:-1] <= dmax with x = m.VarArray(n)),
+        one equation per element.
+
+        compact = write an array expression of whole VarArray ranges as a
+                  single equation in APM array syntax (x[2:n]-x[1:n-1]<=d)
+        '''
+        if isinstance(eqs, GK_ArrayOperand):
+            if compact and eqs._template is not None:
+                rows = [eqs._template]
+            else:
+                rows = eqs._rows.ravel().tolist()
+            l = [EquationObj(row) for row in rows]
+            self._equations.extend(l)
+            return l
         l = []
         for eq in eqs:
             eo = self.Equation(eq)
@@ -308,16 +427,16 @@ class GEKKO(object):
         if isinstance(var2,(int,float)):
             self._connections.append(var1_str + '=fixed')
             if pos1==None:
-               var1.__dict__['_override_csv'].append((0,var2))
+               var1._override_csv.append((0,var2))
             else:
                # catch case when 'end' is given as pos1 instead of an integer
                if pos1=='end':  # only override_csv if integer pos1
                   if self.time is not None:
-                     var1.__dict__['_override_csv'].append((len(self.time)-1,var2))
+                     var1._override_csv.append((len(self.time)-1,var2))
                   else:
                      print('Warning: Specify m.time before connecting to end node')
                else:
-                  var1.__dict__['_override_csv'].append((pos1,var2))
+                  var1._override_csv.append((pos1,var2))
 
     def fix(self,var, val=None, pos=None):
         '''Fix a variable at a specific value so that the solver cannot adjust the
@@ -545,28 +664,20 @@ class GEKKO(object):
         filedata += str(ny) + ' !outputs \n'
         filedata += str(nb) + ' !number of input terms \n'
         filedata += str(na) + ' !number of output terms \n'
-        with open(os.path.join(self._path,filename), 'w+') as f:
-            f.write(filedata)
-        self._extra_files.append(filename) #add csv file to list of extra file to send to server
+        self._add_file(filename, filedata)
 
         #write A,B matricies to objectname.A/B.txt
         filename = arx_name + '.alpha.txt'
-        np.savetxt(os.path.join(self._path,filename), a, delimiter=", ", fmt='%1.25s')
-        self._extra_files.append(filename) #add csv file to list of extra file to send to server
+        self._add_file(filename, gk_sparse.text(a, delimiter=", "))
         filename = arx_name + '.beta.txt'
         if b.ndim==2:
             #write once for 2D array
-            np.savetxt(os.path.join(self._path,filename), b, delimiter=", ", fmt='%1.25s')
+            self._add_file(filename, gk_sparse.text(b, delimiter=", "))
         elif b.ndim==3:
-            #open file in binary mode to append for 3D array
-            f=open(os.path.join(self._path,filename),'ab')
-            for i in range(ny):
-                np.savetxt(f, b[i], delimiter=", ", fmt='%1.25s')
-            f.close()
-        self._extra_files.append(filename) #add csv file to list of extra file to send to server
+            #matrices of the outputs one after the other for 3D array
+            self._add_file(filename, gk_sparse.text(b.reshape(-1,b.shape[2]), delimiter=", "))
         filename = arx_name + '.gamma.txt'
-        np.savetxt(os.path.join(self._path,filename), c, delimiter=", ", fmt='%1.25s')
-        self._extra_files.append(filename) #add csv file to list of extra file to send to server
+        self._add_file(filename, gk_sparse.text(c, delimiter=", "))
 
         #define arrays of states, outputs and inputs
         if isinstance(y,(GKVariable,GKParameter)):
@@ -602,7 +713,8 @@ class GEKKO(object):
     def axb(self,A,b,x=None,etype='=',sparse=False):
         """Create Ax=b, Ax<b, Ax>b, Ax<=b, or Ax>=b models
         Usage: x = m.axb(A,b,etype='=,<,>,<=,>=',sparse=[True,False])
-        Input: A = numpy 2D array or list in dense or sparse form
+        Input: A = numpy 2D array or list in dense or sparse form, or a
+                     scipy.sparse matrix (always written in sparse form)
                b = numpy 1D array or list in dense or sparse form
                x = 1D array of gekko variables (optional). If None on entry
                      then the array is created and returned.
@@ -615,40 +727,35 @@ class GEKKO(object):
         """
 
         #verify data input types
-        if not all(isinstance(y, (list,np.ndarray)) for y in [A,b]):
-            raise TypeError("Each input (A and b) must be a python list or numpy array")
+        if not all(isinstance(y, (list,np.ndarray)) or gk_sparse.issparse(y) for y in [A,b]):
+            raise TypeError("Each input (A and b) must be a python list, numpy array or scipy.sparse matrix")
 
         if not any(etype[0]==t for t in ['=','>','<']):
             raise TypeError("etype must start with either, '=', '<', or '>'")
 
-        #convert data to flat numpy arrays
-        A = np.array(A,dtype=float)
-        print('A')
-        print(A)
-        b = np.array(b,dtype=float).T
-        print('b')
-        print(b)
-        if sparse:
-            A = A.T
-            m = np.size(b,0)
-            n = np.size(b,1)
-            if (n!=2):
+        if gk_sparse.issparse(A):
+            # scipy.sparse matrix in COO form, never converted to dense
+            sparse = True
+            r_max, c_max = gk_sparse.shape(A)
+            b, nb = gk_sparse.pairs(b)
+            if nb!=r_max:
+                raise Exception('The number of A matrix rows and b vector size must be the same')
+            A = gk_sparse.triplets(A)
+        elif sparse:
+            A = np.array(A,dtype=float).T
+            b = np.array(b,dtype=float).T
+            # check sizes
+            if (np.ndim(b)!=2 or np.size(b,1)!=2):
                 raise Exception('The b vector must be in COO form as [row,value] with 2 columns')
-        else:
-            b = b.flatten()
-
-        # check sizes
-        if sparse:
-            m = np.size(A,0)
-            n = np.size(A,1)
-            if (n!=3):
+            if (np.ndim(A)!=2 or np.size(A,1)!=3):
                 raise Exception('The A matrix must be in COO form as [row,col,value] with 3 columns')
-
-        if sparse:
             # sparse matrix size
             r_max = int(np.max(A[:,0]))
             c_max = int(np.max(A[:,1]))
         else:
+            #convert data to flat numpy arrays
+            A = np.array(A,dtype=float)
+            b = gk_sparse.dense(b).flatten()
             # dense matrix check
             r_max = np.size(A,0)
             c_max = np.size(A,1)
@@ -676,26 +783,20 @@ class GEKKO(object):
 
         # write header file
         filename = axb_name+'.txt'
-        fid = open(os.path.join(self._path,filename),'w')
         if sparse:
-            fid.write('sparse, ')
+            filedata = 'sparse, '
         else:
-            fid.write('dense, ')
-        fid.write('Ax'+etype[0]+'b\n')
-        fid.write(str(int(r_max)) + ' ! m = number of rows of A and b size \n')
-        fid.write(str(int(c_max)) + ' ! n = number of cols of A and x size \n')
-        fid.close()
-        self._extra_files.append(filename)
+            filedata = 'dense, '
+        filedata += 'Ax'+etype[0]+'b\n'
+        filedata += str(int(r_max)) + ' ! m = number of rows of A and b size \n'
+        filedata += str(int(c_max)) + ' ! n = number of cols of A and x size \n'
+        self._add_file(filename, filedata)
 
         # write A file
-        filename = os.path.join(self._path,axb_name+'.a.txt')
-        np.savetxt(filename, A, delimiter=",", fmt='%1.25s')
-        self._extra_files.append(axb_name+'.a.txt')
+        self._add_file(axb_name+'.a.txt', gk_sparse.text(A, delimiter=","))
 
         # write b file
-        filename = os.path.join(self._path,axb_name+'.b.txt')
-        np.savetxt(filename, b, delimiter=",", fmt='%1.25s')
-        self._extra_files.append(axb_name+'.b.txt')
+        self._add_file(axb_name+'.b.txt', gk_sparse.text(b, delimiter=","))
 
         #Add connections between x and axb object x (index 1)
         for i in range(nx):
@@ -773,32 +874,18 @@ class GEKKO(object):
             if  z_data.shape != (x_data.size,y_data.size):
                 raise Exception('z_data must be of size (x_data.size,y_data.size)')
             #save x,y,z data
-            np.savetxt(os.path.join(self._path,bspline_name+'_x.csv'), x_data, delimiter=",", fmt='%1.25s')
-            np.savetxt(os.path.join(self._path,bspline_name+'_y.csv'), y_data, delimiter=",", fmt='%1.25s')
-            np.savetxt(os.path.join(self._path,bspline_name+'_z.csv'), z_data, delimiter=",", fmt='%1.25s')
-            #add files to list of extra file to send to server
-            self._extra_files.append(bspline_name+'_x.csv')
-            self._extra_files.append(bspline_name+'_y.csv')
-            self._extra_files.append(bspline_name+'_z.csv')
+            self._add_file(bspline_name+'_x.csv', gk_sparse.text(x_data, delimiter=","))
+            self._add_file(bspline_name+'_y.csv', gk_sparse.text(y_data, delimiter=","))
+            self._add_file(bspline_name+'_z.csv', gk_sparse.text(z_data, delimiter=","))
 
         else: #data is knots and coeffs
             #save tx,ty,c data
-            np.savetxt(os.path.join(self._path,bspline_name+'_tx.csv'), x_data, delimiter=",", fmt='%1.25s')
-            np.savetxt(os.path.join(self._path,bspline_name+'_ty.csv'), y_data, delimiter=",", fmt='%1.25s')
-            np.savetxt(os.path.join(self._path,bspline_name+'_c.csv'), z_data, delimiter=",", fmt='%1.25s')
-            #add files to list of extra file to send to server
-            self._extra_files.append(bspline_name+'_tx.csv')
-            self._extra_files.append(bspline_name+'_ty.csv')
-            self._extra_files.append(bspline_name+'_c.csv')
-        fname = bspline_name+'_info.csv'
-        self._extra_files.append(fname)
-        fid = open(os.path.join(self._path,fname),'w')
-        fid.write(str(kx) + '\n')
-        fid.write(str(ky) + '\n')
+            self._add_file(bspline_name+'_tx.csv', gk_sparse.text(x_data, delimiter=","))
+            self._add_file(bspline_name+'_ty.csv', gk_sparse.text(y_data, delimiter=","))
+            self._add_file(bspline_name+'_c.csv', gk_sparse.text(z_data, delimiter=","))
         if sf==None:
             sf = len(x_data)*len(y_data)*0.1**2
-        fid.write(str(sf) + '\n')
-        fid.close()
+        self._add_file(bspline_name+'_info.csv', str(kx) + '\n' + str(ky) + '\n' + str(sf) + '\n')
 
         #Add connections between x and y with bspline object data
         self._connections.append(x.name + ' = ' + bspline_name+'.x')
@@ -962,12 +1049,8 @@ class GEKKO(object):
 
         #write x_data and y_data to objectname.csv
         filename = cspline_name + '.csv'
-        csv_data = np.hstack(('x_data',x_data.astype(object)))
-        csv_data = np.vstack((csv_data,np.hstack(('y_data',y_data.astype(object)))))
-        np.savetxt(os.path.join(self._path,filename), csv_data.T, delimiter=",", fmt='%1.25s')
-
-        #add csv file to list of extra file to send to server
-        self._extra_files.append(filename)
+        csv_data = np.vstack((x_data,y_data))
+        self._add_file(filename, gk_sparse.text(csv_data.T, delimiter=",", header='x_data,y_data'))
 
         #Add connections between x and y with cspline object data
         self._connections.append(x.name + ' = ' + cspline_name+'.x_data')
@@ -1267,10 +1350,7 @@ class GEKKO(object):
         #write x_data and y_data to objectname.txt
         filename = pwl_name + '.txt'
         data = np.vstack((x_data,y_data))
-        np.savetxt(os.path.join(self._path,filename), data.T, delimiter=",", fmt='%1.25s')
-
-        #add txt file to list of extra file to send to server
-        self._extra_files.append(filename)
+        self._add_file(filename, gk_sparse.text(data.T, delimiter=","))
 
         #Add connections between x and y with pwl object data
         self._connections.append(x.name + ' = ' + pwl_name+'.x')
@@ -1287,7 +1367,8 @@ class GEKKO(object):
         """Create quadratic objective  = 0.5 x^T A x + c^T x
         Usage: x = m.qobj(c,Q=[2d array],otype=['min','max'],sparse=[True,False])
         Input: b = numpy 1D array or list in dense or sparse form
-               A = numpy 2D array or list in dense or sparse form
+               A = numpy 2D array or list in dense or sparse form, or a
+                     scipy.sparse matrix (always written in sparse form)
                x = array of gekko variables (optional). If None on entry
                      then the array is created and returned.
                etype = ['=','<','>','>=','<='] for equality or inequality form
@@ -1300,61 +1381,71 @@ class GEKKO(object):
         """
 
         #verify data input types
-        if not isinstance(b, (list,np.ndarray)):
-            raise TypeError("QOBJ input b must be a python list or numpy array")
+        if not (isinstance(b, (list,np.ndarray)) or gk_sparse.issparse(b)):
+            raise TypeError("QOBJ input b must be a python list, numpy array or scipy.sparse matrix")
 
         if not any(otype[0:min(3,len(otype))].lower()==t for t in ['min','max']):
             raise TypeError("otype must start with either, 'min' or 'max'")
 
-        b = np.array(b,dtype=float)
-        if sparse:
-            b = b.T
-            m = np.size(b,0)
-            n = np.size(b,1)
-            if (n!=2):
-                raise Exception('The b vector must be in COO form as [row,value] with 2 rows')
+        if gk_sparse.issparse(A):
+            # scipy.sparse matrix in COO form, never converted to dense
+            sparse = True
+            r_max, c_max = gk_sparse.shape(A)
+            if (r_max!=c_max):
+                raise Exception('QOBJ: A matrix must have same number of rows and columns')
+            b, nb = gk_sparse.pairs(b)
+            if nb!=c_max:
+                raise Exception('QOBJ: b must have the same size as the A matrix')
+            A = gk_sparse.triplets(A)
         else:
-            b = b.flatten()
-
-        if (len(A)>=1):
-            if not isinstance(A, (list,np.ndarray)):
-                raise TypeError("QOBJ input A must be a python list or numpy array")
-            A = np.array(A,dtype=float).T
-            # check sizes
-            if sparse:
-                m = np.size(A,0)
-                n = np.size(A,1)
-                if (n!=3):
-                    raise Exception('The A matrix must be in COO form as [row,col,value] with 3 rows')
-
+            b = gk_sparse.dense(b)
             if sparse:
-                # sparse matrix size
-                r_max = np.max(A[:,0])
-                c_max = np.max(A[:,1])
+                b = b.T
+                m = np.size(b,0)
+                n = np.size(b,1)
+                if (n!=2):
+                    raise Exception('The b vector must be in COO form as [row,value] with 2 rows')
+                # maximum row index
+                nb = int(np.max(b[:,0]))
             else:
-                # dense matrix check
-                r_max = np.size(A,0)
-                c_max = np.size(A,1)
-                if (r_max!=c_max):
-                    raise Exception('QOBJ: A matrix must have same number of rows and columns')
+                b = b.flatten()
+                nb = np.size(b)
+
+            if (len(A)>=1):
+                if not isinstance(A, (list,np.ndarray)):
+                    raise TypeError("QOBJ input A must be a python list, numpy array or scipy.sparse matrix")
+                A = np.array(A,dtype=float).T
+                # check sizes
+                if sparse:
+                    m = np.size(A,0)
+                    n = np.size(A,1)
+                    if (n!=3):
+                        raise Exception('The A matrix must be in COO form as [row,col,value] with 3 rows')
+
+                if sparse:
+                    # sparse matrix size
+                    r_max = np.max(A[:,0])
+                    c_max = np.max(A[:,1])
+                else:
+                    # dense matrix check
+                    r_max = np.size(A,0)
+                    c_max = np.size(A,1)
+                    if (r_max!=c_max):
+                        raise Exception('QOBJ: A matrix must have same number of rows and columns')
 
         if x==None:
             # create x variable array if none given
-            if sparse:
-                # maximum row index
-                nx = int(np.max(b[:,0]))
-            else:
-                nx = np.size(b)
+            nx = nb
             xin = self.Array(self.Var,(nx))
         else:
             if not isinstance(x, (list,np.ndarray)):
                 raise TypeError("Optional x must be a python list or numpy array of GEKKO variables or parameters")
             nx = len(x)
             if sparse:
-                if (nx!=int(np.max(b[:,0]))):
+                if (nx!=nb):
                     raise TypeError("Optional x must have same dimension as sparse b")
             else:
-                if nx!=np.size(b):
+                if nx!=nb:
                     raise TypeError("Optional x must have same dimension as b")
             if len(A)>=1:
                 if nx!=c_max:
@@ -1370,29 +1461,23 @@ class GEKKO(object):
 
         # write header file
         filename = qobj_name+'.txt'
-        fid = open(os.path.join(self._path,filename),'w')
         if sparse:
-            fid.write('sparse, ')
+            filedata = 'sparse, '
         else:
-            fid.write('dense, ')
+            filedata = 'dense, '
         if (otype[0:min(3,len(otype))].lower()=='min'):
-            fid.write('minimize\n')
+            filedata += 'minimize\n'
         else:
-            fid.write('maximize\n')
-        fid.write(str(int(nx)) + ' ! n = number of variables \n')
-        fid.close()
-        self._extra_files.append(filename)
+            filedata += 'maximize\n'
+        filedata += str(int(nx)) + ' ! n = number of variables \n'
+        self._add_file(filename, filedata)
 
         # write A file
         if (len(A)>=1):
-            filename = qobj_name+'.a.txt'
-            np.savetxt(os.path.join(self._path,filename), A, delimiter=",", fmt='%1.25s')
-            self._extra_files.append(qobj_name+'.a.txt')
+            self._add_file(qobj_name+'.a.txt', gk_sparse.text(A, delimiter=","))
 
         # write b file
-        filename = qobj_name+'.b.txt'
-        np.savetxt(os.path.join(self._path,filename), b, delimiter=",", fmt='%1.25s')
-        self._extra_files.append(qobj_name+'.b.txt')
+        self._add_file(qobj_name+'.b.txt', gk_sparse.text(b, delimiter=","))
 
         #Add connections between x and qobj object x (index 1)
         for i in range(nx):
@@ -1492,13 +1577,11 @@ class GEKKO(object):
         E dx/dt = Ax + Bu
               y = Cx + Du
         """
-        #set all matricies to numpy
-        A = np.array(A,dtype=float)
-        B = np.array(B,dtype=float)
-        C = np.array(C,dtype=float)
-        if D is not None:
+        #set all matricies to numpy, scipy.sparse matrices stay sparse
+        A, B, C = [M if gk_sparse.issparse(M) else np.array(M,dtype=float) for M in (A,B,C)]
+        if D is not None and not gk_sparse.issparse(D):
             D = np.array(D,dtype=float)
-        if E is not None:
+        if E is not None and not gk_sparse.issparse(E):
             E = np.array(E,dtype=float)
 
         # E dx/dt = A * x + B * u
@@ -1540,74 +1623,19 @@ class GEKKO(object):
         filedata += str(m) + ' !inputs \n'
         filedata += str(n) + ' !states \n'
         filedata += str(p) + ' !outputs \n'
-        with open(os.path.join(self._path,filename), 'w+') as f:
-            f.write(filedata)
-        self._extra_files.append(filename) #add csv file to list of extra file to send to server
-
-        if dense is True:
-            #write A,B,C,[D,E] matricies to objectname.A/B/C/D/E.txt
-            filename = SS_name + '.a.txt'
-            np.savetxt(os.path.join(self._path,filename), A, delimiter=" ", fmt='%1.25s')
-            self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            filename = SS_name + '.b.txt'
-            np.savetxt(os.path.join(self._path,filename), B, delimiter=" ", fmt='%1.25s')
-            self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            filename = SS_name + '.c.txt'
-            np.savetxt(os.path.join(self._path,filename), C, delimiter=" ", fmt='%1.25s')
-            self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            if D is not None:
-                filename = SS_name + '.d.txt'
-                np.savetxt(os.path.join(self._path,filename), D, delimiter=" ", fmt='%1.25s')
-                self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            if E is not None:
-                filename = SS_name + '.e.txt'
-                np.savetxt(os.path.join(self._path,filename), E, delimiter=" ", fmt='%1.25s')
-                self._extra_files.append(filename) #add csv file to list of extra file to send to server
-        else: #sparse form
-        # (nx1) = (nxn)*(nx1) + (nxm)*(mx1)
-        # (px1) = (pxn)*(nx1) + (pxm)*(mx1)
-            filename = SS_name + '.a.txt'
-            sparse_matrix = []
-            for j in range(n):
-                for i in range(n):
-                    if A[i,j] != 0:
-                        sparse_matrix.append([i+1,j+1,A[i,j]])
-            np.savetxt(os.path.join(self._path,filename), sparse_matrix, delimiter=" ", fmt='%1.25s')
-            self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            filename = SS_name + '.b.txt'
-            sparse_matrix = []
-            for j in range(m):
-                for i in range(n):
-                    if B[i,j] != 0:
-                        sparse_matrix.append([i+1,j+1,B[i,j]])
-            np.savetxt(os.path.join(self._path,filename), sparse_matrix, delimiter=" ", fmt='%1.25s')
-            self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            filename = SS_name + '.c.txt'
-            sparse_matrix = []
-            for j in range(n):
-                for i in range(p):
-                    if C[i,j] != 0:
-                        sparse_matrix.append([i+1,j+1,C[i,j]])
-            np.savetxt(os.path.join(self._path,filename), sparse_matrix, delimiter=" ", fmt='%1.25s')
-            self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            if D is not None:
-                filename = SS_name + '.d.txt'
-                sparse_matrix = []
-                for j in range(m):
-                    for i in range(p):
-                        if D[i,j] != 0:
-                            sparse_matrix.append([i+1,j+1,D[i,j]])
-                np.savetxt(os.path.join(self._path,filename), sparse_matrix, delimiter=" ", fmt='%1.25s')
-                self._extra_files.append(filename) #add csv file to list of extra file to send to server
-            if E is not None:
-                filename = SS_name + '.e.txt'
-                sparse_matrix = []
-                for j in range(n):
-                    for i in range(n):
-                        if E[i,j] != 0:
-                            sparse_matrix.append([i+1,j+1,E[i,j]])
-                np.savetxt(os.path.join(self._path,filename), sparse_matrix, delimiter=" ", fmt='%1.25s')
-                self._extra_files.append(filename) #add csv file to list of extra file to send to server
+        self._add_file(filename, filedata)
+
+        #write A,B,C,[D,E] matricies to objectname.a/b/c/d/e.txt
+        for key, M in (('a',A),('b',B),('c',C),('d',D),('e',E)):
+            if M is None:
+                continue
+            filename = SS_name + '.' + key + '.txt'
+            if dense is True:
+                M = gk_sparse.dense(M)
+            else:
+                # sparse form [row,col,value] of the nonzero entries, column by column
+                M = gk_sparse.triplets(M)
+            self._add_file(filename, gk_sparse.text(M, delimiter=" "))
 
         #define arrays of states, outputs and inputs
         x = [self.SV() for i in np.arange(n)]
@@ -1993,9 +2021,8 @@ class GEKKO(object):
             # solve system ID
             syid.solve(disp=(diaglevel>=1))
             # retrieve and visualize solution
-            import json
-            with open(syid.path+'//results.json') as f:
-                sol = json.load(f)
+            from .gk_post_solve import _read_json
+            sol = _read_json(syid.path+'//results.json')
 
             for j in range(ny):
                 for i in range(n):
@@ -2103,6 +2130,21 @@ class GEKKO(object):
         for i in np.nditer(x, flags=["refs_ok"],op_flags=['readwrite']):
             i[...] = f(**args)
         return x
+
+    def VarArray(self, shape, lb=None, ub=None, value=None, integer=False, type=None, name=None):
+        """Array of variables with the values, bounds and options of all
+        elements in NumPy arrays instead of one object per element as with
+        m.Array(m.Var, shape). lb, ub and value are numbers or arrays that
+        broadcast to the shape, type is None, 'SV', 'CV', 'FV' or 'MV'
+        (declared as parameters). The elements x[i] are used in equations
+        and named x[1] to x[n] in the model."""
+        if name is not None:
+            name = re.sub(r'\W+', '_', name).lower()
+        else:
+            name = 'va' + str(len(self._arrays) + 1)
+        array = GKVarArray(name, shape, value, lb, ub, integer, type)
+        self._arrays.append(array)
+        return array
     """
     #gives an array in a list instead of numpy ndarray
     def Arraylist(sizes, f):
@@ -2116,13 +2158,20 @@ class GEKKO(object):
     from .gk_debug import gk_logic_tree, verify_input_options, like, name_check
     from .gk_write_files import _write_solver_options, _generate_dbs_file, _write_info, _write_csv, _build_model
     from .gk_post_solve import load_JSON, load_results
-    from .gk_solver_extension import solver_extension, solve_with_converter
-    from .gk_solver_extension_amplpy import solver_extension_amplpy, create_amplpy_object, generate_ampl_file
-    from .gk_solver_extension_pyomo import solver_extension_pyomo, create_pyomo_object
+    from .gk_async import solve_async, solve_stream
+    from .gk_sweep import sweep
+    #solver extensions are imported when they are used
+    solver_extension = _deferred('.gk_solver_extension', 'solver_extension')
+    solve_with_converter = _deferred('.gk_solver_extension', 'solve_with_converter')
+    solver_extension_amplpy = _deferred('.gk_solver_extension_amplpy', 'solver_extension_amplpy')
+    create_amplpy_object = _deferred('.gk_solver_extension_amplpy', 'create_amplpy_object')
+    generate_ampl_file = _deferred('.gk_solver_extension_amplpy', 'generate_ampl_file')
+    solver_extension_pyomo = _deferred('.gk_solver_extension_pyomo', 'solver_extension_pyomo')
+    create_pyomo_object = _deferred('.gk_solver_extension_pyomo', 'create_pyomo_object')
 
 
     #%% Get a solution
-    def solve(self,disp=True,debug=1,GUI=False,**kwargs):
+    def solve(self,disp=True,debug=1,GUI=False,load=None,arrays=False,profile=False,**kwargs):
         """Solve the optimization problem.
 
         This function has these substeps:
@@ -2131,160 +2180,116 @@ class GEKKO(object):
         -Write options to dbs file
         -Solve the problem using the apm.exe commandline interface.
         -Load results into python variables.
+
+        load = variables, parameters and intermediates (or their names) to
+               load the results of, default is all
+        arrays = load the result values as NumPy arrays instead of lists
+        profile = record the time and bytes of each phase of this solve in
+                  m.profile (m.profile.enabled = True profiles every solve)
         """
         if 'remote' in kwargs:
             raise TypeError('"remote" argument has been moved to model initialization (GEKKO(remote=True))')
-        
-        # check for integer variables or parameters and issue warning if not APOPT solver      
-        has_integer = any(
-            getattr(v, 'integer', False)
-            for v in (self._variables + self._parameters)
-        )
-        if has_integer:
-            solver = self.options.SOLVER
-            supports_mip = (solver == 1)   
-            if not supports_mip:
-                print("WARNING: Integer variables detected, but the selected solver "
-                      f"(SOLVER={solver})\n"
-                      "         does not support mixed-integer optimization.\n"
-                      "         Integer constraints will be relaxed.\n"
-                      "         Use m.options.SOLVER = 1 (APOPT) for integer enforcement.")
 
-        # allow solver options to be submitted as dictionary
-        if isinstance(self.solver_options, dict):
-            options = []
-            for option in self.solver_options.keys():
-                options.append("%s %s" % (option, self.solver_options[option]))
-            self.solver_options = options
+        if profile or self.profile.enabled:
+            self.profile.start()
+        else:
+            # drop the record of a profiled solve that failed
+            self.profile.cancel()
 
-        solver_extension_option = self.options.SOLVER_EXTENSION
-        if solver_extension_option and not (isinstance(solver_extension_option, str) and solver_extension_option.upper() == "GEKKO"):
+        self._check_options()
+
+        if self._uses_solver_extension():
             # solve using solver extension
-            self.solver_extension(disp=disp)
+            with self.profile.phase('solve'):
+                self.solver_extension(disp=disp)
+            self.profile.finish(self.options)
             return
 
         # else solve normally
-        if isinstance(self.options.SOLVER, float):
-            self.options.SOLVER = int(self.options.SOLVER)
-        if isinstance(self.options.SOLVER, str):
-            # allow solver to be specified by string
-            available_solvers = ["ALL", "APOPT", "BPOPT", "IPOPT", "MINOS", "SNOPT"]
-            try:
-                self.options.SOLVER = available_solvers.index(self.options.SOLVER.upper())
-            except:
-                raise ValueError("Solver `%s` not found. If you are trying to use solver extension make sure you set m.options.SOLVER_EXTENSION = True." % self.options.SOLVER)
-
-        timing = False
-        if timing == True:
-            import time
+        self._write_files(debug)
 
-        if timing == True:
-            t = time.time()
-        # Build the model
-        if self._model != 'provided': #no model was provided
-            self._build_model()
-        if timing == True:
-            print('build model', time.time() - t)
-
-
-        if timing == True:
-            t = time.time()
-        if self._csv_status != 'provided':
-            self._write_csv()
-        if timing == True:
-            print('build csv', time.time() - t)
-
-        if timing == True:
-            t = time.time()
-        self._generate_dbs_file()
-        if timing == True:
-            print('build dbs', time.time() - t)
-
-        if timing == True:
-            t = time.time()
-        self._write_solver_options()
-        if timing == True:
-            print('build solver options', time.time() - t)
-
-        if timing == True:
-            t = time.time()
-        self._write_info()
-        if timing == True:
-            print('write info', time.time() - t)
-
-        if debug >= 3:
-            self.name_check()
+        # result files written by the solver or downloaded from the server
+        solve_phase = self.profile.begin('solve', written=[os.path.join(self._path,f) for f in \
+                                         ('results.json','options.json','results.csv','results_all.csv')])
 
         if self._remote == False: # local_solve
-            if timing == True:
-                t = time.time()
-
             # initialize printing
             outs = ''
             record_error = False
             apm_error = ''
-            sselect = False
 
             # Calls apmonitor through the command line
-            dirname = os.path.dirname(os.path.realpath(__file__))
+            apm_exe, sselect = self._apm_executable()
             penv = {"PATH" : self._path }
-            if sys.platform=='win32' or sys.platform=='win64': # Windows 32 or 64 bit
-                apm_exe = os.path.join(dirname,'bin','apm.exe')
-                if not ipython:
-                    sselect = True  # set shell=False for IPython
-            elif sys.platform=='darwin': # MacOS
-                apm_exe = os.path.join(dirname,'bin','apm_mac')
-            elif sys.platform=='linux' or sys.platform=='linux2': # Linux
-                if (os.uname()[4].startswith("aarch64") or os.uname()[4].startswith("arm64")): # ARM64 / AARCH64 processor
-                    apm_exe = os.path.join(dirname,'bin','apm_aarch64')
-                elif (os.uname()[4].startswith("arm") or os.uname()[4].startswith("aarch")): # ARM / AARCH processor 32-bit
-                    apm_exe = os.path.join(dirname,'bin','apm_arm')
-                elif "Microsoft" in os.uname().release or "WSL" in os.uname().release:
-                    apm_exe = os.path.join(dirname,'bin','apm.exe') # WSL is able to run win32 binaries
-                else: # Other Linux
-                    apm_exe = os.path.join(dirname,'bin','apm')
-            else:
-                platform = 0
-                raise Exception('Platform '+sys.platform+' not supported for local solve, set remote=True')
 
-            app = subprocess.Popen([apm_exe, self._model_name], stdout=subprocess.PIPE, \
-                                   stderr=subprocess.PIPE, cwd = self._path, bufsize=4096, \
-                                   env = penv, universal_newlines=True, shell=sselect)
-
-            if debug<=1:
-                if ver == 2:  # Python 2 doesn't have timeout
-                    outs, errs = app.communicate()
-                else:  # Python 3+
-                    # limit max time to 1e6
-                    max_time = min(1e6,self.options.max_time)
-                    try:
-                        outs, errs = app.communicate(timeout=max_time)
-                    except subprocess.TimeoutExpired:
-                        app.kill()
-                        outs, errs = app.communicate()
-                        raise Exception('Time Limit Exceeded: ' + str(max_time))
-                if '@error' in outs:
-                    i = outs.find('@error')
-                    apm_error = outs[i:]
-                    record_error = True
-            else:
-                # blocking if buffer fills up, use app.communicate instead
-                for line in iter(app.stdout.readline, ""):
-                    if disp == True:
+            if self._persistent:
+                errs = ''
+                # reuse the solver process of the last solve if it is still running
+                worker = self._worker
+                if worker is None or worker.apm_exe != apm_exe or worker.path != self._path:
+                    if worker is not None:
+                        worker.close()
+                    worker = GKWorker(apm_exe, self._model_name, self._path, env=penv, shell=sselect)
+                    self._worker = worker
+                    #stop the process when the model is garbage collected
+                    if self._stop_worker is not None:
+                        self._stop_worker.detach()
+                    self._stop_worker = weakref.finalize(self, worker.close)
+                # limit max time to 1e6
+                max_time = min(1e6,self.options.max_time)
+                if debug<=1 or disp != True:
+                    outs = worker.solve(timeout=max_time)
+                    log = outs
+                else:
+                    # display the output as it arrives
+                    def display(line):
                         try:
                             print(line.replace('\n', ''))
                         except:
                             pass
-                    # Start recording output if error is detected
-                    if '@error' in line:
+                    log = worker.solve(timeout=max_time, line_callback=display)
+                    outs = ''
+                if '@error' in log:
+                    i = log.find('@error')
+                    apm_error = log[i:]
+                    record_error = True
+            else:
+                app = subprocess.Popen([apm_exe, self._model_name], stdout=subprocess.PIPE, \
+                                       stderr=subprocess.PIPE, cwd = self._path, bufsize=4096, \
+                                       env = penv, universal_newlines=True, shell=sselect)
+
+                if debug<=1:
+                    if ver == 2:  # Python 2 doesn't have timeout
+                        outs, errs = app.communicate()
+                    else:  # Python 3+
+                        # limit max time to 1e6
+                        max_time = min(1e6,self.options.max_time)
+                        try:
+                            outs, errs = app.communicate(timeout=max_time)
+                        except subprocess.TimeoutExpired:
+                            app.kill()
+                            outs, errs = app.communicate()
+                            raise Exception('Time Limit Exceeded: ' + str(max_time))
+                    if '@error' in outs:
+                        i = outs.find('@error')
+                        apm_error = outs[i:]
                         record_error = True
-                    if record_error:
-                        apm_error+=line
-                    app.wait()
-                outs, errs = app.communicate()
+                else:
+                    # blocking if buffer fills up, use app.communicate instead
+                    for line in iter(app.stdout.readline, ""):
+                        if disp == True:
+                            try:
+                                print(line.replace('\n', ''))
+                            except:
+                                pass
+                        # Start recording output if error is detected
+                        if '@error' in line:
+                            record_error = True
+                        if record_error:
+                            apm_error+=line
+                        app.wait()
+                    outs, errs = app.communicate()
 
-            if timing == True:
-                print('solve', time.time() - t)
             if disp == True:
                 print(outs)
             if errs:
@@ -2299,35 +2304,40 @@ class GEKKO(object):
                         file = f.read()
                     cmd(self._server, self._model_name, extension+' '+file)
 
-            #clear .apm, .csv, measurements.dbs files already on the server
-            cmd(self._server,self._model_name,'clear apm')
+            def send_model():
+                #clear .apm file already on the server and send the model
+                cmd(self._server,self._model_name,'clear apm')
+                cmd(self._server, self._model_name, model)
+
+            def send_dbs():
+                with open(os.path.join(self._path,'measurements.dbs')) as f:
+                    dbs = f.read()
+                # write to measurements.dbs (meas) instead of overrides.dbs (option)
+                cmd(self._server, self._model_name, 'meas '+dbs)
+
+            #clear .csv, measurements.dbs files already on the server
             cmd(self._server,self._model_name,'clear csv')
             cmd(self._server,self._model_name,'clear meas')
 
-            #send model file
-            with open(os.path.join(self._path,self._model_name + '.apm')) as f:
-                model = f.read()
-            cmd(self._server, self._model_name, ' '+model)
+            #the model with the extra files (eg cspline data) is only sent
+            #if it changed since the last solve on this server or the server
+            #no longer has it
+            model = self._remote_model()
+            checksum = (self._server, self._model_name, hashlib.sha1(model.encode('utf-8')).hexdigest())
+            lost = self._remote_checksum is not None and \
+                   not file_exists(self._server, self._model_name, self._model_name + '.apm')
+            if checksum != self._remote_checksum or lost:
+                send_model()
+            self._remote_checksum = None
+            if lost:
+                #the options of the last solve are gone too, send all of them
+                self._generate_dbs_file(changed_only=False)
             #send csv file
             send_if_exists('csv')
             #send info file
             send_if_exists('info')
             #send dbs file
-            with open(os.path.join(self._path,'measurements.dbs')) as f:
-                dbs = f.read()
-            # write to measurements.dbs (meas) instead of overrides.dbs (option)
-            cmd(self._server, self._model_name, 'meas '+dbs)
-            #solver options
-            if self.solver_options:
-                opt_file=self._write_solver_options()
-                cmd(self._server,self._model_name, ' '+opt_file)
-
-            #extra files (eg solver.opt, cspline.data)
-            for f_name in self._extra_files:
-                with open(os.path.join(self._path,f_name)) as f:
-                    extra_filedata = f.read() #read data
-                    extra_filedata = 'File ' + f_name + '\n' + extra_filedata + 'End File \n' #format for appending to apm file
-                cmd(self._server,self._model_name, ' '+extra_filedata)
+            send_dbs()
 
             #solve remotely
             response = cmd(self._server, self._model_name, 'solve', disp, debug)
@@ -2343,56 +2353,145 @@ class GEKKO(object):
                 else:
                     return byte
 
+            result_files = ['results.json','options.json']
+            if self.options.CSV_WRITE >= 1:
+                result_files.append('results.csv')
+                if self.options.CSV_WRITE >1:
+                    result_files.append('results_all.csv')
             try:
-                results = byte2str(get_file(self._server,self._model_name,'results.json'))
-                f = open(os.path.join(self._path,'results.json'), 'w')
-                f.write(str(results))
-                f.close()
-                options = byte2str(get_file(self._server,self._model_name,'options.json'))
-                f = open(os.path.join(self._path,'options.json'), 'w')
-                f.write(str(options))
-                f.close()
-                if self.options.CSV_WRITE >= 1:
-                    results = byte2str(get_file(self._server,self._model_name,'results.csv'))
-                    with open(os.path.join(self._path,'results.csv'), 'w') as f:
-                        f.write(str(results))
-                    if self.options.CSV_WRITE >1:
-                        results_all = byte2str(get_file(self._server,self._model_name,'results_all.csv'))
-                        with open(os.path.join(self._path,'results_all.csv'), 'w') as f:
-                            f.write(str(results_all))
+                #download the result files at the same time
+                for f_name, results in zip(result_files, get_files(self._server,self._model_name,result_files)):
+                    with open(os.path.join(self._path,f_name), 'w') as f:
+                        f.write(str(byte2str(results)))
+                #the server has the model, skip sending it while unchanged
+                self._remote_checksum = checksum
             except:
                 raise ImportError('No solution or server unreachable.\n'+\
                                   '  Show errors with m.solve(disp=True).\n'+\
                                   '  Try local solve with m=GEKKO(remote=False).')
 
-        if timing == True:
-            print('solve', time.time() - t)
-
-        if timing == True:
-            t = time.time()
-        self._sanitize_results_json()
-        if timing == True:
-            print('load results', time.time() - t)
-
-        if timing == True:
-            t = time.time()
-        self.load_results()
-        if timing == True:
-            print('load results', time.time() - t)
-
-        if timing == True:
-            t = time.time()
-        self.load_JSON()
-        if timing == True:
-            print('load JSON', time.time() - t)
-
-        if timing == True:
-            t = time.time()
+        self.profile.end(solve_phase)
+
+        self._load_solution(debug, GUI, load, arrays)
+        self.profile.finish(self.options)
+
+    def _remote_model(self):
+        '''Model file with the solver options and the extra files (eg
+        cspline.csv) appended as File sections to send in one request'''
+        model = [self._read_file(self._model_name + '.apm')]
+        if self.solver_options:
+            model.append(self._write_solver_options())
+        for f_name in self._extra_files:
+            #format for appending to apm file
+            text = self._files.read(f_name) if f_name in self._files else self._read_file(f_name)
+            model.append('File ' + f_name + '\n' + text + 'End File \n')
+        return ''.join(' '+part if part.endswith('\n') else ' '+part+'\n' for part in model)
+
+    def _add_file(self, f_name, text):
+        '''Add a data file of an object (eg cspline.csv), it is kept in
+        memory and written to the model folder before a local solve'''
+        self._files.write(f_name, text)
+        if f_name not in self._extra_files:
+            #add file to list of extra file to send to server
+            self._extra_files.append(f_name)
+
+    def _read_file(self, f_name):
+        '''Text of a model file, read again only if it was written since the
+        last read (modification time or size changed)'''
+        path = os.path.join(self._path, f_name)
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._file_cache.get(f_name)
+        if cached is None or cached[0] != key:
+            with open(path) as f:
+                cached = (key, f.read())
+            self._file_cache[f_name] = cached
+        return cached[1]
+
+    def _check_options(self):
+        '''Check the model options before a solve'''
+        # check for integer variables or parameters and issue warning if not APOPT solver      
+        has_integer = any(
+            getattr(v, 'integer', False)
+            for v in (self._variables + self._parameters)
+        )
+        if has_integer:
+            solver = self.options.SOLVER
+            supports_mip = (solver == 1)   
+            if not supports_mip:
+                print("WARNING: Integer variables detected, but the selected solver "
+                      f"(SOLVER={solver})\n"
+                      "         does not support mixed-integer optimization.\n"
+                      "         Integer constraints will be relaxed.\n"
+                      "         Use m.options.SOLVER = 1 (APOPT) for integer enforcement.")
+
+        # allow solver options to be submitted as dictionary
+        if isinstance(self.solver_options, dict):
+            options = []
+            for option in self.solver_options.keys():
+                options.append("%s %s" % (option, self.solver_options[option]))
+            self.solver_options = options
+
+    def _uses_solver_extension(self):
+        '''True if the model is solved with a solver extension instead of APM'''
+        solver_extension_option = self.options.SOLVER_EXTENSION
+        return bool(solver_extension_option) and not (isinstance(solver_extension_option, str) and solver_extension_option.upper() == "GEKKO")
+
+    def _write_files(self, debug=1):
+        '''Write the model, data, option and info files for a solve'''
+        if isinstance(self.options.SOLVER, float):
+            self.options.SOLVER = int(self.options.SOLVER)
+        if isinstance(self.options.SOLVER, str):
+            # allow solver to be specified by string
+            available_solvers = ["ALL", "APOPT", "BPOPT", "IPOPT", "MINOS", "SNOPT"]
+            try:
+                self.options.SOLVER = available_solvers.index(self.options.SOLVER.upper())
+            except:
+                raise ValueError("Solver `%s` not found. If you are trying to use solver extension make sure you set m.options.SOLVER_EXTENSION = True." % self.options.SOLVER)
+
+        # files are only counted by the profiler if they were written
+        path = os.path.join(self._path, self._model_name)
+
+        # Build the model
+        with self.profile.phase('build_model', written=[path+'.apm']):
+            if self._model != 'provided': #no model was provided
+                self._build_model()
+            if not self._remote:
+                #data files of objects, sent from memory in remote solves
+                self._files.materialize(self._path)
+
+        with self.profile.phase('write_csv', written=[path+'.csv']):
+            if self._csv_status != 'provided':
+                self._write_csv()
+
+        with self.profile.phase('write_dbs', written=[os.path.join(self._path,'measurements.dbs')]):
+            self._generate_dbs_file()
+
+        with self.profile.phase('write_solver_options', written=[os.path.join(self._path,f) for f in ('apopt.opt','ipopt.opt')]):
+            self._write_solver_options()
+
+        with self.profile.phase('write_info', written=[path+'.info']):
+            self._write_info()
+
+        if debug >= 3:
+            self.name_check()
+
+    def _load_solution(self, debug=1, GUI=False, load=None, arrays=False):
+        '''Load the results of a solve from the model folder'''
+        with self.profile.phase('load_results', read=[os.path.join(self._path,'results.json')]):
+            self.load_results(load, arrays)
+
+        with self.profile.phase('load_options', read=[os.path.join(self._path,'options.json')]):
+            self.load_JSON(load)
+
+        #the solver keeps the options for the next solve (see _generate_dbs_file)
+        if self.options.APPSTATUS == 1 and self.options.DBS_WRITE != 0:
+            self._dbs_synced = self._dbs_target()
+
         if debug >= 3:
-            self.verify_input_options()
-            self.gk_logic_tree()
-        if timing == True:
-            print('debug', time.time() - t)
+            with self.profile.phase('debug'):
+                self.verify_input_options()
+                self.gk_logic_tree()
 
         if self._gui_open:
             self.gui.update()
@@ -2402,6 +2501,34 @@ class GEKKO(object):
             self.gui = GK_GUI(self._path)
             self.gui.display()
 
+    def _dbs_target(self):
+        '''Where the solver keeps the options of the model'''
+        return (self._server if self._remote else None, self._model_name, self._path)
+
+    def _apm_executable(self):
+        '''Path of the APM executable for a local solve on this platform and
+        whether it needs to be started through the shell (Windows)'''
+        sselect = False
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        if sys.platform=='win32' or sys.platform=='win64': # Windows 32 or 64 bit
+            apm_exe = os.path.join(dirname,'bin','apm.exe')
+            if not ipython:
+                sselect = True  # set shell=False for IPython
+        elif sys.platform=='darwin': # MacOS
+            apm_exe = os.path.join(dirname,'bin','apm_mac')
+        elif sys.platform=='linux' or sys.platform=='linux2': # Linux
+            if (os.uname()[4].startswith("aarch64") or os.uname()[4].startswith("arm64")): # ARM64 / AARCH64 processor
+                apm_exe = os.path.join(dirname,'bin','apm_aarch64')
+            elif (os.uname()[4].startswith("arm") or os.uname()[4].startswith("aarch")): # ARM / AARCH processor 32-bit
+                apm_exe = os.path.join(dirname,'bin','apm_arm')
+            elif "Microsoft" in os.uname().release or "WSL" in os.uname().release:
+                apm_exe = os.path.join(dirname,'bin','apm.exe') # WSL is able to run win32 binaries
+            else: # Other Linux
+                apm_exe = os.path.join(dirname,'bin','apm')
+        else:
+            raise Exception('Platform '+sys.platform+' not supported for local solve, set remote=True')
+        return apm_exe, sselect
+
     #%% Name matching
     def get_names(self):
         """ Matches names of constants, parameters, intermediates and variables
@@ -2411,14 +2538,20 @@ class GEKKO(object):
         import __main__ as main
         main_dict = vars(main)
         for var in main_dict:
-            if isinstance(main_dict[var], GK_Operators):
-                main_dict[var].__dict__['name'] = re.sub(r'\W+', '_', var).lower()
+            if isinstance(main_dict[var], GK_Expression):
+                main_dict[var].name = re.sub(r'\W+', '_', var).lower()
+                print('Found ' + var)
+            elif isinstance(main_dict[var], GK_Operators):
+                object.__setattr__(main_dict[var], 'NAME', re.sub(r'\W+', '_', var).lower())
                 print('Found ' + var)
             if isinstance(main_dict[var], list):
                 list_var = main_dict[var]
                 for i in range(len(list_var)):
-                    if isinstance(list_var[i], GK_Operators):
-                        list_var[i].__dict__['name'] = re.sub(r'\W+', '_', var).lower()+'['+str(i)+']'
+                    if isinstance(list_var[i], GK_Expression):
+                        list_var[i].name = re.sub(r'\W+', '_', var).lower()+'['+str(i)+']'
+                        print('Found ' + var+'['+str(i)+']')
+                    elif isinstance(list_var[i], GK_Operators):
+                        object.__setattr__(list_var[i], 'NAME', re.sub(r'\W+', '_', var).lower()+'['+str(i)+']')
                         print('Found ' + var+'['+str(i)+']')
 
 
@@ -2430,6 +2563,9 @@ class GEKKO(object):
         else:
             opener ="open" if sys.platform == "darwin" else "xdg-open"
             subprocess.call([opener, self._path])
+        #keep the folder after the model is garbage collected
+        if self._remove_folder is not None:
+            self._remove_folder.detach()
 
 
     #%% Remove files and directories that are no longer needed
@@ -2437,12 +2573,26 @@ class GEKKO(object):
     def clear(self):
         '''Clear the gekko files but do not delete the application directory
         '''
+        if self._folder is None:
+            return
         files = glob.glob(os.path.join(self._path,'*'))
         for f in files:
             os.remove(f)
+        #data files of objects and all options are written again at the
+        #next solve
+        self._files.reset()
+        self._dbs_synced = None
     def cleanup(self):
         '''Remove gekko files and the application (temp) directory
         '''
+        if self._worker is not None:
+            # stop the persistent solver process
+            self._stop_worker()
+            self._worker = None
+        if self._folder is None:
+            #the folder was never created
+            return
+        self._dbs_synced = None
         try:
             rmtree(self._path)
         except:
@@ -2450,6 +2600,8 @@ class GEKKO(object):
     def clear_data(self):
         '''Remove the data (csv) file that contains input data
         '''
+        if self._folder is None:
+            return
         #csv file
         try:
             os.remove(os.path.join(self._path,self._model_name+'.csv'))
@@ -2460,25 +2612,7 @@ class GEKKO(object):
         for f in d:
             if f.endswith('.t0') or f.endswith('.dxdt'):
                 os.remove(os.path.join(self._path,f))
-                
-    # check for +Inf / -Inf and replace with NaN
-    def _sanitize_results_json(self):
-        """Replace non-JSON Inf tokens with NaN in results.json so json.load succeeds."""
-        import os
-        path = os.path.join(self._path, 'results.json')
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                s = f.read()
-            # Replace +Inf, -Inf, and Inf (without letters around them) with NaN
-            # so that json.load can parse and values become float('nan') in Python.
-            s2 = re.sub(r'(?<![A-Za-z0-9_])\+?Inf(?![A-Za-z0-9_])', 'NaN', s)
-            s2 = re.sub(r'(?<![A-Za-z0-9_])-Inf(?![A-Za-z0-9_])', 'NaN', s2)
-            if s2 != s:
-                with open(path, 'w', encoding='utf-8') as f:
-                    f.write(s2)
-        except FileNotFoundError:
-            # If results.json isn't there, let upstream logic handle error reporting
-            pass
+
 
     # Functions
     #  abs(x) absolute value |x|
@@ -2501,48 +2635,45 @@ class GEKKO(object):
     #  tanh(x) hyperbolic tangent
     #  sigmoid(x) sigmoid function
     def abs(self,other):
-        return GK_Operators('abs('+str(other) + ')')
+        return GK_Expression(('abs(', other, ')'))
     def acos(self,other):
-        return GK_Operators('acos('+str(other) + ')')
+        return GK_Expression(('acos(', other, ')'))
     def acosh(self,other):
-        z = str(other)
-        return GK_Operators('log('+z+'+sqrt(('+z+')^2-1))')
+        return GK_Expression(('log(', other, '+sqrt((', other, ')^2-1))'))
     def asin(self,other):
-        return GK_Operators('asin('+str(other) + ')')
+        return GK_Expression(('asin(', other, ')'))
     def asinh(self,other):
-        z = str(other)
-        return GK_Operators('log('+z+'+sqrt(('+z+')^2+1))')
+        return GK_Expression(('log(', other, '+sqrt((', other, ')^2+1))'))
     def atan(self,other):
-        return GK_Operators('atan('+str(other) + ')')
+        return GK_Expression(('atan(', other, ')'))
     def atanh(self,other):
-        z = str(other)
-        return GK_Operators('0.5*log((1+'+z+')/(1-'+z+'))')
+        return GK_Expression(('0.5*log((1+', other, ')/(1-', other, '))'))
     def cos(self,other):
-        return GK_Operators('cos(' + str(other) + ')')
+        return GK_Expression(('cos(', other, ')'))
     def cosh(self,other):
-        return GK_Operators('cosh(' + str(other) + ')')
+        return GK_Expression(('cosh(', other, ')'))
     def erf(self,other):
-        return GK_Operators('erf('+str(other) + ')')
+        return GK_Expression(('erf(', other, ')'))
     def erfc(self,other):
-        return GK_Operators('erfc('+str(other) + ')')
+        return GK_Expression(('erfc(', other, ')'))
     def exp(self,other):
-        return GK_Operators('exp(' + str(other) + ')')
+        return GK_Expression(('exp(', other, ')'))
     def log(self,other):
-        return GK_Operators('log('+str(other) + ')')
+        return GK_Expression(('log(', other, ')'))
     def log10(self,other):
-        return GK_Operators('log10('+str(other) + ')')
+        return GK_Expression(('log10(', other, ')'))
     def sin(self,other):
-        return GK_Operators('sin(' + str(other) + ')')
+        return GK_Expression(('sin(', other, ')'))
     def sinh(self,other):
-        return GK_Operators('sinh(' + str(other) + ')')
+        return GK_Expression(('sinh(', other, ')'))
     def sqrt(self,other):
-        return GK_Operators('sqrt('+str(other) + ')')
+        return GK_Expression(('sqrt(', other, ')'))
     def tan(self,other):
-        return GK_Operators('tan(' + str(other) + ')')
+        return GK_Expression(('tan(', other, ')'))
     def tanh(self,other):
-        return GK_Operators('tanh(' + str(other) + ')')
+        return GK_Expression(('tanh(', other, ')'))
     def sigmoid(self,other):
-        return GK_Operators('sigmd(' + str(other) + ')')
+        return GK_Expression(('sigmd(', other, ')'))
 
     def GUI(self):
         if not self._gui_open:
@@ -0,0 +1,514 @@
+# -*- coding: utf-8 -*-
+"""Arrays of variables stored in NumPy arrays (m.VarArray).
+
+    x = m.VarArray(1000, lb=0, ub=10, value=1)
+    m.Equations([x[i] + x[i+1] >= 1 for i in range(999)])
+    m.solve()
+    x.value        # NumPy array of the results
+
+m.Array(m.Var, n) creates n GKVariable objects. A GKVarArray is one object
+that keeps the values, bounds and options of all elements in NumPy arrays.
+The elements are declared as x[1] to x[n] (flattened in C order) in the
+.apm file, consecutive elements with the same value and bounds on one line
+(x[1:n] = 1, <= 10, >= 0). x[i] creates the element for equations only
+when it is used.
+
+Assign x.value (or an option) to register a change. After a solve the
+values are the results and changing them in place (x.value[2:5] = 0) is not
+written to the model files, use x.value = v instead. x.value may also have
+a last axis with a value for every time point of a dynamic model; those
+values are written to the data (.csv) file.
+"""
+import numpy as np
+
+from .gk_operators import GK_ArrayOperand, GK_Expression, GK_Operators
+from .gk_variable import GK_Derivative
+from .properties import variable_options, parameter_options
+
+# options of each type, FV and MV arrays are declared as parameters
+_type_options = dict(variable_options)
+_type_options.update(FV=parameter_options['FV'], MV=parameter_options['MV'])
+# options that are not written to measurements.dbs for arrays: the value and
+# bounds are in the declarations
+_not_options = ('VALUE', 'LOWER', 'UPPER')
+# outputs that are lists for each element
+_not_loaded = ('PRED', 'DPRED')
+
+
+class GK_ArrayElement(GK_Operators):
+    """Element of a GKVarArray that is used in equations"""
+    __slots__ = ('_array', '_index')
+
+    def __init__(self, array, index):
+        self.NAME = array.name + '[' + str(index + 1) + ']'
+        self._array = array
+        self._index = index
+
+    @property
+    def value(self):
+        return self._array._value[self._index]
+
+    @property
+    def dt(self):
+        return GK_Derivative('$' + self.name)
+
+
+def _text(v):
+    ''' Number as text, integer values without decimals '''
+    v = float(v)
+    return str(int(v)) if v.is_integer() else repr(v)
+
+
+#%% Array expressions
+
+def _operand(v):
+    ''' Text of an operand: an object array with the text of each element
+    (a str for scalars) and the text in APM array syntax (x[1:n]) or None
+    if the operand is not a range of an array '''
+    if isinstance(v, GK_ArrayOperand):
+        return v._rows, v._template
+    if isinstance(v, (list, tuple, np.ndarray)):
+        a = np.asarray(v)
+        if a.ndim > 0:
+            if a.dtype == object:
+                # e.g. m.Array of variables
+                items = [str(x) for x in a.ravel().tolist()]
+            else:
+                items = list(map(str, a.ravel().tolist()))
+            return np.array(items, dtype=object).reshape(a.shape), None
+        v = a.tolist()
+    # variables, parameters, expressions and numbers, the text of a scalar
+    # expression is written once and shared by all elements
+    text = str(v)
+    return text, text
+
+
+def _binary(a, b, left, mid, right):
+    ''' Element-wise operation, the text of all elements is built with NumPy
+    broadcasting in one pass '''
+    rows_a, template_a = _operand(a)
+    rows_b, template_b = _operand(b)
+    rows = left + rows_a + mid + rows_b + right
+    template = None
+    if template_a is not None and template_b is not None:
+        template = left + template_a + mid + template_b + right
+    return GK_ArrayExpression(rows, template)
+
+
+def _values(v):
+    ''' Value of each element of an operand that is a constant number (NaN
+    for the others) or None if no element is constant '''
+    if isinstance(v, GK_ArrayExpression):
+        return v._values
+    if isinstance(v, (GK_ArrayOperand, GK_Operators, str)):
+        return None
+    try:
+        return np.asarray(v, dtype=float)
+    except (TypeError, ValueError):
+        return None
+
+
+_compare = {'<': np.less, '<=': np.less_equal, '>': np.greater,
+            '>=': np.greater_equal, '=': np.equal}
+
+def _comparison(a, b, op):
+    ''' Equations of a comparison. Elements without variables on either side
+    (all-zero rows of A @ x) are left out if they hold, they are not
+    equations of the model, and raise a ValueError if they can't hold '''
+    result = _binary(a, b, '', op, '')
+    values_a = _values(a)
+    values_b = _values(b)
+    if values_a is None or values_b is None:
+        return result
+    values_a, values_b = np.broadcast_arrays(values_a, values_b)
+    constant = ~np.isnan(values_a) & ~np.isnan(values_b)
+    if not constant.any():
+        return result
+    rows = np.broadcast_to(result._rows, constant.shape)
+    holds = _compare[op](values_a[constant], values_b[constant])
+    if not holds.all():
+        raise ValueError('equation without variables can not hold: ' +
+                         rows[constant][~holds][0])
+    return GK_ArrayExpression(rows[~constant])
+
+
+def _unary(a, left, right):
+    rows, template = _operand(a)
+    return GK_ArrayExpression(left + rows + right,
+                              None if template is None else left + template + right)
+
+
+def _matmul(A, x):
+    ''' Rows of the matrix product A @ x, zero coefficients are skipped '''
+    rows, _ = _operand(x)
+    if not isinstance(rows, np.ndarray) or rows.ndim != 1:
+        raise ValueError('matrix products need a 1-D array of variables or expressions')
+    A = np.asarray(A)
+    vector = A.ndim == 1
+    A = np.atleast_2d(A)
+    if A.ndim != 2 or A.shape[1] != rows.size:
+        raise ValueError('matrix with shape ' + str(A.shape) + ' does not match ' +
+                         str(rows.size) + ' elements')
+    i, j = np.nonzero(A)
+    coefficients = A[i, j]
+    x = rows[j]
+    terms = '((' + np.array(list(map(str, coefficients.tolist())), dtype=object) + ')*(' + x + '))'
+    one = coefficients == 1
+    terms[one] = x[one]
+    minus = coefficients == -1
+    terms[minus] = '(-' + x[minus] + ')'
+    groups = np.split(terms, np.cumsum(np.bincount(i, minlength=A.shape[0]))[:-1])
+    text = np.array(['(' + '+'.join(g) + ')' if len(g) > 1 else (g[0] if len(g) else '0')
+                     for g in groups], dtype=object)
+    if vector:
+        return GK_Expression((text[0],))
+    # rows of zeros are the number 0
+    values = np.where(A.any(axis=1), np.nan, 0.0)
+    return GK_ArrayExpression(text, values=values if not np.isnan(values).all() else None)
+
+
+class _ArrayOperators(GK_ArrayOperand):
+    """Operators of arrays that return an array expression with the text of
+    each element, written as with the operators of GK_Operators"""
+
+    #comparisons
+    def __lt__(self,other):
+        return _comparison(self, other, '<')
+    def __le__(self,other):
+        return _comparison(self, other, '<=')
+    def __gt__(self,other):
+        return _comparison(self, other, '>')
+    def __ge__(self,other):
+        return _comparison(self, other, '>=')
+    def __eq__(self,other):
+        return _comparison(self, other, '=')
+    __hash__ = None
+    #math operators
+    def __add__(self,other):
+        return _binary(self, other, '(', '+', ')')
+    def __sub__(self,other):
+        return _binary(self, other, '(', '-', ')')
+    def __pow__(self,other):
+        return _binary(self, other, '((', ')^(', '))')
+    def __truediv__(self,other):
+        return _binary(self, other, '((', ')/(', '))')
+    def __mul__(self,other):
+        return _binary(self, other, '((', ')*(', '))')
+    def __neg__(self):
+        return _unary(self, '(-', ')')
+    def __abs__(self):
+        return _unary(self, 'abs(', ')')
+    #reverse math
+    def __radd__(self,other):
+        return _binary(other, self, '(', '+', ')')
+    def __rsub__(self,other):
+        return _binary(other, self, '(', '-', ')')
+    def __rpow__(self,other):
+        return _binary(other, self, '(', '^', ')')
+    def __rtruediv__(self,other):
+        return _binary(other, self, '(', '/', ')')
+    def __rmul__(self,other):
+        return _binary(other, self, '((', ')*(', '))')
+    #matrix products with NumPy arrays
+    def __matmul__(self,other):
+        return _matmul(np.transpose(other), self)
+    def __rmatmul__(self,other):
+        return _matmul(other, self)
+
+    def sum(self):
+        '''Sum of all elements as one expression'''
+        return GK_Expression(('(' + '+'.join(self._rows.ravel().tolist()) + ')',))
+
+
+class GK_ArrayExpression(_ArrayOperators):
+    """Array of expressions built by the operators of variable arrays, one
+    equation per element with m.Equations"""
+
+    def __init__(self, rows, template=None, values=None):
+        self._rows = rows
+        self._template = template
+        # value of the elements that are a number (NaN for the others)
+        self._values = values
+
+    @property
+    def shape(self):
+        return self._rows.shape
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, key):
+        rows = self._rows[key]
+        if isinstance(rows, np.ndarray):
+            return GK_ArrayExpression(rows, values=None if self._values is None else self._values[key])
+        return GK_Expression((rows,))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return str(self._rows)
+
+
+class GKVarArray(_ArrayOperators):
+    """Array of variables with the values, bounds and options of all
+    elements in NumPy arrays"""
+
+    def __init__(self, name, shape, value=None, lb=None, ub=None, integer=False, type=None):
+        if type not in _type_options:
+            raise ValueError('type must be None, SV, CV, FV or MV, not ' + repr(type))
+        shape = tuple(int(n) for n in np.atleast_1d(shape))
+        if not shape or min(shape) < 1:
+            raise ValueError('shape must have at least one element in each dimension')
+        if integer == True:
+            name = 'int_' + name
+        d = self.__dict__
+        d['name'] = name
+        d['shape'] = shape
+        d['size'] = int(np.prod(shape))
+        d['type'] = type
+        d['integer'] = bool(integer)
+        d['_value'] = np.zeros(self.size)
+        d['_lower'] = np.full(self.size, np.nan)
+        d['_upper'] = np.full(self.size, np.nan)
+        d['_options'] = dict((o, np.full(self.size, np.nan)) for o in
+                             _type_options[type]['inputs'] + _type_options[type]['inout']
+                             if o not in _not_options)
+        d['_outputs'] = dict((o, np.full(self.size, np.nan)) for o in
+                             _type_options[type]['outputs']
+                             if o not in _not_loaded)
+        # values to write to the data (.csv) file
+        d['_change'] = False
+        # values are results of the last solve, the declarations have no value
+        d['_results'] = False
+        d['_index'] = None
+        # options of the last measurements.dbs file
+        d['_dbs_options'] = None
+        if value is not None:
+            self.value = value
+        self.LOWER = lb
+        self.UPPER = ub
+        # CV defaults as in GK_CV
+        for o, default in (('FDELAY', 0), ('TR_INIT', 0)):
+            if o in self._options:
+                self._options[o][:] = default
+
+    #%% Values and options
+    def _flat(self, value, name):
+        ''' Value for each element (None is NaN) '''
+        if value is None:
+            return np.full(self.size, np.nan)
+        value = np.asarray(value, dtype=float)
+        try:
+            return np.broadcast_to(value, self.shape).reshape(self.size).copy()
+        except ValueError:
+            raise ValueError(name + ' with shape ' + str(value.shape) +
+                             ' does not match the array shape ' + str(self.shape))
+
+    def _view(self, values):
+        return values.reshape(self.shape + values.shape[1:])
+
+    @property
+    def value(self):
+        '''Values as a NumPy array with the shape of the array (and a last
+        axis for the time points if the values change with time)'''
+        return self._view(self._value)
+
+    @value.setter
+    def value(self, value):
+        if type(value).__name__ == 'Series':
+            value = value.values
+        value = np.asarray(value, dtype=float)
+        if value.ndim == len(self.shape) + 1 and value.shape[:-1] == self.shape:
+            # a value for each time point
+            value = value.reshape(self.size, value.shape[-1]).copy()
+        else:
+            value = self._flat(value, 'VALUE')
+        self.__dict__['_value'] = value
+        self.__dict__['_change'] = True
+        self.__dict__['_results'] = False
+
+    def __getattr__(self, name):
+        #case insensitive options like GKVariable
+        o = name.upper()
+        if o == 'VALUE':
+            return self.value
+        if o in ('LOWER', 'LB'):
+            return self._view(self._lower)
+        if o in ('UPPER', 'UB'):
+            return self._view(self._upper)
+        d = self.__dict__
+        if '_options' in d and o in d['_options']:
+            return self._view(d['_options'][o])
+        if '_outputs' in d and o in d['_outputs']:
+            return self._view(d['_outputs'][o])
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        o = name.upper()
+        if o == 'VALUE':
+            GKVarArray.value.fset(self, value)
+        elif o in ('LOWER', 'LB'):
+            self.__dict__['_lower'] = self._flat(value, o)
+        elif o in ('UPPER', 'UB'):
+            self.__dict__['_upper'] = self._flat(value, o)
+        elif o in self._options:
+            self._options[o] = self._flat(value, o)
+        elif o in self._outputs:
+            raise AttributeError(o + " is an output property")
+        else:
+            raise AttributeError(o + " is not a property of this variable array")
+
+    #%% Elements
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        if self._index is None:
+            self.__dict__['_index'] = np.arange(self.size).reshape(self.shape)
+        index = self._index[key]
+        if np.ndim(index) == 0:
+            return GK_ArrayElement(self, int(index))
+        # slices are array expressions of the elements
+        template = None
+        if index.ndim == 1 and index.size and np.all(np.diff(index) == 1):
+            template = self._range(index[0], index[-1])
+        return GK_ArrayExpression(self._rows[key], template)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return str(self.value)
+
+    def names(self):
+        '''Names of the elements in the model'''
+        return self._names().tolist()
+
+    def _names(self):
+        if '_name_rows' not in self.__dict__:
+            self.__dict__['_name_rows'] = np.array(
+                [self.name + '[' + str(i) + ']' for i in range(1, self.size + 1)], dtype=object)
+        return self.__dict__['_name_rows']
+
+    @property
+    def _rows(self):
+        return self._names().reshape(self.shape)
+
+    @property
+    def _template(self):
+        return self._range(0, self.size - 1)
+
+    def _range(self, first, last):
+        ''' Elements first to last (0-based) in APM array syntax '''
+        if first == last:
+            return '%s[%d]' % (self.name, first + 1)
+        return '%s[%d:%d]' % (self.name, first + 1, last + 1)
+
+    def dt(self):
+        '''Time derivative of each element'''
+        return _unary(self, '$', '')
+
+    #%% Model files
+    def _declared(self):
+        ''' Values written in the declarations (NaN for none) '''
+        if self._value.ndim == 1 and not self._results:
+            return self._value
+        return np.full(self.size, np.nan)
+
+    def _fingerprint(self):
+        return (self.name, self.type, self._declared().tobytes(),
+                self._lower.tobytes(), self._upper.tobytes())
+
+    def _declarations(self):
+        ''' Lines of the Variables (Parameters for FV and MV) section, one
+        line for each run of elements with the same value and bounds '''
+        table = np.column_stack((self._declared(), self._upper, self._lower))
+        nan = np.isnan(table)
+        same = ((table[1:] == table[:-1]) | (nan[1:] & nan[:-1])).all(axis=1)
+        starts = np.flatnonzero(np.concatenate(([True], ~same)))
+        ends = np.append(starts[1:], self.size)
+        lines = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end - start == 1:
+                line = '\t%s[%d]' % (self.name, start + 1)
+            else:
+                line = '\t%s[%d:%d]' % (self.name, start + 1, end)
+            parts = []
+            value, upper, lower = table[start]
+            if not np.isnan(value):
+                line += ' = ' + _text(value)
+            if not np.isnan(upper):
+                parts.append('<= ' + _text(upper))
+            if not np.isnan(lower):
+                parts.append('>= ' + _text(lower))
+            if parts:
+                line += (', ' if not np.isnan(value) else '') + ', '.join(parts)
+            lines.append(line + '\n')
+        return lines
+
+    def _csv_pending(self):
+        ''' Values that are not in the declarations have changed '''
+        return self._change and (self._value.ndim == 2 or self._results)
+
+    def _csv_columns(self, length):
+        ''' Names and text of the data (.csv) columns of the elements '''
+        value = self._value
+        if value.ndim == 1:
+            value = np.repeat(value[:, None], length, axis=1)
+        elif value.shape[1] == 1:
+            value = np.repeat(value, length, axis=1)
+        elif value.shape[1] != length:
+            raise Exception('Data arrays must have the same length, and match time discretization in dynamic problems')
+        self.__dict__['_change'] = False
+        if self.integer:
+            columns = [list(map(str, row)) for row in value.astype(np.int64).tolist()]
+        else:
+            columns = [list(map(repr, row)) for row in value.tolist()]
+        return self.names(), columns
+
+    def _dbs_lines(self, changed_only=False):
+        ''' Options of the elements for measurements.dbs, only the options
+        that changed since the last file if changed_only. Measurements
+        (MEAS) are used by one solve and always written. '''
+        lines = []
+        written = self._dbs_options if changed_only else None
+        for o, values in self._options.items():
+            write = ~np.isnan(values)
+            if written is not None and o != 'MEAS':
+                write &= values != written[o]
+            for i in np.flatnonzero(write).tolist():
+                lines.append('%s[%d].%s = %s\n' % (self.name, i + 1, o, _text(values[i])))
+        self.__dict__['_dbs_options'] = dict((o, values.copy()) for o, values in self._options.items())
+        return lines
+
+    def _load_results(self, data):
+        ''' Values of the elements from results.json '''
+        names = self.names()
+        missing = [n for n in names if n not in data]
+        if missing:
+            print(self.name + " not found in results file")
+            return
+        value = np.array([data[n] for n in names], dtype=float)
+        if value.ndim == 2 and value.shape[1] == 1:
+            value = value[:, 0]
+        self.__dict__['_value'] = value
+        self.__dict__['_change'] = False
+        self.__dict__['_results'] = True
+
+    def _load_options(self, data):
+        ''' Output options of the elements from options.json '''
+        names = self.names()
+        if any(n not in data for n in names):
+            return
+        for o in list(self._outputs) + [o for o in _type_options[self.type]['inout'] if o not in _not_options]:
+            values = np.array([data[n][o] for n in names], dtype=float)
+            if o in self._outputs:
+                self._outputs[o] = values
+            else:
+                self._options[o] = values
+                # the solver has these values already
+                if self._dbs_options is not None:
+                    self._dbs_options[o] = values.copy()
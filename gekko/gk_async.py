@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Solve without blocking an asyncio event loop.
+
+    await m.solve_async(disp=False)
+
+    async for line in m.solve_stream():
+        log.info(line.rstrip())
+
+A local solve runs the APM executable with asyncio.create_subprocess_exec and
+the results are loaded into the model when the solver is done. Cancelling
+the task (or leaving the async for loop early) kills the solver process.
+asyncio is imported by the functions so that `import gekko` doesn't load it.
+"""
+import functools
+
+
+async def solve_stream(self, debug=1, GUI=False):
+    """Local solve that yields the output lines of the solver as they arrive.
+
+    The results are loaded into the model when the iteration is complete.
+    The solver is killed when the generator is closed early: right away with
+    `await stream.aclose()`, otherwise when the event loop finalizes it.
+    Only for GEKKO(remote=False) without a solver extension, use solve_async
+    otherwise.
+    """
+    import asyncio
+    if self._remote or self._uses_solver_extension():
+        raise ValueError('solve_stream runs the local APM executable, '
+                         'use solve_async for remote solves or solver extensions')
+    self._check_options()
+    self._write_files(debug)
+
+    # no shell needed with an argument list, also for apm.exe on Windows
+    apm_exe = self._apm_executable()[0]
+    process = await asyncio.create_subprocess_exec(apm_exe, self._model_name, \
+                                                   stdout=asyncio.subprocess.PIPE, \
+                                                   stderr=asyncio.subprocess.STDOUT, \
+                                                   cwd=self._path, env={"PATH" : self._path})
+    # limit max time to 1e6
+    max_time = min(1e6, self.options.max_time)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_time
+    record_error = False
+    apm_error = ''
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), \
+                                              max(0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                raise Exception('Time Limit Exceeded: ' + str(max_time))
+            if not line:
+                break
+            line = line.decode(errors='replace').replace('\r\n', '\n')
+            # Start recording output if error is detected
+            if '@error' in line:
+                record_error = True
+            if record_error:
+                apm_error += line
+            yield line
+        await process.wait()
+    finally:
+        if process.returncode is None:
+            # cancelled, timed out or the caller stopped iterating
+            try:
+                process.kill()
+            except ProcessLookupError:
+                # exited since the check
+                pass
+            await process.wait()
+
+    if (debug >= 1) and record_error:
+        raise Exception(apm_error)
+    self._load_solution(debug, GUI)
+
+
+async def solve_async(self, disp=True, debug=1, GUI=False):
+    """Awaitable version of solve().
+
+    A local solve streams the solver output (printed if disp is True) and
+    the solver is killed if the task is cancelled. Remote solves and solver
+    extensions are run with solve() in the default executor of the loop so
+    that they don't block it; those can't be interrupted once started.
+    """
+    import asyncio
+    if self._remote or self._uses_solver_extension():
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(self.solve, disp=disp, debug=debug, GUI=GUI))
+        return
+
+    async for line in self.solve_stream(debug, GUI):
+        if disp == True:
+            try:
+                print(line.replace('\n', ''))
+            except:
+                pass
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Solve many independent GEKKO models at the same time.
+
+    from gekko import GEKKO, solve_many
+    models = [build(k) for k in K]
+    status = solve_many(models, workers=8)
+
+Each model keeps its own folder, so the solves do not share any files. The
+results are loaded back into each model as with m.solve() and one status
+dictionary per model is returned in the order of the models:
+
+    {'model': m, 'status': 'success' or 'error', 'error': None or message,
+     'appstatus': m.options.APPSTATUS, 'time': seconds for the whole solve}
+
+An error in one model (for example an infeasible problem with debug>=1) is
+reported in its status and does not stop the other solves.
+"""
+import os
+import subprocess
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+BACKENDS = ('thread', 'process')
+
+
+def solve_many(models, workers=None, backend='thread', disp=False, debug=1):
+    """Solve a list of independent models with at most `workers` solves
+    running at the same time (default is the number of processors).
+
+    backend = 'thread'  each model is solved with m.solve() on a pool of
+                        threads. The solver executable runs in its own process
+                        so the threads mostly wait on the solver or (for
+                        remote=True) on the server. Works for every model.
+              'process' the model files are written in this process, then the
+                        APM executables are run as child processes without
+                        a thread for each model and the results are loaded
+                        as each solve finishes. Only for local models
+                        (GEKKO(remote=False)) without a solver extension.
+    disp, debug = same as for m.solve()
+    """
+    if backend not in BACKENDS:
+        raise ValueError('backend must be one of ' + str(BACKENDS) + ', not ' + repr(backend))
+    models = list(models)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError('workers must be at least 1')
+    if not models:
+        return []
+
+    if backend == 'thread':
+        with ThreadPoolExecutor(max_workers=min(workers, len(models))) as pool:
+            return list(pool.map(lambda m: _solve_thread(m, disp, debug), models))
+
+    for m in models:
+        if m._remote or m._uses_solver_extension():
+            raise ValueError("backend='process' only runs the local APM executable, "
+                             "use backend='thread' for remote models or solver extensions")
+    return _solve_processes(models, workers, disp, debug)
+
+
+def _status(m, start, error=None):
+    return {'model': m,
+            'status': 'success' if error is None else 'error',
+            'error': error,
+            'appstatus': m.options.APPSTATUS,
+            'time': time.time() - start}
+
+
+def _solve_thread(m, disp, debug):
+    start = time.time()
+    try:
+        m.solve(disp=disp, debug=debug)
+    except Exception as e:
+        return _status(m, start, str(e))
+    return _status(m, start)
+
+
+class _Run(object):
+    """APM executable running in a model folder without a thread waiting on it"""
+
+    def __init__(self, m, path, disp, debug, start=None):
+        self.model = m
+        self.disp = disp
+        self.debug = debug
+        self.start = time.time() if start is None else start
+        self.error = None
+        apm_exe, sselect = m._apm_executable()
+        # solver output goes to a file, a full pipe would block the solver
+        # while no thread is reading it
+        self.output = tempfile.TemporaryFile(mode='w+')
+        self.process = subprocess.Popen([apm_exe, m._model_name], stdout=self.output, \
+                                        stderr=subprocess.STDOUT, cwd=path, \
+                                        env={"PATH" : path}, shell=sselect)
+        # limit max time to 1e6
+        self.max_time = min(1e6, m.options.max_time)
+        self.deadline = self.start + self.max_time
+
+    def done(self):
+        """True once the solver has finished, self.error is then set if the
+        solve failed or took too long"""
+        if self.process.poll() is None:
+            if time.time() < self.deadline:
+                return False
+            self.kill()
+            self.error = 'Time Limit Exceeded: ' + str(self.max_time)
+            return True
+
+        self.output.seek(0)
+        outs = self.output.read()
+        self.output.close()
+        if self.disp == True:
+            print(outs)
+        if (self.debug >= 1) and ('@error' in outs):
+            self.error = outs[outs.find('@error'):]
+        return True
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.output.close()
+
+
+def _run_all(n, workers, start, finish):
+    """Run n solves with at most workers solver processes at once.
+
+    start(i) writes the files of solve i and returns its _Run (or None if
+    it failed before the solver was started), finish(i, run) is called when
+    the solver of solve i is done.
+    """
+    pending = deque(range(n))
+    running = {}
+    try:
+        while pending or running:
+            while pending and len(running) < workers:
+                i = pending.popleft()
+                run = start(i)
+                if run is not None:
+                    running[i] = run
+            finished = False
+            for i in list(running):
+                if running[i].done():
+                    finish(i, running.pop(i))
+                    finished = True
+            if running and not finished:
+                time.sleep(0.01)
+    finally:
+        # stop the remaining solvers if interrupted
+        for run in running.values():
+            run.kill()
+
+
+def _solve_processes(models, workers, disp, debug):
+    results = [None] * len(models)
+
+    def start(i):
+        m = models[i]
+        t = time.time()
+        try:
+            m._check_options()
+            m._write_files(debug)
+            return _Run(m, m._path, disp, debug, t)
+        except Exception as e:
+            results[i] = _status(m, t, str(e))
+
+    def finish(i, run):
+        m = models[i]
+        if run.error is None:
+            try:
+                m._load_solution(debug)
+            except Exception as e:
+                run.error = str(e)
+        results[i] = _status(m, run.start, run.error)
+
+    _run_all(len(models), workers, start, finish)
+    return results
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""Content-addressed cache of the generated model files, shared by all models.
+
+    from gekko import gk_cache
+    gk_cache.enable()                           # or enable(path, max_size)
+    ...
+    gk_cache.active().hits
+
+The cache is off by default. When it is enabled, the model file (.apm) and
+the data files of objects (cspline, bspline, pwl, axb, qobj, arx and state
+space matrices) are stored once per content under the cache folder, keyed by
+the SHA-256 of their text. A model that writes a file that is already in the
+cache (another instance of the same model, the same spline data, ...) gets a
+hard link to the cached file in its folder instead of writing it again (a
+copy where links are not supported). The model file is streamed to a
+temporary file and hashed while it is written (see stream), it is never held
+in memory.
+
+The least recently used files are removed when the cache is larger than
+max_size bytes. Files of models that are linked to a removed file are not
+affected. The folder can be shared by processes.
+"""
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+MAX_SIZE = 256 * 2**20
+
+
+class GKCache(object):
+    """Folder of files named by the SHA-256 of their text"""
+
+    def __init__(self, path=None, max_size=MAX_SIZE):
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), 'gekko_cache')
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        #bytes in the cache, counted when the first file is stored
+        self._size = None
+        self._lock = threading.Lock()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def place(self, path, text):
+        '''Write text to path from the cache, the text is only written to
+        the cache folder if it is not there yet. Returns the key.'''
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        cached = self._file(key)
+        try:
+            os.utime(cached) # most recently used
+            self.hits += 1
+        except OSError:
+            self.misses += 1
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            tmp = '%s.%d.%d.tmp' % (cached, os.getpid(), threading.get_ident())
+            with open(tmp, 'w') as f:
+                f.write(text)
+            os.replace(tmp, cached)
+            _link(cached, path)
+            self._added(os.path.getsize(path))
+            return key
+        _link(cached, path)
+        return key
+
+    def place_file(self, path, tmp, key):
+        '''Move the file tmp with the text of key to path from the cache,
+        tmp is moved to the cache folder if the key is not there yet'''
+        cached = self._file(key)
+        try:
+            os.utime(cached) # most recently used
+            self.hits += 1
+        except OSError:
+            self.misses += 1
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            part = '%s.%d.%d.tmp' % (cached, os.getpid(), threading.get_ident())
+            try:
+                os.replace(tmp, part)
+            except OSError:
+                # the cache is on another file system
+                shutil.copyfile(tmp, part)
+            os.replace(part, cached)
+            _link(cached, path)
+            self._added(os.path.getsize(path))
+            return key
+        os.remove(tmp)
+        _link(cached, path)
+        return key
+
+    def _entries(self):
+        '''(last use, size, path) of the cached files'''
+        entries = []
+        for folder in os.listdir(self.path):
+            folder = os.path.join(self.path, folder)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue # removed by another process
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        '''Bytes of all cached files'''
+        return sum(e[1] for e in self._entries())
+
+    def _added(self, size):
+        with self._lock:
+            if self._size is None:
+                self._size = self.size()
+            else:
+                self._size += size
+            if self._size > self.max_size:
+                self._size = self.evict()
+
+    def evict(self, max_size=None):
+        '''Remove the least recently used files until the cache is not
+        larger than max_size (default self.max_size), returns the size'''
+        if max_size is None:
+            max_size = self.max_size
+        entries = sorted(self._entries())
+        size = sum(e[1] for e in entries)
+        for _, file_size, path in entries:
+            if size <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= file_size
+        return size
+
+    def clear(self):
+        '''Remove all cached files'''
+        with self._lock:
+            self.evict(0)
+            self._size = 0
+
+    def __repr__(self):
+        return 'GKCache(%r, %d hits, %d misses)' % (self.path, self.hits, self.misses)
+
+
+def _link(cached, path):
+    '''Replace path with a hard link to the cached file (or a copy)'''
+    tmp = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+    try:
+        os.link(cached, tmp)
+    except OSError:
+        shutil.copyfile(cached, tmp)
+    os.replace(tmp, path)
+
+
+#%% Cache of all models
+
+_cache = None
+
+def enable(path=None, max_size=MAX_SIZE):
+    '''Cache the model and object data files of all models in the folder
+    path (default gekko_cache in the temporary folder) of up to max_size
+    bytes. Returns the cache.'''
+    global _cache
+    _cache = GKCache(path, max_size)
+    return _cache
+
+def disable():
+    global _cache
+    _cache = None
+
+def active():
+    '''Cache in use (None if the cache is off)'''
+    return _cache
+
+def write(path, text):
+    '''Write the text of a model file, through the cache if it is enabled'''
+    cache = _cache
+    if cache is not None:
+        try:
+            cache.place(path, text)
+            return
+        except OSError:
+            pass # write the file without the cache
+    unshare(path)
+    with open(path, 'w') as f:
+        f.write(text)
+
+class _Hashed(object):
+    '''Text file that computes the SHA-256 of the text written to it'''
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+    def write(self, text):
+        self.sha.update(text.encode('utf-8'))
+        self.f.write(text)
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+@contextlib.contextmanager
+def stream(path):
+    '''File object to write the text of a model file to path line by line,
+    through the cache if it is enabled. The text is written to a temporary
+    file and hashed at the same time, the file is then linked from the
+    cache (and moved to it if it is new).'''
+    cache = _cache
+    if cache is None:
+        unshare(path)
+        with open(path, 'w') as f:
+            yield f
+        return
+    tmp = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+    try:
+        with open(tmp, 'w') as f:
+            hashed = _Hashed(f)
+            yield hashed
+        try:
+            cache.place_file(path, tmp, hashed.sha.hexdigest())
+        except OSError:
+            # use the file without the cache
+            unshare(path)
+            os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def unshare(path):
+    '''Remove a file that is linked to the cache before it is overwritten,
+    writing to it would change the cached file'''
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+    except OSError:
+        pass
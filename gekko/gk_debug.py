@@ -103,14 +103,14 @@ def verify_input_options(self):
         if vp.type != None: #(FV/MV/SV/CV) not Param or Var
             for o in parameter_options[vp.type]['inputs']:
                 if o not in ['LB','UB']: #TODO: for o in data[vp.name] to avoid this check
-                    if vp.__dict__[o] is not None and not self.like(vp.__dict__[o], data[vp.name][o]):
+                    if getattr(vp, o) is not None and not self.like(getattr(vp, o), data[vp.name][o]):
                         print(str(vp)+'.'+str(o)+" was not written correctly") #give message if they don't match
 
     for vp in self._variables:
         if vp.type != None: #(FV/MV/SV/CV) not Param or Var
             for o in variable_options[vp.type]['inputs']:
                 if o not in ['LB','UB']:
-                    if vp.__dict__[o] is not None and not self.like(vp.__dict__[o], data[vp.name][o]):
+                    if getattr(vp, o) is not None and not self.like(getattr(vp, o), data[vp.name][o]):
                         print(str(vp)+'.'+str(o)+" was not written correctly") #give message if they don't match
                         
 #%% Name Check
@@ -127,7 +127,7 @@ def name_check(self):
                      'max3','min2','min3','sqrt','asin','acos',\
                      'atan','vsum'])
     
-    for x in self._constants+self._parameters+self._variables+self._intermediates+self._objects:
+    for x in self._constants+self._parameters+self._variables+self._arrays+self._intermediates+self._objects:
         #unique names
         if x.name not in all_names:
             all_names.add(x.name)
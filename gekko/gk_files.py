@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Data files of the objects of a model, kept in memory until a solve.
+
+cspline, bspline, pwl, axb, qobj, arx and state_space store the text of
+their data files here when they are created instead of writing them to the
+model folder while the model is built. The files are written to the folder
+(through the model file cache, see gk_cache) before a local solve, remote
+solves send them to the server from memory. A model that is never solved
+doesn't write them at all.
+"""
+import os
+
+from . import gk_cache
+
+
+class GKFiles(object):
+    """Text of files by name that are written to a folder when needed"""
+
+    def __init__(self):
+        self._text = {}
+        #files that are not in the folder yet
+        self._pending = []
+
+    def __contains__(self, name):
+        return name in self._text
+
+    def write(self, name, text):
+        '''Store the text of the file name'''
+        if self._text.get(name) != text and name not in self._pending:
+            self._pending.append(name)
+        self._text[name] = text
+
+    def read(self, name):
+        return self._text[name]
+
+    def materialize(self, path):
+        '''Write the files that are not in the folder path yet'''
+        for name in self._pending:
+            gk_cache.write(os.path.join(path, name), self._text[name])
+        del self._pending[:]
+
+    def reset(self):
+        '''The folder was cleared, write all files again'''
+        self._pending = list(self._text)
@@ -26,6 +26,9 @@ global_options_outputs= ['APPINFO', 'APPINFOCHG', 'APPSTATUS', 'CTRLMODE',
 global_options_inout = ['BAD_CYCLES', 'COLDSTART', 'CTRL_HOR', 'CTRL_TIME', 
 'CYCLECOUNT', 'PRED_HOR', 'PRED_TIME']
 
+# options written to measurements.dbs
+_dbs_options = frozenset(global_options_inputs+global_options_inout)
+
 
 
 class GKGlobalOptions():
@@ -36,6 +39,8 @@ class GKGlobalOptions():
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
         self.__dict__['_initialized'] = False
+        # input options set since the last measurements.dbs file
+        self.__dict__['_changed'] = set()
         
         self._input_option_list = global_options_inputs
         self._output_option_list = global_options_outputs
@@ -112,8 +117,9 @@ class GKGlobalOptions():
         # now allow options to be sent to the server
         self._initialized = True
 
-    def getOverridesString(self):
-        ''' Returns string to go in dbs file
+    def getOverridesString(self, changed_only=False):
+        ''' Returns string to go in dbs file, only the options set since the
+        last call if changed_only (the solver keeps the others)
 
             Example return value:
                 NLC.APPINFO = 0
@@ -121,13 +127,11 @@ class GKGlobalOptions():
                 ...
                 NLC.WEB_REFRESH = 10
         '''
-        result = ''
-
-        for attr, value in self.__dict__.items():
-            # If the attribute is in the list of exceptions, do not print
-            if(attr in global_options_inputs+global_options_inout):
-                result = result + "APM." + attr + " = " + str(value) + "\n"
-
+        changed = self._changed
+        result = ''.join("APM." + attr + " = " + str(value) + "\n"
+                         for attr, value in self.__dict__.items()
+                         if attr in _dbs_options and (not changed_only or attr in changed))
+        changed.clear()
         return result
 
 
@@ -143,8 +147,9 @@ class GKGlobalOptions():
             name = name.upper()
 
             #only allow user to set input or input/output options:
-            if name in global_options_inputs+global_options_inout:
+            if name in _dbs_options:
                 self.__dict__[name] = value
+                self._changed.add(name)
                     
             #don't allow writing to output properties by default
             elif name in global_options_outputs:
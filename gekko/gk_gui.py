@@ -15,6 +15,7 @@ except:
     raise Exception("Install flask to use Gekko GUI with 'pip install flask flask-cors'")
 
 from .gk_operators import GK_Intermediate
+from .gk_post_solve import _read_json
 from .gk_parameter import GKParameter, GK_MV, GK_FV
 from .gk_variable import GKVariable, GK_CV, GK_SV
 
@@ -298,7 +299,7 @@ class FlaskThread(threading.Thread):
             # Load options.json
             self.options = json.loads(open(os.path.join(self.path,'options.json')).read())
             # Load results.json
-            self.results = json.loads(open(os.path.join(self.path,"results.json")).read())
+            self.results = _read_json(os.path.join(self.path,"results.json"))
             self.gekko_data['model'] = self.options['APM']
             self.gekko_data['info'] = self.options['INFO']
             self.gekko_data['time'] = self.results['time']
@@ -410,7 +411,7 @@ class FlaskThread(threading.Thread):
             # Load options.json
             self.options = json.loads(open(os.path.join(self.path,'options.json')).read())
             # Load results.json
-            self.results = json.loads(open(os.path.join(self.path,"results.json")).read())
+            self.results = _read_json(os.path.join(self.path,"results.json"))
         except Exception as e:
             raise e
         # Updates the options_dict
@@ -20,6 +20,7 @@ from time import perf_counter
 from typing import Any, Dict, Iterable, Optional
 
 from .gekko import GEKKO
+from .gk_post_solve import _read_json
 
 RUNS_DIRNAME = ".mcp/runs"
 MODEL_SECTION_HEADERS = {
@@ -93,10 +94,9 @@ def read_text_if_exists(path: Optional[Path]) -> Optional[str]:
 
 
 def load_json_if_exists(path: Optional[Path]) -> Optional[Dict[str, Any]]:
-    text = read_text_if_exists(path)
-    if text is None:
+    if path is None or not path.exists():
         return None
-    return json.loads(text)
+    return _read_json(path)
 
 
 def resolve_workspace_path(
@@ -617,9 +617,10 @@ def _materialize_artifacts(model: GEKKO) -> Dict[str, Any]:
     try:
         if getattr(model, "_model", None) != "provided":
             model._build_model()
+        model._files.materialize(model._path)
         if getattr(model, "_csv_status", None) != "provided":
             model._write_csv()
-        model._generate_dbs_file()
+        model._generate_dbs_file(changed_only=False)
         model._write_solver_options()
         model._write_info()
     except Exception as exc:
@@ -831,9 +832,10 @@ def _materialize(model: GEKKO) -> Dict[str, Any]:
     try:
         if getattr(model, "_model", None) != "provided":
             model._build_model()
+        model._files.materialize(model._path)
         if getattr(model, "_csv_status", None) != "provided":
             model._write_csv()
-        model._generate_dbs_file()
+        model._generate_dbs_file(changed_only=False)
         model._write_solver_options()
         model._write_info()
     except Exception as exc:
@@ -4,9 +4,19 @@ import numpy as np
 strings for the .apm model. Each variable type inherits this class. Operations 
 done on an instance of this class return a new instance to enable chained 
 operations."""
+class GK_ArrayOperand(object):
+    """Base of the variable arrays and array expressions (see gk_array).
+    An operator of a scalar and an array returns NotImplemented so that
+    python calls the reflected operator of the array, which writes the
+    expression of every element. NumPy arrays do the same because of
+    __array_ufunc__ = None."""
+    __array_ufunc__ = None
+
+
 class GK_Operators:
     """"""
     count = 0
+    __slots__ = ('NAME', 'VALUE')
     
     def __init__(self, name, value=None):                
         if name is None:
@@ -28,55 +38,92 @@ class GK_Operators:
     #make attributes case in-sensitive for reading too
     # (this is inherited by variables and paramters)
     def __getattr__(self,name):
-        if name.upper() in self.__dict__:
-            return self.__dict__[name.upper()]
-        elif name.lower() in self.__dict__:
-            return self.__dict__[name.lower()]
-        else: 
-            raise AttributeError(name)
+        for key in (name.upper(), name.lower()):
+            if key != name:
+                try:
+                    return object.__getattribute__(self, key)
+                except AttributeError:
+                    pass
+        raise AttributeError(name)
     #%%Operator overloading for building functions
+    #each operation returns a GK_Expression node that references its operands
+    #rather than copying their text, see GK_Expression below
     #comparisons
     def __lt__(self,other): #less than
-        return GK_Operators(str(self) + '<' + str(other))
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression((self, '<', other))
     def __le__(self,other): #less than or equal to
-        return GK_Operators(str(self) + '<=' + str(other))
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression((self, '<=', other))
     def __gt__(self,other): #greater than
-        return GK_Operators(str(self) + '>' + str(other))
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression((self, '>', other))
     def __ge__(self,other): #greater than or equal to
-        return GK_Operators(str(self) + '>=' + str(other))
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression((self, '>=', other))
     def __eq__(self,other): #equal ==
-        return GK_Operators(str(self) + '=' + str(other))
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression((self, '=', other))
     #math operators
     def __add__(self,other): # +
-        return GK_Operators('(' + str(self) + '+' + str(other) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', self, '+', other, ')'))
     def __sub__(self,other): # -
-        return GK_Operators('(' + str(self) + '-' + str(other) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', self, '-', other, ')'))
     def __pow__(self,other): # **
-        return GK_Operators('((' + str(self) + ')^(' + str(other) + '))')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('((', self, ')^(', other, '))'))
     def __div__(self,other): # /
-        return GK_Operators('((' + str(self) + ')/(' + str(other) + '))')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('((', self, ')/(', other, '))'))
     def __truediv__(self,other): # /
-        return GK_Operators('((' + str(self) + ')/(' + str(other) + '))')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('((', self, ')/(', other, '))'))
     def __mul__(self,other): # *
-        return GK_Operators('((' + str(self) + ')*(' + str(other) + '))')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('((', self, ')*(', other, '))'))
     def __neg__(self): #-x
-        return GK_Operators('(-'+str(self)+')')
+        return GK_Expression(('(-', self, ')'))
     # reverse math    
     def __radd__(self,other): # +
-        return GK_Operators('(' + str(other) + '+' + str(self) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', other, '+', self, ')'))
     def __rsub__(self,other): # -
-        return GK_Operators('(' + str(other) + '-' + str(self) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', other, '-', self, ')'))
     def __rpow__(self,other): # **
-        return GK_Operators('(' + str(other) + '^' + str(self) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', other, '^', self, ')'))
     def __rdiv__(self,other): # /
-        return GK_Operators('(' + str(other) + '/' + str(self) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', other, '/', self, ')'))
     def __rtruediv__(self,other): # /
-        return GK_Operators('(' + str(other) + '/' + str(self) + ')')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('(', other, '/', self, ')'))
     def __rmul__(self,other): # *
-        return GK_Operators('((' + str(other) + ')*(' + str(self) + '))')
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        return GK_Expression(('((', other, ')*(', self, '))'))
     #other
     def __abs__(self):
-        return GK_Operators('abs('+str(self)+')')
+        return GK_Expression(('abs(', self, ')'))
     """
     object.__iadd__(self, other)
     object.__isub__(self, other)
@@ -103,6 +150,150 @@ class GK_Operators:
         return GK_Operators('(' + str(other) + '^' + str(self) + ')')
     """
 
+class GK_Expression(GK_Operators):
+    """Node of the expression graph built by the overloaded operators.
+
+    A node holds a template of literal APM text and operand references, so
+    building an expression with N terms is O(N) instead of copying the whole
+    string on every operation. The text is generated once, on the first call
+    to str() (normally in _build_model), and is byte-identical to the eager
+    string concatenation used previously. Subexpressions that are referenced
+    more than once are serialized once and shared. Constants are nodes with
+    a single name part and a value."""
+    __slots__ = ('_parts', '_text', '_nref', '_value')
+
+    def __init__(self, parts, value=None):
+        args = []
+        for p in parts:
+            if isinstance(p, GK_Expression):
+                if p._text is None:
+                    p._nref += 1
+                args.append(p)
+            elif isinstance(p, GK_Operators):
+                # variables, parameters, intermediates are written by name
+                args.append(p)
+            else:
+                # literal text and numbers are fixed when the node is built
+                args.append(str(p))
+        self._parts = tuple(args)
+        self._text = None
+        self._nref = 0
+        if value is not None:
+            self._value = GK_Value(value)
+        else:
+            self._value = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = _serialize(self)
+            # release the operands once the text is known
+            self._parts = ()
+        return self._text
+    __repr__ = __str__
+
+    #the name of an expression is its text
+    @property
+    def name(self):
+        return str(self)
+    @name.setter
+    def name(self, name):
+        self._text = name
+        self._parts = ()
+    #the value of a constant can be replaced before the model is written
+    @property
+    def value(self):
+        if self._value is None:
+            self._value = GK_Value(None)
+        return self._value
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    #expressions only have a name (their text) and a value
+    def __getattr__(self,name):
+        key = name.upper()
+        if key == 'NAME':
+            return str(self)
+        elif key == 'VALUE':
+            if self._value is None:
+                self._value = GK_Value(None)
+            return self._value
+        else:
+            raise AttributeError(name)
+
+    #comparisons
+    #expressions were plain GK_Operators, so python tried the reflected
+    #comparison of variables, parameters and intermediates first; keep that
+    #operand order so the model text is unchanged
+    def __lt__(self,other): #less than
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        if isinstance(other, GK_Operators) and not isinstance(other, GK_Expression):
+            return other.__gt__(self)
+        return GK_Expression((self, '<', other))
+    def __le__(self,other): #less than or equal to
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        if isinstance(other, GK_Operators) and not isinstance(other, GK_Expression):
+            return other.__ge__(self)
+        return GK_Expression((self, '<=', other))
+    def __gt__(self,other): #greater than
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        if isinstance(other, GK_Operators) and not isinstance(other, GK_Expression):
+            return other.__lt__(self)
+        return GK_Expression((self, '>', other))
+    def __ge__(self,other): #greater than or equal to
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        if isinstance(other, GK_Operators) and not isinstance(other, GK_Expression):
+            return other.__le__(self)
+        return GK_Expression((self, '>=', other))
+    def __eq__(self,other): #equal ==
+        if isinstance(other, GK_ArrayOperand):
+            return NotImplemented
+        if isinstance(other, GK_Operators) and not isinstance(other, GK_Expression):
+            return other.__eq__(self)
+        return GK_Expression((self, '=', other))
+
+
+def _serialize(root):
+    """Write the text of an expression graph without recursion so that deep
+    expressions (such as long python sums) don't hit the recursion limit."""
+    out = []
+    append = out.append
+    stack = [[root, 0, 0]] # node, next part, start of node text in out
+    while stack:
+        frame = stack[-1]
+        node, i, start = frame
+        parts = node._parts
+        n = len(parts)
+        while i < n:
+            p = parts[i]
+            i += 1
+            if p.__class__ is str:
+                append(p)
+            elif isinstance(p, GK_Expression):
+                if p._text is not None:
+                    append(p._text)
+                else:
+                    frame[1] = i
+                    stack.append([p, 0, len(out)])
+                    break
+            else:
+                append(str(p))
+        else:
+            stack.pop()
+            #keep the text of shared subexpressions for the other references
+            if node._nref > 1 and node is not root:
+                text = ''.join(out[start:])
+                del out[start:]
+                node._text = text
+                node._parts = ()
+                append(text)
+    return ''.join(out)
+
+
 class GK_Intermediate(GK_Operators):
     def __init__(self, name, value=None):
         GK_Operators.__init__(self,name, value=None)
@@ -157,15 +348,30 @@ class GK_Value(list):
     
     def __setitem__(self,key,value):
         self.value[key] = value
-        if self.change is False:
-            self.__dict__['change'] = [key]
-        elif isinstance(self.change,list): 
-            self.__dict__['change'].append(key)
-        else:
-            pass
+        change = self.change
+        if change is True:
+            return
+        #changed elements are marked in a boolean mask, slices and index
+        #arrays are marked in one step
+        n = len(self.value)
+        if change is False:
+            change = np.zeros(n, dtype=bool)
+            self.__dict__['change'] = change
+        elif change.size != n:
+            #elements were inserted or removed
+            self.__dict__['change'] = True
+            return
+        try:
+            change[key] = True
+        except (IndexError, TypeError, ValueError):
+            self.__dict__['change'] = True
     
-    def __array__(self):
-        return np.array(self.value)
+    def __array__(self, dtype=None, copy=None):
+        #values stored as NumPy arrays are returned without a copy, lists
+        #and numbers are converted
+        if copy:
+            return np.array(self.value, dtype=dtype)
+        return np.asarray(self.value, dtype=dtype)
 
     def __iter__(self):
         try:
@@ -23,11 +23,23 @@ parameter_options = {'FV':{'inputs':FV_input_options, 'outputs':FV_output_option
                      None:{'inputs':Param_input_options,'outputs':Param_output_options,'inout':Param_inout_options}}
 
 """
-from .properties import parameter_options as options
+from .properties import parameter_options as options, option_defaults, option_slots, settable_options
+
 
 class GKParameter(GK_Operators):
-    """Represents a parameter in a model."""
+    """Represents a parameter in a model.
+
+    The options are slots of the class that are set to their default value
+    (None unless in _defaults) when the object is created. Options are read
+    and set case-insensitively."""
     counter = 1
+    __slots__ = ('_initialized', '_override_csv', '_changed', 'type', 'integer') + option_slots(options, None)
+    #options of the type (FV, MV) of the class
+    _settable = settable_options(options, None)
+    _outputs = frozenset(options[None]['outputs'])
+    _options = _settable | _outputs
+    _defaults = {}
+    _initial = option_defaults(options, None)
 
     def __init__(self, name='', value=None, lb=None, ub=None, integer=False):
         if name == '':
@@ -39,7 +51,12 @@ class GKParameter(GK_Operators):
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
-        self.__dict__['_initialized'] = False
+        object.__setattr__(self, '_initialized', False)
+        for o, default in self._initial:
+            object.__setattr__(self, o, default)
+        # options set since the last measurements.dbs file, None until the
+        # options are written for the first time
+        object.__setattr__(self, '_changed', None)
         
         #register fixed values through connections to ensure consistency in the 
         #csv file, otherwise the requested fixed value will be overridden by
@@ -57,12 +74,8 @@ class GKParameter(GK_Operators):
         # parameters can have lower and upper bounds       
         if lb is not None:
             self.LOWER = lb
-        else:
-            self.LOWER = None
         if ub is not None:
             self.UPPER = ub
-        else:
-            self.UPPER = None
         self.integer = bool(integer)
         
         # now allow options to be sent to the server
@@ -79,12 +92,20 @@ class GKParameter(GK_Operators):
     def __setitem__(self,key,value):
         self.value[key] = value
 
-#    def __getattr__(self,name):
-#        name = name.upper()
-#        if name == 'VALUE':
-#            return self.__dict__['VALUE'].value
-#        else:
-#            return self.__dict__[name]
+    #name and value are read often, they don't go through __getattr__
+    @property
+    def name(self):
+        return self.NAME
+    @property
+    def value(self):
+        return self.VALUE
+
+    def __getattr__(self,name):
+        #options in any case
+        upper = name.upper()
+        if upper in self._options:
+            return object.__getattribute__(self, upper)
+        return GK_Operators.__getattr__(self, name)
     
     def __setattr__(self, name, value):
         if self._initialized:
@@ -92,23 +113,29 @@ class GKParameter(GK_Operators):
             name = name.upper()
 
             #only allow user to set input or input/output options:
-            if name in options[self.type]['inputs']+options[self.type]['inout']:
+            if name in self._settable:
                 if name == 'VALUE':
                     # Extract input array from pandas series if needed
                     if type(value).__name__ == 'Series':
                         value = value.values
-                    self.__dict__[name].value = value
+                    self.VALUE.value = value
                 else:
-                    self.__dict__[name] = value
+                    object.__setattr__(self, name, value)
+                    changed = self._changed
+                    if changed is not None:
+                        if changed:
+                            changed.add(name)
+                        else:
+                            object.__setattr__(self, '_changed', {name})
 
                     
             #don't allow writing to output properties by default
-            elif name in options[self.type]['outputs']:
+            elif name in self._outputs:
                 #define outputs by passing list/tuple with 1st element being True
                 #to override the output writing prevention 
                 try:
                     if value[0] == True:
-                        self.__dict__[name] = value[1]
+                        object.__setattr__(self, name, value[1])
                     else:
                         raise TypeError
                 except TypeError:
@@ -122,45 +149,48 @@ class GKParameter(GK_Operators):
                 
         #for initializing model
         else:
-            self.__dict__[name] = value
+            object.__setattr__(self, name, value)
+
+    def __setstate__(self, state):
+        #pickle and copy restore the slots before the object is initialized,
+        #without the checks of __setattr__
+        for slots in state if isinstance(state, tuple) else (state,):
+            if slots:
+                for name, value in slots.items():
+                    object.__setattr__(self, name, value)
             
             
 class GK_FV(GKParameter):
     """Fixed Variable. Inherits GKParameter."""
+    __slots__ = ('model_name', 'path') + option_slots(options, 'FV', None)
+    _settable = settable_options(options, 'FV')
+    _outputs = frozenset(options['FV']['outputs'])
+    _options = _settable | _outputs
+    _initial = option_defaults(options, 'FV')
 
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
 
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
-        self.__dict__['_initialized'] = False
+        object.__setattr__(self, '_initialized', False)
 
         if not hasattr(self,'type'): #don't overwrite MV
             self.type = 'FV'
         self.model_name = gk_model
         self.path = model_path #use the same path as the model 
         
-        # FV options
-        self.CRITICAL = None
-        self.DMAX = None
-        self.DMAXHI = None
-        self.DMAXLO = None
-        self.FSTATUS = None
-        self.LSTVAL = None
-        self.MEAS = None
-        self.NEWVAL = None
-        self.PSTATUS = None
-        self.STATUS = None
-        self.VDVL = None
-        self.VLACTION = None
-        self.VLHI = None
-        self.VLLO = None
+        # FV options are set to their defaults in GKParameter.__init__
        
         GKParameter.__init__(self, name=name, value=value, lb=lb, ub=ub, integer=integer)
 
 
     def meas(self,measurement):
         self.MEAS = measurement
+        if self.path is None:
+            #the model folder doesn't exist yet, MEAS is written to
+            #measurements.dbs with the other options at the next solve
+            return
         #open measurement.dbs file
         f = open(os.path.join(self.path,'measurements.dbs'),'a')
         #write measurement
@@ -177,13 +207,18 @@ class GK_FV(GKParameter):
 
 class GK_MV(GK_FV):
     """ Manipulated Variable. Inherits GK_FV."""
+    __slots__ = ('initialized',) + option_slots(options, 'MV', 'FV', None)
+    _settable = settable_options(options, 'MV')
+    _outputs = frozenset(options['MV']['outputs'])
+    _options = _settable | _outputs
+    _initial = option_defaults(options, 'MV')
 
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
         
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
-        self.__dict__['_initialized'] = False
+        object.__setattr__(self, '_initialized', False)
 
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
@@ -192,16 +227,7 @@ class GK_MV(GK_FV):
 
         self.type = 'MV'
 
-        # options for manipulated variables
-        self.AWS = None
-        self.COST = None
-        self.DCOST = None
-        self.DPRED = None
-        self.MV_STEP_HOR = None
-        self.NXTVAL = None
-        self.PRED = None
-        self.REQONCTRL = None
-        self.TIER = None
+        # MV options are set to their defaults in GKParameter.__init__
         
         GK_FV.__init__(self, name=name, value=value, lb=lb, ub=ub, gk_model=gk_model, model_path=model_path, integer=integer)
 
@@ -2,108 +2,153 @@
 
 import json
 import os
+import re
+
+import numpy as np
 
 from .properties import parameter_options, variable_options
 
+#%% JSON parser
+
+# the fastest available parser reads the result files, stdlib json is used
+# when neither is installed and for files they don't accept (NaN, Inf). The
+# parser is imported with the first result file.
+_fast_json = None
+_backend_selected = False
+
+def set_json_backend(backend=None):
+    '''Select the parser of the result files: 'orjson', 'ujson', 'json'
+    (standard library) or a module with a loads function. None uses the
+    fastest one that is installed.'''
+    global _fast_json, _backend_selected
+    _backend_selected = True
+    if backend is None:
+        for name in ('orjson', 'ujson'):
+            try:
+                _fast_json = __import__(name)
+                return
+            except ImportError:
+                pass
+        _fast_json = None
+    elif backend == 'json':
+        _fast_json = None
+    elif isinstance(backend, str):
+        _fast_json = __import__(backend)
+    else:
+        _fast_json = backend
+
+# APM writes infinite values as Inf, +Inf or -Inf which are not JSON
+_inf = re.compile(br'(?<![A-Za-z0-9_])[+-]?Inf(?![A-Za-z0-9_])')
+
+def _loads(raw):
+    '''Parse the JSON text (bytes or str) of a result file. Inf values are
+    loaded as NaN while parsing, the file itself is never rewritten.'''
+    if not _backend_selected:
+        set_json_backend()
+    if isinstance(raw, str):
+        raw = raw.encode('utf-8')
+    if b'Inf' in raw:
+        # standard library json accepts the NaN tokens, the fast parsers don't
+        return json.loads(_inf.sub(b'NaN', raw).decode('utf-8'))
+    if _fast_json is not None:
+        try:
+            return _fast_json.loads(raw)
+        except ValueError:
+            pass
+    return json.loads(raw.decode('utf-8'))
+
+def _read_json(path):
+    with open(path, 'rb') as f:
+        return _loads(f.read())
+
+def _selected(names):
+    '''Set of the lower case names to load (None to load everything)'''
+    if names is None:
+        return None
+    if isinstance(names, str) or not hasattr(names, '__iter__'):
+        names = [names]
+    return set(n.lower() if isinstance(n, str) else n.name for n in names)
+
 
 #%% Post-solve processing
 
+def _indexed(values, o, first):
+    '''Output option reported as o[first], o[first+1], ... (up to o[10])'''
+    indexed = []
+    for i in range(first, 11):
+        key = o + '[' + str(i) + ']'
+        if key not in values:
+            break
+        indexed.append(values[key])
+    return indexed
+
 ## options.JSON has all APM options
-def load_JSON(self):
-    f = open(os.path.join(self._path,'options.json'))
-    data = json.load(f)
-    f.close()
+def load_JSON(self, names=None):
+    '''Load the APM options and the options of the FV/MV/SV/CV from
+    options.json (only of the objects in names if names are given)'''
+    data = _read_json(os.path.join(self._path,'options.json'))
     #global (APM) options
     for o in self.options._output_option_list+self.options._inout_option_list:
         self.options.__dict__[o] = data['APM'][o]
     #Variable options (FV/MV/SV/CV)
-    for vp in self._parameters:
-        if vp.type != None: #(FV/MV/SV/CV) not Param or Var
-            for o in parameter_options[vp.type]['outputs']+parameter_options[vp.type]['inout']:
+    selected = _selected(names)
+    for vps, options in ((self._parameters, parameter_options), (self._variables, variable_options)):
+        for vp in vps:
+            if vp.type == None: #Param or Var
+                continue
+            if selected is not None and vp.name not in selected:
+                continue
+            values = data[vp.name]
+            for o in options[vp.type]['outputs']+options[vp.type]['inout']:
                 if o == 'VALUE':
                     continue
-                elif o == 'PRED': #Pred can be an array of up to 10
-                    if o in data[vp.name]: #single value
-                        vp.__dict__[o] = data[vp.name][o]
-                    else:
-                        try: #fill in an array up to 10 values
-                            pred = []
-                            for i in range(11):
-                                pred.append(data[vp.name][o+'['+str(i)+']'])
-                        except:
-                            pass
-                        finally:
-                            vp.__dict__[o] = pred
-                elif o == 'DPRED': #Pred can be an array of up to 10
-                    if o in data[vp.name]: #single value
-                        vp.__dict__[o] = data[vp.name][o]
-                    else:
-                        try: #fill in an array up to 10 values
-                            dpred = []
-                            for i in range(1,11):
-                                pred.append(data[vp.name][o+'['+str(i)+']'])
-                        except:
-                            pass
-                        finally:
-                            vp.__dict__[o] = dpred
+                #outputs are set without the check of __setattr__
+                elif (o == 'PRED' or o == 'DPRED') and o not in values:
+                    #array of up to 10 predictions
+                    object.__setattr__(vp, o, _indexed(values, o, 0 if o == 'PRED' else 1))
                 else: #everything besides value, dpred and pred
-                    vp.__dict__[o] = data[vp.name][o]
-    for vp in self._variables:
-        if vp.type != None: #(FV/MV/SV/CV) not Param or Var
-            for o in variable_options[vp.type]['outputs']+variable_options[vp.type]['inout']:
-
-                if o == 'VALUE':
-                    continue
-                elif o == 'PRED': #Pred can be an array of up to 10
-                    if o in data[vp.name]: #single value
-                        vp.__dict__[o] = data[vp.name][o]
-                    else:
-                        try: #fill in an array up to 10 values
-                            pred = []
-                            for i in range(11):
-                                pred.append(data[vp.name][o+'['+str(i)+']'])
-                        except:
-                            pass
-                        finally:
-                            vp.__dict__[o] = pred
-                else: #everything besides value and pred
-                    vp.__dict__[o] = data[vp.name][o]
+                    object.__setattr__(vp, o, values[o])
+    #Variable arrays (FV/MV/SV/CV)
+    for array in self._arrays:
+        if array.type is not None and (selected is None or array.name in selected):
+            array._load_options(data)
     return data
 
 
 ## results.json has variable value results
-def load_results(self):
+def load_results(self, names=None, arrays=False):
+    '''Load the values of parameters, intermediates and variables from
+    results.json.
+
+    names = objects (or their names) to load, default is all
+    arrays = store the values as NumPy arrays instead of lists
+    '''
     if (os.path.isfile(os.path.join(self._path, 'results.json'))):
-        f = open(os.path.join(self._path,'results.json'))
-        data = json.load(f)
-        f.close()
+        data = _read_json(os.path.join(self._path,'results.json'))
 
-        for vp in self._parameters:
-            try:
-                vp.VALUE = data[vp.name]
-                vp.value.change = False
-            except Exception:
-                print(vp.name+ " not found in results file")
-        for i in self._intermediates:
-            try:
-                i.value.value = data[i.name]
-                i.value.change = False
-            except Exception:
-                print(i.name+ " not found in results file")
-        for vp in self._variables:
-            try:
-                vp.VALUE = data[vp.name]
-                vp.value.change = False
-            except Exception:
-                print(vp.name+ " not found in results file")
+        selected = _selected(names)
+        for vps, intermediate in ((self._parameters, False), (self._intermediates, True), (self._variables, False)):
+            for vp in vps:
+                if selected is not None and vp.name not in selected:
+                    continue
+                try:
+                    value = data[vp.name]
+                    if arrays:
+                        value = np.array(value, dtype=float)
+                    if intermediate:
+                        vp.value.value = value
+                    else:
+                        vp.VALUE = value
+                    vp.value.change = False
+                except Exception:
+                    print(vp.name+ " not found in results file")
+        #variable arrays are always loaded as NumPy arrays
+        for array in self._arrays:
+            if selected is None or array.name in selected:
+                array._load_results(data)
 
         return data
 
     else:
         print("Error: 'results.json' not found. Check above for additional error details")
         return {}
-
-    print(data['APM']['SOLVESTATUS'])
-    return data
-
-
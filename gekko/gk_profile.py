@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""Time and size of the phases of each solve.
+
+    m.solve(profile=True)        # profile this solve
+    m.profile.enabled = True     # or every solve of the model
+    m.profile.last['phases']['solve']['seconds']
+    m.profile.to_csv('solves.csv')
+
+Each profiled solve adds a record to m.profile.history (the last `maxlen`
+solves are kept):
+
+    {'cycle': number of the profiled solve, 'start': time.time() at the start,
+     'seconds': wall time of the whole solve,
+     'phases': {phase: {'seconds': wall time, 'bytes': size of the files
+                written or read in the phase}},
+     'solvetime': SOLVETIME, 'iterations': ITERATIONS,
+     'appstatus': APPSTATUS}
+
+The phases are build_model, write_csv, write_dbs, write_solver_options,
+write_info, solve, load_results, load_options and debug. Only files that
+were written are counted, a model file (.apm) that was not changed since the
+last solve is 0 bytes. The bytes of the solve phase are the result files of
+the solver (downloaded from the server for remote solves).
+"""
+import csv
+import io
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+PHASES = ('build_model', 'write_csv', 'write_dbs', 'write_solver_options',
+          'write_info', 'solve', 'load_results', 'load_options', 'debug')
+
+
+class GKProfile(object):
+    """Solve-phase profiler of a model (m.profile)"""
+
+    def __init__(self, maxlen=1000):
+        #profile every solve, solve(profile=True) profiles a single solve
+        self.enabled = False
+        self.history = deque(maxlen=maxlen)
+        self._cycle = 0
+        self._record = None
+
+    @property
+    def last(self):
+        '''Record of the last profiled solve (None before the first one)'''
+        return self.history[-1] if self.history else None
+
+    def clear(self):
+        self.history.clear()
+
+    def start(self):
+        '''Start the record of a solve'''
+        self._cycle += 1
+        self._record = OrderedDict([('cycle', self._cycle),
+                                    ('start', time.time()),
+                                    ('seconds', None),
+                                    ('phases', OrderedDict()),
+                                    ('solvetime', None),
+                                    ('iterations', None),
+                                    ('appstatus', None)])
+        self._t = time.perf_counter()
+
+    def finish(self, options=None):
+        '''Complete the record of the solve with the statistics the solver
+        reported (SOLVETIME, ITERATIONS and APPSTATUS of the model options)'''
+        record = self._record
+        if record is None:
+            return None
+        self._record = None
+        record['seconds'] = time.perf_counter() - self._t
+        if options is not None:
+            record['solvetime'] = options.SOLVETIME
+            record['iterations'] = options.ITERATIONS
+            record['appstatus'] = options.APPSTATUS
+        self.history.append(record)
+        return record
+
+    def cancel(self):
+        '''Drop the record of a solve that failed'''
+        self._record = None
+
+    def begin(self, name, written=(), read=()):
+        '''Start a phase of the solve (None if no solve is profiled).
+        written = files the phase may write (counted if they changed),
+        read = files the phase reads.'''
+        if self._record is None:
+            return None
+        return (name, written, read, [_stat(path) for path in written], time.perf_counter())
+
+    def end(self, phase):
+        '''Add the time and bytes of a phase started with begin()'''
+        if phase is None or self._record is None:
+            return
+        name, written, read, before, t = phase
+        seconds = time.perf_counter() - t
+        size = 0
+        for path, old in zip(written, before):
+            new = _stat(path)
+            if new is not None and new != old:
+                size += new[1]
+        for path in read:
+            stat = _stat(path)
+            if stat is not None:
+                size += stat[1]
+        phases = self._record['phases']
+        if name in phases:
+            # phase repeated in one solve
+            phases[name]['seconds'] += seconds
+            phases[name]['bytes'] += size
+        else:
+            phases[name] = OrderedDict([('seconds', seconds), ('bytes', size)])
+
+    @contextmanager
+    def phase(self, name, written=(), read=()):
+        '''Time the phase in a with block'''
+        phase = self.begin(name, written, read)
+        try:
+            yield
+        finally:
+            self.end(phase)
+
+    def summary(self):
+        '''Mean seconds and bytes of each phase over the history'''
+        totals = OrderedDict()
+        for record in self.history:
+            for name, phase in record['phases'].items():
+                total = totals.setdefault(name, [0, 0.0, 0])
+                total[0] += 1
+                total[1] += phase['seconds']
+                total[2] += phase['bytes']
+        return OrderedDict((name, OrderedDict([('seconds', s / n), ('bytes', b / n)]))
+                           for name, (n, s, b) in totals.items())
+
+    def to_json(self, path=None):
+        '''History as JSON text, written to path if given'''
+        text = json.dumps(list(self.history), indent=1)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_csv(self, path=None):
+        '''History as CSV text with one row per solve and the seconds and
+        bytes of each phase as columns, written to path if given'''
+        names = [p for p in PHASES if any(p in r['phases'] for r in self.history)]
+        header = ['cycle', 'start', 'seconds', 'solvetime', 'iterations', 'appstatus']
+        f = io.StringIO()
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(header + [n + s for n in names for s in ('_seconds', '_bytes')])
+        for record in self.history:
+            row = [record[h] for h in header]
+            for n in names:
+                phase = record['phases'].get(n)
+                row += [phase['seconds'], phase['bytes']] if phase else ['', '']
+            writer.writerow(row)
+        text = f.getvalue()
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def __repr__(self):
+        return 'GKProfile(' + str(len(self.history)) + ' solves)'
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
@@ -208,14 +208,13 @@ class AMPLConverter(GKConverter):
         elif obj_type == "pwl":  # piece-wise linear function
             x_values = []
             y_values = []
-            # file path to pwl values
-            filename = os.path.join(self._gekko_model._path, "%s.txt" % obj_name)
+            # pwl values, kept in memory by the model
+            text = self._gekko_model._files.read("%s.txt" % obj_name)
             # read x and y values from file
-            with open(filename) as file:
-                for line in file:
-                    csv_array = line.strip().split(",")
-                    x_values.append(csv_array[0])
-                    y_values.append(csv_array[1])
+            for line in text.splitlines():
+                csv_array = line.strip().split(",")
+                x_values.append(csv_array[0])
+                y_values.append(csv_array[1])
 
             # some checking to make sure the pwl function is valid
             if len(x_values) < 3:
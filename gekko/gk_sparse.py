@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Matrices and data files of the axb, qobj, lti, arx, spline and pwl objects.
+
+The matrices are NumPy arrays, lists or scipy.sparse matrices (CSR, CSC,
+COO, ... or sparse arrays). scipy is not imported here: sparse matrices are
+recognized by their tocoo method and are never converted to dense arrays
+unless a dense file is requested.
+
+The text of the data files has the shortest form of each value that reads
+back as the same float (repr), there is no loss of precision.
+"""
+import numpy as np
+
+
+def issparse(M):
+    '''True for scipy.sparse matrices and arrays'''
+    return hasattr(M, 'tocoo') and hasattr(M, 'nnz')
+
+
+def shape(M):
+    '''Shape of a sparse or dense matrix'''
+    return tuple(M.shape) if issparse(M) else np.shape(M)
+
+
+def coo(M, order='F'):
+    '''Nonzero entries of a matrix as (row, col, value) arrays with 0-based
+    indices, column by column (order='F') or row by row (order='C').
+    Duplicate entries of a sparse matrix are summed.'''
+    if issparse(M):
+        # copy, sum_duplicates would change a COO matrix of the caller
+        M = M.tocoo(copy=True)
+        M.sum_duplicates()
+        row = np.asarray(M.row, dtype=np.int64)
+        col = np.asarray(M.col, dtype=np.int64)
+        value = np.asarray(M.data, dtype=float)
+        keep = value != 0
+        row, col, value = row[keep], col[keep], value[keep]
+        index = np.lexsort((row, col) if order == 'F' else (col, row))
+        return row[index], col[index], value[index]
+    M = np.asarray(M, dtype=float)
+    if M.ndim == 1:
+        M = M.reshape(-1, 1)
+    if order == 'F':
+        col, row = np.nonzero(M.T)
+    else:
+        row, col = np.nonzero(M)
+    return row, col, M[row, col]
+
+
+def triplets(M, order='F'):
+    '''COO form of a matrix as an (nnz, 3) array of [row, col, value] with
+    1-based indices'''
+    row, col, value = coo(M, order)
+    return np.column_stack((row + 1, col + 1, value)).astype(float)
+
+
+def pairs(b):
+    '''COO form of a vector as an (nnz, 2) array of [row, value] with 1-based
+    rows and the size of the vector'''
+    if issparse(b):
+        # row or column vector
+        row, col, value = coo(b, order='C')
+        index = row * shape(b)[1] + col
+        size = int(np.prod(shape(b)))
+    else:
+        b = np.asarray(b, dtype=float).ravel()
+        index = np.nonzero(b)[0]
+        value = b[index]
+        size = b.size
+    return np.column_stack((index + 1, value)).astype(float), size
+
+
+def dense(M):
+    '''Dense float array of a sparse or dense matrix'''
+    if issparse(M):
+        return np.asarray(M.toarray(), dtype=float)
+    return np.array(M, dtype=float)
+
+
+def text(M, delimiter=',', header=None):
+    '''Text of a float matrix (or vector, one value per line), the same as
+    np.savetxt(f, M, delimiter=delimiter, fmt='%1.25s') but with one join
+    per row instead of one format call per value. header = first line (e.g.
+    column names).'''
+    M = np.asarray(M, dtype=float)
+    if M.ndim == 1:
+        lines = list(map(repr, M.tolist()))
+    else:
+        lines = [delimiter.join(map(repr, row)) for row in M.tolist()]
+    if header is not None:
+        lines.insert(0, header)
+    return '\n'.join(lines) + '\n' if lines else ''
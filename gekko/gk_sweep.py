@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""Parameter sweep that solves one model for many parameter values.
+
+    k = m.FV(1, name='k')
+    results, status = m.sweep({'k': [1, 2, 3], 'p': [0.1, 0.2]}, outputs=[x, y])
+    results['k'], results[x.name]
+
+The model file (.apm) and the other files of the model folder are written
+once. Each scenario only writes its own data file (.csv) and options
+(measurements.dbs) in a separate folder and the APM executables of the
+scenarios run in parallel (see gk_batch). The values of the swept
+parameters are restored afterwards and the model itself is not changed by
+the results of the scenarios.
+"""
+import itertools
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from .gk_batch import _Run, _run_all
+from .gk_parameter import GKParameter
+from .gk_post_solve import _read_json
+from .gk_variable import GKVariable
+
+
+def sweep(self, param_grid, outputs, workers=None, disp=False, debug=1):
+    """Solve the model for every combination of parameter values.
+
+    param_grid = {name: [values]} or [(param, [values]), ...] to solve all
+                 combinations of the values of the parameters (by name or
+                 object), or a list of {name: value} dictionaries with one
+                 dictionary per scenario. A value may be a number or an
+                 array with a value for each time point.
+    outputs = list of variables, parameters or intermediates to return
+    workers = maximum number of solves at the same time (default is the
+              number of processors)
+
+    Returns (results, status). results is a NumPy structured array with one
+    record per scenario and a field (named like the model objects) for
+    every swept parameter and output. Outputs of scenarios that failed are
+    NaN. status is a list with a dictionary for each scenario with 'status'
+    ('success' or 'error'), 'error', 'appstatus' and 'time'.
+    """
+    if self._remote or self._uses_solver_extension():
+        raise ValueError('sweep runs the local APM executable, it requires '
+                         'GEKKO(remote=False) without a solver extension')
+    if self._csv_status == 'provided':
+        raise ValueError('sweep writes the data (.csv) file of each scenario, '
+                         'it cannot be used with a provided csv file')
+    params, scenarios = _scenarios(self, param_grid)
+    outputs = list(outputs)
+    names = [vp.name for vp in params] + [o.name for o in outputs]
+    if len(set(names)) != len(names):
+        raise ValueError('swept parameters and outputs must be different objects')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError('workers must be at least 1')
+
+    # state that is changed to write the scenarios and restored afterwards
+    vps = self._variables + self._parameters
+    changes = [(vp, _copy_change(vp.value.change)) for vp in vps]
+    values = [vp.VALUE.value for vp in params]
+
+    self._check_options()
+    # .apm, .info, solver options and extra files, shared by all scenarios
+    self._write_files(debug)
+
+    folder = os.path.join(self._path, 'sweep')
+    if os.path.isdir(folder):
+        shutil.rmtree(folder)
+    os.mkdir(folder)
+    shared = [f for f in os.listdir(self._path)
+              if os.path.isfile(os.path.join(self._path, f))
+              and f not in (self._model_name + '.csv', 'measurements.dbs',
+                            'results.json', 'options.json', 'results.csv')]
+
+    status = [None] * len(scenarios)
+    data = [None] * len(scenarios)
+
+    def start(i):
+        t = time.time()
+        path = os.path.join(folder, str(i))
+        try:
+            os.mkdir(path)
+            for f in shared:
+                shutil.copyfile(os.path.join(self._path, f), os.path.join(path, f))
+            # every scenario gets the full data of the model plus its values
+            for vp, change in changes:
+                vp.value.change = _copy_change(change)
+            for vp, value in zip(params, scenarios[i]):
+                vp.value = value
+            with _folder(self, path):
+                self._write_csv()
+                self._generate_dbs_file(changed_only=False)
+            return _Run(self, path, disp, debug, t)
+        except Exception as e:
+            status[i] = _status(t, str(e))
+
+    def finish(i, run):
+        path = os.path.join(folder, str(i))
+        appstatus = None
+        if run.error is None:
+            try:
+                results = _read_json(os.path.join(path, 'results.json'))
+                appstatus = _read_json(os.path.join(path, 'options.json'))['APM']['APPSTATUS']
+                data[i] = [results[name] for name in names[len(params):]]
+            except Exception as e:
+                run.error = str(e)
+        status[i] = _status(run.start, run.error, appstatus)
+
+    try:
+        _run_all(len(scenarios), workers, start, finish)
+    finally:
+        for vp, value in zip(params, values):
+            vp.value = value
+        for vp, change in changes:
+            vp.value.change = change
+        shutil.rmtree(folder, ignore_errors=True)
+
+    return _results(names, params, scenarios, data), status
+
+
+def _scenarios(self, param_grid):
+    """Swept parameters and the list of their values for each scenario"""
+    if isinstance(param_grid, dict):
+        param_grid = list(param_grid.items())
+    else:
+        param_grid = list(param_grid)
+    if not param_grid:
+        raise ValueError('param_grid has no parameters')
+    if isinstance(param_grid[0], dict):
+        # list of scenarios
+        keys = list(param_grid[0].keys())
+        scenarios = []
+        for scenario in param_grid:
+            if set(scenario.keys()) != set(keys):
+                raise ValueError('every scenario must set the same parameters')
+            scenarios.append(tuple(scenario[key] for key in keys))
+    else:
+        # (parameter, values) pairs, all combinations are solved
+        keys = [key for key, _ in param_grid]
+        scenarios = list(itertools.product(*[list(values) for _, values in param_grid]))
+    return [_find(self, key) for key in keys], scenarios
+
+
+def _find(self, key):
+    """Parameter or variable of the model from the object or its name"""
+    if isinstance(key, (GKParameter, GKVariable)):
+        return key
+    name = str(key).lower()
+    for vp in self._parameters + self._variables:
+        if vp.name == name:
+            return vp
+    raise ValueError('No parameter or variable named ' + repr(key) + ' in the model')
+
+
+def _copy_change(change):
+    # change is True, False or a mask of the changed elements
+    return change.copy() if isinstance(change, np.ndarray) else change
+
+
+@contextmanager
+def _folder(self, path):
+    """Write or read the model files in another folder"""
+    model_path = self._path
+    self._path = path
+    try:
+        yield
+    finally:
+        self._path = model_path
+
+
+def _status(start, error=None, appstatus=None):
+    return {'status': 'success' if error is None else 'error',
+            'error': error,
+            'appstatus': appstatus,
+            'time': time.time() - start}
+
+
+def _column(values):
+    """Column of the results for one field, a 2D array if a value of any
+    scenario is an array (numbers are repeated, None is NaN)"""
+    values = [np.ravel(np.asarray(np.nan if v is None else v, dtype=float)) for v in values]
+    n = max(v.size for v in values)
+    if n == 1:
+        return np.array([v[0] for v in values])
+    column = np.empty((len(values), n))
+    for i, v in enumerate(values):
+        if v.size not in (1, n):
+            raise ValueError('values of one parameter or output must have the same length in all scenarios')
+        column[i] = v
+    return column
+
+
+def _results(names, params, scenarios, data):
+    """Structured array with the swept values and outputs of each scenario"""
+    columns = [_column(values) for values in zip(*scenarios)]
+    for k in range(len(names) - len(params)):
+        columns.append(_column([None if d is None else d[k] for d in data]))
+    dtype = [(name, float, column.shape[1:]) for name, column in zip(names, columns)]
+    results = np.zeros(len(scenarios), dtype=dtype)
+    for name, column in zip(names, columns):
+        results[name] = column
+    return results
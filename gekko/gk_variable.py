@@ -24,15 +24,27 @@ CV_output_options = SV_output_options + ['LSTVAL' ]
 variable_options = {'SV':{'inputs':SV_input_options, 'outputs':SV_output_options, 'inout': SV_inout_options}, 
                     'CV':{'inputs':CV_input_options,'outputs':CV_output_options,'inout':CV_inout_options},
                     None:{'inputs':Var_input_options,'outputs':Var_output_options,'inout':Var_inout_options}}"""
-from .properties import variable_options as options
+from .properties import variable_options as options, option_defaults, option_slots, settable_options
+
 
 class GK_Derivative(GK_Operators):
     def __call__(self):
         return self
 
 class GKVariable(GK_Operators):
-    """Represents a parameter in a model"""
+    """Represents a parameter in a model
+
+    The options are slots of the class that are set to their default value
+    (None unless in _defaults) when the object is created. Options are read
+    and set case-insensitively."""
     counter = 0
+    __slots__ = ('_initialized', '_override_csv', '_changed', 'type', 'integer') + option_slots(options, None)
+    #options of the type (SV, CV) of the class
+    _settable = settable_options(options, None)
+    _outputs = frozenset(options[None]['outputs'])
+    _options = _settable | _outputs
+    _defaults = {}
+    _initial = option_defaults(options, None)
     
     def __init__(self, name='', value=None, lb=None, ub=None, integer=False):
         if name == '':
@@ -44,7 +56,12 @@ class GKVariable(GK_Operators):
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
-        self.__dict__['_initialized'] = False
+        object.__setattr__(self, '_initialized', False)
+        for o, default in self._initial:
+            object.__setattr__(self, o, default)
+        # options set since the last measurements.dbs file, None until the
+        # options are written for the first time
+        object.__setattr__(self, '_changed', None)
 
         GK_Operators.__init__(self, name, value=value)
 
@@ -55,12 +72,8 @@ class GKVariable(GK_Operators):
         
         if lb is not None:
             self.LOWER = lb
-        else:
-            self.LOWER = None
         if ub is not None:
             self.UPPER = ub
-        else:
-            self.UPPER = None
         self.integer = bool(integer)
 
         #register fixed values through connections to ensure consistency in the 
@@ -87,13 +100,20 @@ class GKVariable(GK_Operators):
     def __setitem__(self,key,value):
         self.value[key] = value
 
+    #name and value are read often, they don't go through __getattr__
+    @property
+    def name(self):
+        return self.NAME
+    @property
+    def value(self):
+        return self.VALUE
 
-#    def __getattr__(self,name):
-#        name = name.upper()
-#        if name == 'VALUE':
-#            return self.__dict__['VALUE'].value
-#        else:
-#            return self.__dict__[name]
+    def __getattr__(self,name):
+        #options in any case
+        upper = name.upper()
+        if upper in self._options:
+            return object.__getattribute__(self, upper)
+        return GK_Operators.__getattr__(self, name)
 
     def __setattr__(self, name, value):
         if self._initialized:
@@ -101,23 +121,29 @@ class GKVariable(GK_Operators):
             name = name.upper()
 
             #only allow user to set input or input/output options:
-            if name in options[self.type]['inputs']+options[self.type]['inout']:
+            if name in self._settable:
                 if name == 'VALUE':
                     # Extract input array from pandas series if needed
                     if type(value).__name__ == 'Series':
                         value = value.values
-                    self.__dict__[name].value = value
+                    self.VALUE.value = value
                 else:
-                    self.__dict__[name] = value
+                    object.__setattr__(self, name, value)
+                    changed = self._changed
+                    if changed is not None:
+                        if changed:
+                            changed.add(name)
+                        else:
+                            object.__setattr__(self, '_changed', {name})
                     
                         
             #don't allow writing to output properties by default
-            elif name in options[self.type]['outputs']:
+            elif name in self._outputs:
                 #define outputs by passing list/tuple with 1st element being True
                 #to override the output writing prevention 
                 try:
                     if value[0] == True:
-                        self.__dict__[name] = value[1]
+                        object.__setattr__(self, name, value[1])
                     else:
                         raise TypeError
                 except TypeError:
@@ -130,33 +156,40 @@ class GKVariable(GK_Operators):
                 
         #for initializing model
         else:
-            self.__dict__[name] = value
+            object.__setattr__(self, name, value)
+
+    def __setstate__(self, state):
+        #pickle and copy restore the slots before the object is initialized,
+        #without the checks of __setattr__
+        for slots in state if isinstance(state, tuple) else (state,):
+            if slots:
+                for name, value in slots.items():
+                    object.__setattr__(self, name, value)
         
 
 
 
 class GK_SV(GKVariable):
     """State Variable. Inherits GKVariable."""
+    __slots__ = ('model_name', 'path') + option_slots(options, 'SV', None)
+    _settable = settable_options(options, 'SV')
+    _outputs = frozenset(options['SV']['outputs'])
+    _options = _settable | _outputs
+    _initial = option_defaults(options, 'SV')
 
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
 
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
-        self.__dict__['_initialized'] = False
+        object.__setattr__(self, '_initialized', False)
         
         if not hasattr(self,'type'): #don't overwrite CV
             self.type = 'SV'
         self.model_name = gk_model 
         self.path = model_path #use the same path as the model 
         
-        # SV specific options
-        self.FSTATUS = None
-        self.LOWER = None
-        self.MEAS = None
-        self.MODEL = None
-        self.PRED = None
-        self.UPPER = None
+        # SV specific options are set to their defaults in GKVariable.__init__
         
         GKVariable.__init__(self, name, value, lb, ub, integer)
 
@@ -164,47 +197,32 @@ class GK_SV(GKVariable):
 
 class GK_CV(GK_SV):
     """Controlled Variable. Inherits variable """
+    __slots__ = option_slots(options, 'CV', 'SV', None)
+    _settable = settable_options(options, 'CV')
+    _outputs = frozenset(options['CV']['outputs'])
+    _options = _settable | _outputs
+    # CV specific options that are not None by default
+    _defaults = {'FDELAY': 0, 'TR_INIT': 0}
+    _initial = option_defaults(options, 'CV', _defaults)
     
     def __init__(self, name='', value=0, lb=None, ub=None, gk_model=None, model_path=None, integer=False):
 
         # prevents the __setattr__ function from sending options to the server
         # until the __init__ function has completed since they should only be
         # sent if changed from their defaults
-        self.__dict__['_initialized'] = False
+        object.__setattr__(self, '_initialized', False)
         
         
         self.type = 'CV'
         
-        # CV specific options
-        self.BIAS = None
-        self.COST = None
-        self.CRITICAL = None
-        self.FDELAY = 0
-        self.LSTVAL = None
-        self.MEAS_GAP = None
-        self.PSTATUS = None
-        self.SP = None
-        self.SPHI = None
-        self.SPLO = None
-        self.STATUS = None
-        self.TAU = None
-        self.TIER = None
-        self.TR_INIT = 0
-        self.TR_OPEN = None
-        self.VDVL = None
-        self.VLACTION = None
-        self.VLHI = None
-        self.VLLO = None
-        self.WMEAS = None
-        self.WMODEL = None
-        self.WSP = None
-        self.WSPHI = None
-        self.WSPLO = None
-
         GK_SV.__init__(self, name=name, value=value, lb=lb, ub=ub, gk_model=gk_model, model_path=model_path, integer=integer)
 
     def meas(self,measurement):
         self.MEAS = measurement
+        if self.path is None:
+            #the model folder doesn't exist yet, MEAS is written to
+            #measurements.dbs with the other options at the next solve
+            return
         #open measurement.dbs file
         f = open(os.path.join(self.path,'measurements.dbs'),'a')
         #write measurement
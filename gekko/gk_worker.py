@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Solver process that is kept alive between local solves of one model
+(GEKKO(persistent=True)).
+
+The model files (.apm, .csv, measurements.dbs, ...) are still written to the
+model folder before each solve, the worker only avoids starting the solver
+executable again. Files that did not change are not rewritten and
+measurements.dbs only has the measurements and the options that changed, so
+a solve of a running worker reads just these changes. The protocol with the executable is line based:
+
+    - the executable is started once with the model name as argument and
+      solves the model in the folder that it is started in
+    - when a solve is done, an executable that stays alive prints a line
+      with only READY and waits for the next line on stdin
+    - 'solve' on stdin requests another solve, end of input asks it to exit
+
+An executable that exits after the solve instead of printing READY (such as
+the APM executables in gekko/bin) is simply started again for the next
+solve, so a persistent model always works the same as a normal one.
+"""
+import subprocess
+import threading
+
+
+READY = '@ready'
+
+
+class GKWorker(object):
+    """Solver process for one model folder."""
+
+    def __init__(self, apm_exe, model_name, path, env=None, shell=False):
+        self.apm_exe = apm_exe
+        self.model_name = model_name
+        self.path = path
+        self.env = env
+        self.shell = shell
+        self.process = None
+        #True once the executable has signaled that it stays alive
+        self.persistent = False
+
+    def _start(self):
+        self.process = subprocess.Popen([self.apm_exe, self.model_name], stdin=subprocess.PIPE, \
+                                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, \
+                                        cwd=self.path, bufsize=1, env=self.env, \
+                                        universal_newlines=True, shell=self.shell)
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def solve(self, timeout=None, line_callback=None):
+        """Run one solve and return the output of the solver.
+
+        timeout = maximum time in seconds, the process is killed after that
+        line_callback = function called with each line of output as it arrives
+        """
+        started = False
+        if self.alive():
+            # the process of the last solve is waiting for the next request
+            try:
+                self.process.stdin.write('solve\n')
+                self.process.stdin.flush()
+            except (OSError, ValueError):
+                self.close()
+                started = True
+        else:
+            started = True
+        if started:
+            self._start()
+
+        expired = []
+        timer = None
+        if timeout is not None:
+            def expire():
+                expired.append(True)
+                self.process.kill()
+            timer = threading.Timer(timeout, expire)
+            timer.daemon = True
+            timer.start()
+
+        lines = []
+        try:
+            for line in iter(self.process.stdout.readline, ''):
+                if line.rstrip('\r\n') == READY:
+                    self.persistent = True
+                    break
+                lines.append(line)
+                if line_callback is not None:
+                    line_callback(line)
+            else:
+                # the solver exited after the solve, start it again next time
+                self.process.wait()
+                self.persistent = False
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        if expired:
+            self.close()
+            raise Exception('Time Limit Exceeded: ' + str(timeout))
+        return ''.join(lines)
+
+    def close(self):
+        """Ask the solver to exit (end of input) and stop it if it doesn't."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except Exception:
+                self.process.kill()
+                self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except Exception:
+                pass
+        self.process = None
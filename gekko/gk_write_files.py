@@ -3,145 +3,218 @@
 import numpy as np
 import os
 
+from . import gk_cache
 from .properties import global_options, parameter_options, variable_options
 from .gk_operators import GK_Operators
 
 #%% Write files
 
+def _signs(line):
+    ''' Replace multiple operators resulting from signs in one line of the
+    model, e.g. x--2 becomes x+2 '''
+    return line.replace('++','+').replace('--','+').replace('+-','-').replace('-+','-')
+
+
+def _bounds(vp):
+    ''' Declaration of a parameter or variable with value and bounds '''
+    line = '\t%s' % vp
+    i = 0
+    if not isinstance(vp.VALUE.value, (list,np.ndarray)):
+        if not (vp.VALUE==None):
+            i = 1
+            line += ' = %s' % vp.VALUE
+    if vp.UPPER is not None:
+        if i == 1:
+            line += ', '
+        i = 1
+        line += '<= %s' % vp.UPPER
+    if vp.LOWER is not None:
+        if i == 1:
+            line += ', '
+        i = 1
+        line += '>= %s' % vp.LOWER
+    return line + '\n'
+
+
+def _model_fingerprint(self):
+    ''' Fingerprint of the content of the apm file.
+
+    Equations, intermediates, connections, objects and raw lines are not
+    modified after they are added to the model, so their number identifies
+    them. Declarations of constants, parameters and variables (values and
+    bounds) can change between solves and are compared in full. '''
+    declarations = ['%s = %s' % (const, const.value) for const in self._constants]
+    declarations += [_bounds(vp) for vp in self._parameters]
+    declarations += [_bounds(vp) for vp in self._variables]
+    declarations += [a._fingerprint() for a in self._arrays]
+    return (self._model_name, len(self._constants), len(self._parameters),
+            len(self._variables), len(self._intermediates), len(self._equations),
+            len(self._objectives), len(self._connections), len(self._objects),
+            len(self._compounds), len(self._raw), hash(tuple(declarations)))
+
+
 def _build_model(self):
     ''' Write model to apm file.
 
-    Also does some minimal model validation
+    Each section is written directly to the file one line at a time so the
+    model text is never held in memory as a single string. Signs are
+    normalized per line. The file is only rewritten when the model
+    structure changed since it was last written (e.g. not when only
+    measurements, setpoints or values change between solves). With the
+    model cache (gk_cache.enable()), the text is hashed while it is written
+    and the file is linked from the cache when the same model was written
+    before.
 
     Returns:
         Does not return
     '''
-    model = ''
+    # Create .apm file
+    if(self._model_name == None):
+        self._model_name = "default_model_name"
+    filename = self._model_name + '.apm'
+
+    # Skip writing the same model again
+    structure = _model_fingerprint(self)
+    if structure == self._model_structure and \
+       os.path.isfile(os.path.join(self._path,filename)):
+        return
+
+    # Create file in writable format always overrite previous model file
+    with gk_cache.stream(os.path.join(self._path,filename)) as f:
+        _write_model(self, f)
+
+    self._model = 'auto-generated' #what does this do?
+    self._model_structure = structure
+
+    self._model_initialized = True
+
+
+def _write_model(self, f):
+    ''' Write the sections of the model to the file object f '''
+    f.write('Model\n')
 
     if self._constants:
-        model += 'Constants\n'
+        f.write('Constants\n')
         for const in self._constants:
-            model += '\t%s = %s\n' % (const, const.value)
-        model += 'End Constants\n'
+            f.write(_signs('\t%s = %s\n' % (const, const.value)))
+        f.write('End Constants\n')
 
-    if self._parameters:
-        model += 'Parameters\n'
+    #FV and MV arrays are parameters
+    parameter_arrays = [a for a in self._arrays if a.type in ('FV', 'MV')]
+    variable_arrays = [a for a in self._arrays if a.type not in ('FV', 'MV')]
+
+    if self._parameters or parameter_arrays:
+        f.write('Parameters\n')
         for parameter in self._parameters:
-            i = 0
-            model += '\t%s' % parameter
-            if not isinstance(parameter.VALUE.value, (list,np.ndarray)):
-                if not (parameter.VALUE==None):
-                    i = 1
-                    model += ' = %s' % parameter.VALUE
-            if parameter.UPPER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '<= %s' % parameter.UPPER
-            if parameter.LOWER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '>= %s' % parameter.LOWER
-            model += '\n'
-        model += 'End Parameters\n'
+            f.write(_signs(_bounds(parameter)))
+        for array in parameter_arrays:
+            f.writelines(_signs(line) for line in array._declarations())
+        f.write('End Parameters\n')
 
-    if self._variables:
-        model += 'Variables\n'
+    if self._variables or variable_arrays:
+        f.write('Variables\n')
         for variable in self._variables:
-            i = 0
-            model += '\t%s' % variable
-            if not isinstance(variable.VALUE.value, (list,np.ndarray)):
-                if not (variable.VALUE==None):
-                    i = 1
-                    model += ' = %s' % variable.VALUE
-            if variable.UPPER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '<= %s' % variable.UPPER
-            if variable.LOWER is not None:
-                if i == 1:
-                    model += ', '
-                i = 1
-                model += '>= %s' % variable.LOWER
-            model += '\n'
-        model += 'End Variables\n'
+            f.write(_signs(_bounds(variable)))
+        for array in variable_arrays:
+            f.writelines(_signs(line) for line in array._declarations())
+        f.write('End Variables\n')
 
     if self._intermediates:
-        model += 'Intermediates\n'
+        f.write('Intermediates\n')
         for i in range(len(self._inter_equations)):
-            model += '\t%s=%s\n' % (str(self._intermediates[i]), str(self._inter_equations[i]))
-        model += 'End Intermediates\n'
+            f.write(_signs('\t%s=%s\n' % (str(self._intermediates[i]), str(self._inter_equations[i]))))
+        f.write('End Intermediates\n')
 
     if self._equations or self._objectives:
-        model += 'Equations\n'
+        f.write('Equations\n')
         if self._equations:
             for equation in self._equations:
-                model += '\t%s\n' % equation
+                f.write(_signs('\t%s\n' % equation))
         if self._objectives:
             for o in self._objectives:
-                model += '\t%s\n' % o
-        model += 'End Equations\n'
+                f.write(_signs('\t%s\n' % o))
+        f.write('End Equations\n')
 
     if self._connections:
-        model += 'Connections\n'
+        f.write('Connections\n')
         for connection in self._connections:
-            model += '\t%s\n' % connection
-        model += 'End Connections\n'
+            f.write(_signs('\t%s\n' % connection))
+        f.write('End Connections\n')
 
     if self._objects:
-        model += 'Objects\n'
+        f.write('Objects\n')
         for obj_str in self._objects:
-            model += '\t%s\n' % obj_str
-        model += 'End Objects\n'
+            f.write(_signs('\t%s\n' % obj_str))
+        f.write('End Objects\n')
 
     if self._compounds:
-        model += 'Compounds\n'
+        f.write('Compounds\n')
         for compound in self._compounds:
-            model += '  %s\n' % (compound,)
-        model += 'End Compounds\n'
-
-    #print(model) #for debugging
-
-    #replace multiple operators resulting from signs
-    model = model.replace('++','+').replace('--','+').replace('+-','-').replace('-+','-')
+            f.write(_signs('  %s\n' % (compound,)))
+        f.write('End Compounds\n')
 
-    # Create .apm file
-    if(self._model_name == None):
-        self._model_name = "default_model_name"
-    filename = self._model_name + '.apm'
-
-    # Create file in writable format always overrite previous model file
-    f = open(os.path.join(self._path,filename), 'w')
-    f.write('Model\n')
-    f.write(model)
     f.write('\nEnd Model')
     if self._raw:
         f.write('\n')
         for r in self._raw:
             f.write('%s\n'%r)
-    f.close()
 
-    self._model = 'auto-generated' #what does this do?
 
-    self._model_initialized = True
 
+def _csv_text(column, integer):
+    ''' Text of one csv column, written the same as str() of each value '''
+    if integer:
+        return list(map(str, column.astype(np.int64).tolist()))
+    else:
+        return list(map(repr, column.tolist()))
 
 
 def _write_csv(self):
     """Write csv file and validate data.
     If the problem is dynamic, the time discretization is provided in the
     first column of this csv. All params/variables that are initialized
-    with an array are loaded as well and must be the same length. """
+    with an array are loaded as well and must be the same length.
+
+    Values are collected as float64 columns of one preallocated array.
+    Placeholder cells (blank for unchanged elements, 'measurement', fixed
+    values from connections) are kept in a separate blank mask and a sparse
+    dictionary of cell text instead of converting the data to strings. """
 
     file_name = self._model_name + '.csv'
 
+    vps = self._variables+self._parameters
+    names = []       # column headers
+    integer = []     # column written as integers
+    data = None      # preallocated (length x columns) float64 array
+    blank = None     # mask of blank cells (only certain elements changed)
+    cells = {}       # (row,column) -> text that replaces a number
+
+    def new_column(name, values):
+        # add a column and return its index
+        nonlocal data
+        if data is None:
+            data = np.empty((length, len(vps)+1))
+        j = len(names)
+        names.append(name)
+        values = np.asarray(values).ravel()
+        try:
+            data[:,j] = values
+            integer.append(values.dtype.kind in 'iub')
+        except (TypeError, ValueError):
+            if np.size(values) != length:
+                raise
+            # non-numeric data is written as text
+            data[:,j] = 0.0
+            integer.append(False)
+            for i in range(length):
+                cells[(i,j)] = str(values[i])[:25]
+        return j
+
     ## Dynamic data csv
     if self.options.IMODE > 3:
         #Start with time
         length = np.size(self.time)
-        csv_data = np.hstack(('time',np.array(self.time).flatten().astype(object)))
+        new_column('time', self.time)
         first_array = True
     ## SS data
     else:
@@ -150,13 +223,13 @@ def _write_csv(self):
             print("Warning: model time only used for dynamic modes (IMODE>3)")
 
     #check all parameters and arrays
-    for vp in self._variables+self._parameters:
+    for vp in vps:
         #Only save csv data if the user changed the value (changes registered in vp.value.change)
         if vp.value.change is False:
             continue
         else:
             if first_array == False:
-                length = np.size(np.array(vp.value).flatten())
+                length = np.size(vp.VALUE.value)
                 if self.options.IMODE in (1,3) and length > 1:
                     raise Exception('This steady-state IMODE only allows scalar values.')
                 elif self.options.IMODE == 2 and length == 1:
@@ -182,17 +255,22 @@ def _write_csv(self):
                 elif np.size(vp.VALUE.value) != length:
                     raise Exception('Data arrays must have the same length, and match time discretization in dynamic problems')
                 #group data with column header
-                t = np.hstack((vp.name,np.array(vp.VALUE.value).flatten().astype(object)))
+                j = new_column(vp.name, vp.VALUE.value)
 
-            elif isinstance(vp.value.change,list): #only certain elements should be saved
+            elif isinstance(vp.value.change,np.ndarray): #only certain elements should be saved
                 if not isinstance(vp.VALUE.value, (list,np.ndarray)):
                     vp.VALUE.value = np.ones(length)*vp.VALUE.value
                 elif len(vp.VALUE) == 1:
                     vp.VALUE = np.ones(length)*vp.VALUE[0]
-                t = np.array(vp.VALUE).astype(object)
-                t[:] = ' '
-                t[vp.value.change] = np.array(vp.value)[vp.value.change]
-                t = np.hstack((str(vp),t.flatten().astype(object)))
+                if np.size(vp.VALUE.value) != length:
+                    raise Exception('All variable value arrays must be the same length (and match the length of model time in dynamic problems).')
+                j = new_column(str(vp), vp.VALUE.value)
+                #write unchanged elements as blanks unless the values were
+                #discretized above (which registers a change of all elements)
+                if isinstance(vp.value.change,np.ndarray):
+                    if blank is None:
+                        blank = np.zeros(data.shape, dtype=bool)
+                    blank[:,j] = ~vp.value.change
 
             else: #somebody broke value.change
                 raise Exception('Variable value modification monitor malfunction.')
@@ -204,13 +282,12 @@ def _write_csv(self):
             #value array to allow measurement to be read in
             if hasattr(vp,'MEAS'):
                 if vp.MEAS != None:
-                    #vp.VALUE = np.array(vp.VALUE).astype(object)
                     if self.options.IMODE in [5,8] and vp.type=='CV':
                         #measurements in estimation go at the end of the horizon
                         #FDELAY shifts the location of the measurement
-                        t[-1-vp.FDELAY] = 'measurement'
+                        cells[(length-1-vp.FDELAY,j)] = 'measurement'
                     else:
-                        t[1] = "measurement"
+                        cells[(0,j)] = "measurement"
 
                     #reset MEAS so it doesn't get repeated on next solve
                     vp.MEAS = None
@@ -220,83 +297,115 @@ def _write_csv(self):
             #whatever initialization value is in the csv
             if hasattr(vp,'_override_csv'):
                 for i in vp._override_csv: #for each tuple of (position,value)
-                    #set value in t array
-                    t[i[0]+1] = i[1] #index is +1 because of prepended header
+                    #set value in the column
+                    cells[(i[0] % length,j)] = str(i[1])[:25]
+
+            first_array = True
 
+    #variable arrays with changed values that are not in the declarations
+    array_names = []
+    array_columns = []
+    for array in self._arrays:
+        if array._csv_pending():
             if first_array == False:
-                csv_data = t
-                first_array = True
-            else:
-                try:
-                    csv_data = np.vstack((csv_data,t))
-                except ValueError:
-                    raise Exception('All variable value arrays must be the same length (and match the length of model time in dynamic problems).')
+                length = 1
+            a_names, a_columns = array._csv_columns(length)
+            array_names += a_names
+            array_columns += a_columns
+            first_array = True
 
     #save array to csv
     if first_array == False: #no data
         self.csv_status = 'none'
     else:
-        # create header separately for potential long variable names >=25 in length
-        if csv_data.ndim==1:
-            # with only one variable
-            hdr = csv_data[0]
-            np.savetxt(os.path.join(self._path,file_name), csv_data[1:],\
-                       delimiter=",",comments='',header=hdr,fmt='%1.25s')
-        else:
-            # with multiple variables
-            hdr = csv_data[0,0] + ',' + ','.join([csv_data[i,0] for i in range(1,np.size(csv_data,0))])
-            np.savetxt(os.path.join(self._path,file_name), csv_data[:,1:].T,\
-                       delimiter=",",comments='',header=hdr,fmt='%1.25s')
+        columns = []
+        for j in range(len(names)):
+            text = _csv_text(data[:,j], integer[j])
+            if blank is not None:
+                for i in np.flatnonzero(blank[:,j]):
+                    text[i] = ' '
+            columns.append(text)
+        for (i,j),value in cells.items():
+            columns[j][i] = value
+        names += array_names
+        columns += array_columns
+        # header is written in full for long variable names >=25 in length
+        with open(os.path.join(self._path,file_name), 'w') as f:
+            f.write(','.join(names) + '\n')
+            f.writelines(','.join(row) + '\n' for row in zip(*columns))
         self.csv_status = 'generated'
 
 
 def _write_info(self):
-    #since there is currently no way to change variable classification after
-    #declaration, rewriting the info file is redundant and makes the server info
-    #file on remote solves large
-    #avoid this problem by only writing the info file for the first successful solve
-    if self.options.CYCLECOUNT < 1:
-        #Classify variable in .info file
-        filename = self._model_name+'.info'
-
-        #Create and open configuration files
-        with open(os.path.join(self._path,filename), 'w+') as f:
-            #check each Var and Param for FV/MV/SV/CV
-            for vp in self._variables+self._parameters:
-                if vp.type is not None:
-                    f.write(vp.type+', '+vp.name+'\n')
-
-
-def _generate_dbs_file(self):
+    #rewriting the info file when the variable classification is the same is
+    #redundant and makes the server info file on remote solves large
+    #avoid this problem by only writing the info file when an FV/MV/SV/CV
+    #was added since it was last written
+    filename = self._model_name+'.info'
+    info = [(vp.type, vp.name) for vp in self._variables+self._parameters if vp.type is not None]
+    info += [(a.type, name) for a in self._arrays if a.type is not None for name in a.names()]
+    if info == self._info_structure and os.path.isfile(os.path.join(self._path,filename)):
+        return
+
+    #Classify variable in .info file
+    #Create and open configuration files
+    with open(os.path.join(self._path,filename), 'w+') as f:
+        #check each Var and Param for FV/MV/SV/CV
+        for vptype, name in info:
+            f.write(vptype+', '+name+'\n')
+    self._info_structure = info
+
+
+def _generate_dbs_file(self, changed_only=None):
     '''Write options to measurements.dbs file so it gets automatically deleted
     to prevent file build-up on the server
 
+    APM keeps the options of the last solve in the database file of the
+    model (DBS_WRITE), so after a solve in the same folder (that still has
+    the file) or on the same server only the options that were set since
+    are written. Objects that were added since the last file are written
+    with all of their options.
+
+    changed_only = True/False to write only the changed or all options,
+                   default (None) is changed options after a loaded solve
+
     Returns:
         Does not return
     '''
+    if changed_only is None:
+        #a local solver reads the options of the last solve from {model}.dbs
+        changed_only = self._dbs_synced == self._dbs_target() and self.options.DBS_READ != 0 and \
+                       (self._remote or os.path.isfile(os.path.join(self._path, self._model_name + '.dbs')))
+    #the solver has these options once the solution is loaded
+    self._dbs_synced = None
     #set filename
     filename = 'measurements.dbs'
     #print all global options
-    file_content = self.options.getOverridesString()
+    file_content = self.options.getOverridesString(changed_only)
     #cycle through all Params and Vars to find set options
     with open(os.path.join(self._path,filename), 'w+') as f:
         f.write(file_content)
         #check for set options of each Var and Param
-        for vp in self._parameters:
-            for o in parameter_options[vp.type]['inputs']+parameter_options[vp.type]['inout']:
-                if o == 'VALUE':
-                    continue
-                else: #everything else is an option
-                    if vp.__dict__[o] is not None:
-                        f.write(vp.name+'.'+o+' = '+str(vp.__dict__[o])+'\n')
-
-        for vp in self._variables:
-            for o in variable_options[vp.type]['inputs']+variable_options[vp.type]['inout']:
-                if o == 'VALUE':
+        for vps, vp_options in ((self._parameters, parameter_options), (self._variables, variable_options)):
+            for vp in vps:
+                changed = vp._changed
+                #objects added since the last file have all options written
+                if changed_only and changed is not None and not changed:
                     continue
-                else: #everything else is an option
-                    if vp.__dict__[o] is not None:
-                        f.write(vp.name+'.'+o+' = '+str(vp.__dict__[o])+'\n')
+                names = vp_options[vp.type]['inputs']+vp_options[vp.type]['inout']
+                if changed_only and changed is not None:
+                    names = [o for o in names if o in changed]
+                for o in names:
+                    if o == 'VALUE':
+                        continue
+                    else: #everything else is an option
+                        value = getattr(vp, o)
+                        if value is not None:
+                            f.write(vp.name+'.'+o+' = '+str(value)+'\n')
+                object.__setattr__(vp, '_changed', ())
+
+        for array in self._arrays:
+            f.writelines(array._dbs_lines(changed_only))
 
 def _write_solver_options(self):
     opt_file = ''
@@ -316,10 +425,13 @@ def _write_solver_options(self):
         #If remote solve, pass string to append to .apm file
         if self._remote is True:
             return 'File ' + filename + '\n' + opt_file + '\nEnd File\n'
-        #write file for local solve
+        #write file for local solve (unless it is unchanged)
         else:
-            with open(os.path.join(self._path,filename), 'w+') as f:
-                f.write(opt_file)
+            path = os.path.join(self._path,filename)
+            if (filename, opt_file) != self._solver_options_file or not os.path.isfile(path):
+                with open(path, 'w+') as f:
+                    f.write(opt_file)
+                self._solver_options_file = (filename, opt_file)
 
     #do nothing if no options were added
     else:
@@ -83,3 +83,27 @@ CV_output_options = SV_output_options + ['LSTVAL']
 variable_options = {'SV':{'inputs':SV_input_options, 'outputs':SV_output_options, 'inout': SV_inout_options}, 
                     'CV':{'inputs':CV_input_options,'outputs':CV_output_options,'inout':CV_inout_options},
                     None:{'inputs':Var_input_options,'outputs':Var_output_options,'inout':Var_inout_options}}
+
+
+#%% Option tables of the variable and parameter classes
+
+def option_slots(table, vptype, *parents):
+    ''' Options of vptype (in parameter_options or variable_options) that
+    are not options of the parent types, one slot for each in the class.
+    VALUE is a slot of GK_Operators. '''
+    names = set(table[vptype]['inputs'] + table[vptype]['outputs'] + table[vptype]['inout'])
+    names.discard('VALUE')
+    for parent in parents:
+        names.difference_update(*table[parent].values())
+    return tuple(sorted(names))
+
+def settable_options(table, vptype):
+    ''' Options that the user can set: inputs and input/outputs '''
+    return frozenset(table[vptype]['inputs'] + table[vptype]['inout'])
+
+def option_defaults(table, vptype, defaults={}):
+    ''' (option, default value) of all options of vptype but VALUE, the
+    options are None unless they are in defaults '''
+    names = set(table[vptype]['inputs'] + table[vptype]['outputs'] + table[vptype]['inout'])
+    names.discard('VALUE')
+    return tuple((o, defaults.get(o)) for o in sorted(names))